@@ -1,118 +1,63 @@
 # app.py - Main Flask Application
-from flask import Flask, request, jsonify, session, send_from_directory, send_file, abort
+from flask import Flask, request, jsonify, session, send_from_directory, send_file, abort, has_request_context
 from flask_cors import CORS
+from flask.json.provider import DefaultJSONProvider
 from flask_compress import Compress
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import mysql.connector
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
+from decimal import Decimal
 import jwt
 import os
 import time
 import csv
 import io
-import re
 import traceback
 from io import BytesIO
 import hashlib
+import base64
 try:
     import bcrypt
-    print(f"[DEBUG] bcrypt module imported successfully: {bcrypt}")
 except ImportError:
-    print("[DEBUG] bcrypt not found, attempting to install...")
-    import subprocess
-    import sys
-    try:
-        subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'bcrypt'])
-        import bcrypt
-        print(f"[DEBUG] bcrypt installed and imported: {bcrypt}")
-    except Exception as e:
-        print(f"[DEBUG] Failed to install bcrypt: {e}")
-        bcrypt = None
+    # Install it with requirements.txt; without it bcrypt password hashes cannot be verified
+    bcrypt = None
 try:
     from dotenv import load_dotenv
     load_dotenv()  # Load environment variables from .env file
 except ImportError:
     pass  # python-dotenv not installed
 try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.utils import ImageReader
-except Exception:
-    # reportlab may not be installed in dev environment; the endpoint will return an error
-    A4 = None
-    canvas = None
-    ImageReader = None
+    import orjson
+except ImportError:
+    orjson = None  # optional: AppJSONProvider falls back to the stdlib encoder
 from functools import wraps
 import json
-import mimetypes
-import requests
-import re
+import importlib.util
 from document_manager import get_document_manager
+from cascade_manager import get_file_reaper, delete_deal_cascade, delete_orphans, ER_NO_SUCH_TABLE
+
+# MySQL error raised when a query references a column that does not exist
+ER_BAD_FIELD_ERROR = 1054
+from upload_gc import get_upload_gc
+from date_utils import normalize_date, normalize_dates
+from response_cache import ResponseCache, create_cache_backend
+from db_router import ReplicaRouter, parse_replica_hosts
+from scheduler import get_payment_scheduler, create_notifier
+from password_hasher import get_password_hasher, PasswordHasherBusy
+from token_cache import get_token_cache
+from deal_summary import lock_deal, lock_deals, refresh_deal_summary, refresh_deal_summaries, ensure_schema as ensure_deal_summary_schema
+from cashflow import (refresh_cashflow, ensure_schema as ensure_cashflow_schema, month_start, month_range, add_months,
+                      query_rollups, build_series, GROUP_COLUMNS as CASHFLOW_GROUPS, ROLLUP_STATUSES, MAX_MONTHS)
+from statements import build_statement, statement_csv, statement_pdf
+from share_updates import parse_shares, apply_shares, ShareUpdateError
 
 def parse_date_to_mysql_format(date_str):
     """
-    Parse various date formats and convert to MySQL-compatible YYYY-MM-DD format
-    Handles formats like:
-    - 'Fri, 05 Sep 2025 00:00:00 GMT' (JavaScript toUTCString)
-    - '2025-09-05' (ISO format)
-    - '09/05/2025' (US format)
-    - '05/09/2025' (UK format)
+    Parse various date formats and convert to MySQL-compatible YYYY-MM-DD format.
+    See date_utils.normalize_date for the accepted forms and the MM/DD vs DD/MM rule.
     """
-    if not date_str:
-        return None
-    
-    # Clean the input string
-    date_str = str(date_str).strip()
-    
-    try:
-        # Try YYYY-MM-DD format first (ISO format)
-        if re.match(r'^\d{4}-\d{2}-\d{2}$', date_str):
-            parsed_date = datetime.strptime(date_str, '%Y-%m-%d')
-            return parsed_date.strftime('%Y-%m-%d')
-    except Exception:
-        pass
-    
-    try:
-        # Try MM/DD/YYYY format
-        if re.match(r'^\d{1,2}/\d{1,2}/\d{4}$', date_str):
-            parsed_date = datetime.strptime(date_str, '%m/%d/%Y')
-            return parsed_date.strftime('%Y-%m-%d')
-    except Exception:
-        pass
-    
-    try:
-        # Try DD/MM/YYYY format
-        if re.match(r'^\d{1,2}/\d{1,2}/\d{4}$', date_str):
-            parsed_date = datetime.strptime(date_str, '%d/%m/%Y')
-            return parsed_date.strftime('%Y-%m-%d')
-    except Exception:
-        pass
-    
-    try:
-        # Handle JavaScript date format: 'Fri, 05 Sep 2025 00:00:00 GMT' or truncated 'GM'
-        if ',' in date_str and ('GMT' in date_str or 'UTC' in date_str or 'GM' in date_str):
-            # Extract just the date part after the comma
-            date_part = date_str.split(',')[1].strip()
-            # Remove timezone info (GMT, UTC, or truncated GM)
-            date_part = re.sub(r'\s+(GMT|UTC|GM).*$', '', date_part)
-            # Parse: '05 Sep 2025 00:00:00'
-            parsed_date = datetime.strptime(date_part, '%d %b %Y %H:%M:%S')
-            return parsed_date.strftime('%Y-%m-%d')
-    except Exception:
-        pass
-    
-    try:
-        # Try ISO datetime format: '2025-09-05T00:00:00.000Z'
-        if 'T' in date_str:
-            date_part = date_str.split('T')[0]
-            parsed_date = datetime.strptime(date_part, '%Y-%m-%d')
-            return parsed_date.strftime('%Y-%m-%d')
-    except Exception:
-        pass
-    
-    # If all parsing fails, return None
-    return None
+    return normalize_date(date_str)
 
 def verify_password_comprehensive(password, stored_hash):
     """
@@ -128,24 +73,14 @@ def verify_password_comprehensive(password, stored_hash):
     stored_hash = str(stored_hash).strip()
     
     # Try bcrypt FIRST since this is what we're using
-    try:
-        if stored_hash.startswith('$2b$'):
-            if bcrypt is None:
-                # Try to import bcrypt again
-                import bcrypt as bcrypt_module
-                result = bcrypt_module.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
-            else:
-                result = bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
-            if result:
-                return True
-    except Exception as e:
-        # Try importing bcrypt directly in case of import issues
+    if stored_hash.startswith(('$2a$', '$2b$', '$2y$')):
+        if bcrypt is None:
+            print("[WARNING] bcrypt password hash found but bcrypt is not installed")
+            return False
         try:
-            import bcrypt as bcrypt_direct
-            result = bcrypt_direct.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
-            if result:
+            if bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8')):
                 return True
-        except Exception:
+        except ValueError:
             pass
     
     # Try Werkzeug password hash (pbkdf2, sha1, scrypt, etc.)
@@ -177,22 +112,122 @@ def verify_password_comprehensive(password, stored_hash):
     
     return False
 
-# Load environment variables from .env file if it exists
-def load_env_file():
-    """Load environment variables from .env file"""
-    env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
-    if os.path.exists(env_path):
-        with open(env_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
-
-# Load environment variables
-load_env_file()
+# Cost for new bcrypt hashes; older hashes are upgraded on the next successful login
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+
+def hash_password(password):
+    """Hash a new password: bcrypt at BCRYPT_ROUNDS, or Werkzeug's default when bcrypt is missing"""
+    if bcrypt is not None:
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
+    return generate_password_hash(password)
+
+def password_needs_rehash(stored_hash):
+    """True when a stored hash is not a bcrypt hash at the current cost"""
+    if bcrypt is None:
+        return False
+    stored_hash = str(stored_hash or '')
+    if not stored_hash.startswith(('$2a$', '$2b$', '$2y$')):
+        return True
+    try:
+        return int(stored_hash[4:6]) != BCRYPT_ROUNDS
+    except ValueError:
+        return True
+
+def verify_and_upgrade(password, stored_hash):
+    """
+    Verify a password and, when it matches a legacy or lower-cost hash, compute its replacement.
+    Returns (is_valid, new_hash or None). Runs on the password pool.
+    """
+    if not verify_password_comprehensive(password, stored_hash):
+        return False, None
+    return True, hash_password(password) if password_needs_rehash(stored_hash) else None
+
+# Optional capabilities, detected without importing the (slow) packages themselves
+CAPABILITIES = {
+    'bcrypt': bcrypt is not None,
+    'pdf_export': importlib.util.find_spec('reportlab') is not None,
+    'orjson': orjson is not None,
+    'numpy': importlib.util.find_spec('numpy') is not None,
+}
+if bcrypt is None:
+    print("[WARNING] bcrypt is not installed: users with bcrypt password hashes cannot log in")
+
+# Password hashing/verification runs here, off the request threads
+password_hasher = get_password_hasher(
+    max_workers=int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+    max_queue=int(os.environ.get('PASSWORD_HASH_QUEUE', 32))
+)
+
+_reportlab = None
+
+def load_reportlab():
+    """Import reportlab on first use (ledger PDF); returns (A4, canvas, ImageReader) or None"""
+    global _reportlab
+    if _reportlab is None:
+        try:
+            from reportlab.lib.pagesizes import A4
+            from reportlab.pdfgen import canvas
+            from reportlab.lib.utils import ImageReader
+            _reportlab = (A4, canvas, ImageReader)
+        except ImportError:
+            _reportlab = False
+    return _reportlab or None
+
+class AppJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that serializes datetime/date as ISO 8601 and Decimal as a number,
+    so handlers can return DB rows as-is instead of converting them row by row.
+    Uses orjson when it is installed and falls back to the stdlib encoder otherwise.
+
+    API note: Flask's default provider sent Decimal as a string ("1500000.00"), so DECIMAL
+    columns returned without a float() in the handler used to arrive as strings. Every money,
+    percentage and area field is now a JSON number (1500000.0). Any DECIMAL(15,2) value
+    round-trips through a float unchanged (15 significant digits). Clients must not rely
+    on string methods or trailing zeros for these fields.
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (datetime, date)):
+            return o.isoformat()
+        if isinstance(o, Decimal):
+            return float(o)
+        return DefaultJSONProvider.default(o)
+
+    def _orjson_options(self, indent=None):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, indent=None):
+        """Serialize to UTF-8 bytes, skipping the str round trip when orjson is available"""
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+            except (orjson.JSONEncodeError, TypeError):
+                # e.g. integers wider than 64 bits; the stdlib encoder handles them
+                pass
+        return self.dumps(obj, indent=indent).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and set(kwargs) <= {'indent', 'separators'}:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._orjson_options(kwargs.get('indent'))).decode('utf-8')
+            except (orjson.JSONEncodeError, TypeError):
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent) + b'\n', mimetype=self.mimetype)
 
 app = Flask(__name__)
+app.json_provider_class = AppJSONProvider
+app.json = AppJSONProvider(app)
 app.static_folder = 'uploads'
 app.static_url_path = '/uploads'
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'fallback-dev-key-not-for-production')
@@ -201,9 +236,25 @@ app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 16 *
 # Enable response compression for better performance
 Compress(app)
 
+# Response cache for read-heavy GET endpoints; write handlers invalidate by tag.
+# CACHE_BACKEND_URL: unset/'memory' for an in-process LRU, or redis://host:port/db to share across workers
+response_cache = ResponseCache(
+    create_cache_backend(os.environ.get('CACHE_BACKEND_URL'), int(os.environ.get('CACHE_MAX_ENTRIES', 1024))),
+    default_ttl=int(os.environ.get('CACHE_TTL_SECONDS', 60)),
+    enabled=os.environ.get('CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+)
+
+# Verified JWTs (and the user's access context) so repeat calls skip signature checks and user lookups
+token_cache = get_token_cache(
+    max_entries=int(os.environ.get('TOKEN_CACHE_MAX_ENTRIES', 10000)),
+    access_ttl=int(os.environ.get('TOKEN_ACCESS_TTL_SECONDS', 60))
+)
+
 APP_ROOT = os.path.dirname(__file__)
 # Use absolute uploads folder inside backend so static serving works predictably
 app.config['UPLOAD_FOLDER'] = os.path.join(APP_ROOT, os.environ.get('UPLOAD_FOLDER', 'uploads'))
+# Files found unreferenced by the upload GC are moved here; kept outside UPLOAD_FOLDER so they are never served
+UPLOAD_QUARANTINE_FOLDER = os.path.join(APP_ROOT, os.environ.get('UPLOAD_QUARANTINE_FOLDER', 'uploads_quarantine'))
 
 # Configure CORS with environment variable for frontend URL
 frontend_origins = [
@@ -234,6 +285,14 @@ if os.path.exists(ssl_ca_path) and os.environ.get('DB_HOST') and 'aivencloud.com
         'ssl_verify_identity': True
     })
 
+# Optional read replicas (DB_REPLICA_HOSTS=host1:3306,host2). Credentials and database match DB_CONFIG.
+replica_router = ReplicaRouter(
+    DB_CONFIG,
+    parse_replica_hosts(os.environ.get('DB_REPLICA_HOSTS'), DB_CONFIG['port']),
+    pool_size=int(os.environ.get('DB_REPLICA_POOL_SIZE', 5)),
+    sticky_seconds=float(os.environ.get('DB_READ_YOUR_WRITES_SECONDS', 5))
+)
+
 # Create uploads directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
@@ -246,6 +305,81 @@ def get_db_connection():
         # Log error to application logs instead of console
         return None
 
+def get_read_db_connection():
+    """
+    Connection for read-only endpoints and exports: a replica when configured and healthy,
+    otherwise the primary. Users who just wrote are kept on the primary (see record_user_write).
+    A replica read made while anyone's write may not have replicated yet is kept out of the
+    response cache, which would otherwise store the old rows under the freshly bumped tags.
+    """
+    if not has_request_context():
+        return replica_router.get_read_connection(None, get_db_connection)
+    user = getattr(request, 'user', None)
+    return replica_router.get_read_connection(user.get('id') if user else None, get_db_connection,
+                                              on_lagging_read=response_cache.skip_store)
+
+@app.after_request
+def record_user_write(response):
+    """Pin the user to the primary for a short window after a successful mutation"""
+    if replica_router.enabled and request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+        user = getattr(request, 'user', None)
+        if user:
+            replica_router.record_write(user.get('id'))
+    return response
+
+# Rows pulled from the server per fetchmany() call when streaming list responses
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 500))
+
+def stream_json_rows(conn, cursor, transform=None, envelope_key=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Stream the pending result set of an executed (unbuffered) cursor as a JSON array,
+    encoding rows chunk by chunk instead of materializing the whole list.
+    The body is byte-for-byte what jsonify(rows) / jsonify({envelope_key: rows}) would produce.
+    `transform(row)` may reshape a row or return None to drop it.
+    The stream owns `conn` and closes it when the body is finished or the client goes away.
+    """
+    encode = app.json.dumps_bytes
+    if envelope_key:
+        prefix = b'{' + encode(envelope_key) + b':['
+        suffix = b']}\n'
+    else:
+        prefix = b'['
+        suffix = b']\n'
+
+    def generate():
+        try:
+            yield prefix
+            first = True
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if transform:
+                    rows = [r for r in map(transform, rows) if r is not None]
+                if not rows:
+                    continue
+                body = b','.join(encode(r) for r in rows)
+                yield body if first else b',' + body
+                first = False
+            yield suffix
+        finally:
+            # A client that goes away mid-stream leaves rows unread; a pooled (replica) connection
+            # with a pending result cannot be reset, so drain it, or reset the session if that fails
+            try:
+                conn.consume_results()
+            except Exception as e:
+                app.logger.warning(f"Could not drain streamed result, resetting session: {e}")
+                try:
+                    conn.reset_session()
+                except Exception as e:
+                    app.logger.error(f"Could not reset streamed connection: {e}")
+            try:
+                conn.close()
+            except Exception as e:
+                app.logger.error(f"Error closing streamed connection: {e}")
+
+    return app.response_class(generate(), mimetype=app.json.mimetype)
+
 # JWT token decorator
 def token_required(f):
     @wraps(f)
@@ -257,7 +391,11 @@ def token_required(f):
         try:
             if token.startswith('Bearer '):
                 token = token[7:]
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+            token_key = token_cache.key(token)
+            data = token_cache.get_claims(token_key, app.config['SECRET_KEY'])
+            if data is None:
+                data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+                token_cache.put_claims(token_key, app.config['SECRET_KEY'], data)
             # Create current_user object with all necessary data
             current_user = {
                 'id': data.get('user_id'),
@@ -266,12 +404,49 @@ def token_required(f):
             }
             # Also expose decoded user on request for permission checks
             request.user = current_user
+            request.token_key = token_key
         except:
             return jsonify({'error': 'Token is invalid'}), 401
         
         return f(current_user, *args, **kwargs)
     return decorated
 
+def get_user_access(current_user, cursor=None):
+    """
+    Role and owner/investor links of the current user, or None if the user no longer exists.
+    Cached with the verified token (see token_cache); on a miss the given cursor is used,
+    or a connection of its own when there is none.
+    """
+    token_key = getattr(request, 'token_key', None)
+    if token_key:
+        access = token_cache.get_access(token_key)
+        if access is not None:
+            return access
+
+    conn = None
+    try:
+        if cursor is None:
+            conn = get_db_connection()
+            cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT role, owner_id, investor_id FROM users WHERE id = %s", (current_user['id'],))
+        user_data = cursor.fetchone()
+    finally:
+        if conn:
+            conn.close()
+    if not user_data:
+        return None
+
+    access = {
+        'role': user_data['role'],
+        'owner_id': user_data['owner_id'],
+        'investor_id': user_data['investor_id'],
+        'can_access_all': user_data['role'] in ['admin', 'auditor'],
+        'is_read_only': user_data['role'] == 'user'
+    }
+    if token_key:
+        token_cache.put_access(token_key, access)
+    return access
+
 def user_access_control(f):
     """
     Decorator to add user-specific access control.
@@ -280,31 +455,16 @@ def user_access_control(f):
     """
     @wraps(f)
     def decorated(current_user, *args, **kwargs):
-        # Get user information from database
-        conn = None
         try:
-            conn = get_db_connection()
-            cur = conn.cursor(dictionary=True)
-            cur.execute("SELECT role, owner_id, investor_id FROM users WHERE id = %s", (current_user['id'],))
-            user_data = cur.fetchone()
-            
-            if not user_data:
-                return jsonify({'error': 'User not found'}), 403
-            
-            # Add user access control info to request
-            request.user_access = {
-                'role': user_data['role'],
-                'owner_id': user_data['owner_id'],
-                'investor_id': user_data['investor_id'],
-                'can_access_all': user_data['role'] in ['admin', 'auditor'],
-                'is_read_only': user_data['role'] == 'user'
-            }
-            
+            user_access = get_user_access(current_user)
         except Exception as e:
             return jsonify({'error': 'Access control check failed'}), 500
-        finally:
-            if conn:
-                conn.close()
+        
+        if not user_access:
+            return jsonify({'error': 'User not found'}), 403
+        
+        # Add user access control info to request
+        request.user_access = user_access
         
         return f(current_user, *args, **kwargs)
     return decorated
@@ -349,11 +509,13 @@ def payments_test():
 
 @app.route('/api/payments', methods=['GET'])
 @token_required
+# Rows carry deal and party names, so renaming a deal, owner, investor or buyer must drop them too
+@response_cache.cached('payments', 'deals', 'owners', 'investors')
 def list_all_payments(current_user):
     """Return all payments across all deals with deal information"""
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_read_db_connection()
         cursor = conn.cursor(dictionary=True)
         
         # Get all payments with deal information and resolved names
@@ -387,22 +549,18 @@ def list_all_payments(current_user):
             LEFT JOIN districts dist ON d.district_id = dist.id
             ORDER BY p.payment_date DESC, p.id DESC
         """)
-        rows = cursor.fetchall() or []
 
-        # Convert dates to isoformat
-        for r in rows:
-            for k in ('payment_date', 'due_date', 'created_at'):
-                if r.get(k) is not None and isinstance(r.get(k), datetime):
-                    r[k] = r[k].isoformat()
-            
+        def add_deal_name(r):
             # Add deal name for frontend display
             if r.get('deal_name'):
                 r['dealName'] = r['deal_name']
             else:
                 r['dealName'] = f"Deal #{r['deal_id']}"
+            return r
 
-        print(f"[DEBUG] Successfully fetched {len(rows)} payments")
-        return jsonify({'payments': rows}), 200
+        response = stream_json_rows(conn, cursor, transform=add_deal_name, envelope_key='payments')
+        conn = None  # closed by the stream
+        return response, 200
 
     except Exception as e:
         print(f"[DEBUG] Error fetching all payments: {str(e)}")
@@ -415,6 +573,8 @@ def list_all_payments(current_user):
 
 
 @app.route('/api/payments/<int:deal_id>', methods=['GET'])
+# Deal and party names are joined in, as in list_all_payments
+@response_cache.cached('payments', 'deal:{deal_id}', 'deals', 'owners', 'investors')
 def list_payments(deal_id):
     """Return all payments for a deal"""
     conn = None
@@ -447,12 +607,6 @@ def list_payments(deal_id):
         """, (deal_id,))
         rows = cursor.fetchall() or []
 
-        # convert dates to isoformat where applicable
-        for r in rows:
-            for k in ('payment_date', 'created_at'):
-                if r.get(k) is not None and isinstance(r.get(k), datetime):
-                    r[k] = r[k].isoformat()
-
         # attach parties for each payment using a fresh cursor (dictionary rows expected)
         try:
             party_cursor = conn.cursor(dictionary=True)
@@ -480,8 +634,8 @@ def list_payments(deal_id):
                         'party_type': p.get('party_type'),
                         'party_id': p.get('party_id'),
                         'party_name': p.get('party_name'),
-                        'amount': float(p.get('amount')) if p.get('amount') is not None else None,
-                        'percentage': float(p.get('percentage')) if p.get('percentage') is not None else None,
+                        'amount': p.get('amount'),
+                        'percentage': p.get('percentage'),
                         'role': p.get('role')
                     })
                 r['parties'] = part_list
@@ -565,7 +719,7 @@ def payments_ledger_csv(current_user):
 
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_read_db_connection()
         cursor = conn.cursor()
         cursor.execute(sql, tuple(args))
         cols = [d[0] for d in cursor.description]
@@ -625,8 +779,10 @@ def payments_ledger_csv(current_user):
 @token_required
 def payments_ledger_pdf(current_user):
     """Generate a simple PDF ledger. Embeds the first proof image per payment when present."""
-    if canvas is None:
+    reportlab = load_reportlab()
+    if reportlab is None:
         return jsonify({'error': 'reportlab not available on server'}), 500
+    A4, canvas, ImageReader = reportlab
 
     params = request.args
     deal_id = params.get('deal_id')
@@ -678,7 +834,7 @@ def payments_ledger_pdf(current_user):
 
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_read_db_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute(sql, tuple(args))
         rows = cursor.fetchall() or []
@@ -872,15 +1028,12 @@ def payments_ledger():
 
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_read_db_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute(sql, tuple(args))
-        rows = cursor.fetchall() or []
-        for r in rows:
-            for k in ('payment_date', 'created_at'):
-                if r.get(k) is not None and isinstance(r.get(k), datetime):
-                    r[k] = r[k].isoformat()
-        return jsonify(rows)
+        response = stream_json_rows(conn, cursor)
+        conn = None  # closed by the stream
+        return response
     except mysql.connector.Error as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -888,15 +1041,20 @@ def payments_ledger():
             conn.close()
 
 
+# Values accepted by the payments ENUM columns; anything else is stored as the default
+PAYMENT_PARTY_TYPES = {'owner', 'buyer', 'investor', 'other'}
+PAYMENT_TYPES = {'land_purchase', 'investment_sale', 'documentation_legal', 'maintenance_taxes', 'other', 'advance', 'partial', 'final', 'registration'}
+PAYMENT_STATUSES = {'pending', 'completed', 'cancelled', 'failed', 'overdue'}
+
 @app.route('/api/payments/<int:deal_id>', methods=['POST'])
 @token_required
+@response_cache.invalidates('payments')
 def create_payment(current_user, deal_id):
     """Create a payment record for a deal"""
     data = request.get_json() or {}
     # normalize party_type to the ENUM allowed values in the DB
     party_type = data.get('party_type', 'other')
-    allowed_party_types = {'owner', 'buyer', 'investor', 'other'}
-    if party_type not in allowed_party_types:
+    if party_type not in PAYMENT_PARTY_TYPES:
         party_type = 'other'
 
     # normalize party_id to integer or None
@@ -947,13 +1105,11 @@ def create_payment(current_user, deal_id):
     
     # payment_type: support enhanced types including 'maintenance_taxes' and legacy types
     payment_type = data.get('payment_type', 'other')
-    allowed_payment_types = {'land_purchase', 'investment_sale', 'documentation_legal', 'maintenance_taxes', 'other', 'advance', 'partial', 'final', 'registration'}
-    if payment_type not in allowed_payment_types:
+    if payment_type not in PAYMENT_TYPES:
         payment_type = 'other'
         
     # Validate status
-    allowed_statuses = {'pending', 'completed', 'cancelled', 'failed', 'overdue'}
-    if status not in allowed_statuses:
+    if status not in PAYMENT_STATUSES:
         status = 'pending'
 
     # Validate amount
@@ -1016,6 +1172,9 @@ def create_payment(current_user, deal_id):
         conn = get_db_connection()
         # Start a transaction to ensure payment + parties are atomic
         conn.start_transaction()
+        # Deal row lock before the insert so the summary refresh below cannot deadlock
+        if not lock_deal(conn, deal_id):
+            return jsonify({'error': 'Deal not found'}), 404
         cursor = conn.cursor()
         # Try to insert with all enhanced fields first
         try:
@@ -1119,6 +1278,8 @@ def create_payment(current_user, deal_id):
                     except Exception:
                         raise
 
+        refresh_deal_summary(conn, deal_id)
+        refresh_cashflow(conn, deal_id, [payment_date])
         # commit transaction
         conn.commit()
 
@@ -1138,10 +1299,291 @@ def create_payment(current_user, deal_id):
             conn.close()
 
 
+# Columns written by the bulk import, in insert order; only those present in the table are used
+BULK_PAYMENT_COLUMNS = ['deal_id', 'party_type', 'party_id', 'amount', 'currency', 'payment_date', 'due_date',
+                        'payment_mode', 'reference', 'notes', 'description', 'category', 'paid_by', 'paid_to',
+                        'status', 'created_by', 'payment_type', 'payer_bank_name', 'payer_bank_account_no',
+                        'receiver_bank_name', 'receiver_bank_account_no']
+BULK_PARTY_COLUMNS = ['payment_id', 'party_type', 'party_id', 'amount', 'percentage', 'role',
+                      'pay_to_id', 'pay_to_name', 'pay_to_type']
+BULK_PAYMENT_MAX_ROWS = 5000
+BULK_INSERT_CHUNK = 500
+
+def parse_optional_number(value, cast=float):
+    """Return (number or None, error). Empty strings and None are 'not provided'"""
+    if value is None or (isinstance(value, str) and value.strip() == ''):
+        return None, None
+    try:
+        return cast(value), None
+    except (TypeError, ValueError):
+        return None, f'invalid number: {value!r}'
+
+def read_bulk_payment_rows():
+    """
+    Read bulk payment rows from the request: a JSON array (or {"payments": [...]}),
+    a CSV body (Content-Type text/csv) or a CSV file upload in the `file` field.
+    CSV headers use the JSON field names; a `parties` column may hold a JSON array.
+    """
+    if 'file' in request.files or (request.mimetype or '').endswith('csv'):
+        raw = request.files['file'].read() if 'file' in request.files else request.get_data()
+        text = raw.decode('utf-8-sig')
+        rows = []
+        for row in csv.DictReader(io.StringIO(text)):
+            row = {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+            if row.get('parties'):
+                try:
+                    row['parties'] = json.loads(row['parties'])
+                except ValueError:
+                    row['parties'] = 'invalid'
+            rows.append(row)
+        return rows
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('payments')
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array of payments, {"payments": [...]} or CSV')
+    return data
+
+def validate_bulk_payment_row(row, payment_date, due_date, force=False):
+    """
+    Validate and normalize one bulk payment row with the same rules as create_payment.
+    payment_date/due_date are the row's dates already normalized by normalize_dates.
+    Returns (payment, parties, errors).
+    """
+    errors = []
+    if not isinstance(row, dict):
+        return None, [], ['row must be an object']
+
+    amount, err = parse_optional_number(row.get('amount'))
+    if err or amount is None or amount <= 0:
+        errors.append('amount is required and must be a positive number')
+
+    if not row.get('payment_date'):
+        errors.append('payment_date is required')
+    elif payment_date is None:
+        errors.append(f"invalid payment_date: {row.get('payment_date')!r}")
+
+    if row.get('due_date') and due_date is None:
+        errors.append(f"invalid due_date: {row.get('due_date')!r}")
+
+    party_id, err = parse_optional_number(row.get('party_id'), int)
+    if err:
+        errors.append(f'party_id: {err}')
+
+    payment = {
+        'party_type': row.get('party_type') if row.get('party_type') in PAYMENT_PARTY_TYPES else 'other',
+        'party_id': party_id,
+        'amount': amount,
+        'currency': row.get('currency') or 'INR',
+        'payment_date': payment_date,
+        'due_date': due_date,
+        'payment_mode': row.get('payment_mode'),
+        'reference': row.get('reference'),
+        'notes': row.get('notes'),
+        'description': row.get('description') or '',
+        'category': row.get('category') or '',
+        'paid_by': row.get('paid_by') or '',
+        'paid_to': row.get('paid_to') or '',
+        'status': row.get('status') if row.get('status') in PAYMENT_STATUSES else 'pending',
+        'payment_type': row.get('payment_type') if row.get('payment_type') in PAYMENT_TYPES else 'other',
+        'payer_bank_name': row.get('payer_bank_name') or '',
+        'payer_bank_account_no': row.get('payer_bank_account_no') or '',
+        'receiver_bank_name': row.get('receiver_bank_name') or '',
+        'receiver_bank_account_no': row.get('receiver_bank_account_no') or '',
+    }
+
+    parties = []
+    raw_parties = row.get('parties') or []
+    if not isinstance(raw_parties, list):
+        errors.append('parties must be a list')
+        raw_parties = []
+    for i, part in enumerate(raw_parties, start=1):
+        if not isinstance(part, dict):
+            errors.append(f'party {i}: must be an object')
+            continue
+        pid, pid_err = parse_optional_number(part.get('party_id'), int)
+        amt, amt_err = parse_optional_number(part.get('amount'))
+        pct, pct_err = parse_optional_number(part.get('percentage'))
+        for field, field_err in (('party_id', pid_err), ('amount', amt_err), ('percentage', pct_err)):
+            if field_err:
+                errors.append(f'party {i} {field}: {field_err}')
+        parties.append({
+            'party_type': part.get('party_type') if part.get('party_type') in PAYMENT_PARTY_TYPES else 'other',
+            'party_id': pid,
+            'amount': amt,
+            'percentage': pct,
+            'role': part.get('role'),
+            'pay_to_id': part.get('pay_to_id'),
+            'pay_to_name': part.get('pay_to_name'),
+            'pay_to_type': part.get('pay_to_type'),
+        })
+
+    if parties and amount and not errors:
+        amounts_provided = any(p['amount'] is not None for p in parties)
+        percentages = [p['percentage'] for p in parties if p['percentage']]
+        total_pct = sum(percentages)
+        if percentages and abs(total_pct - 100.0) > 0.01 and not force:
+            errors.append(f'party percentages total {total_pct}, expected 100')
+        if percentages and not amounts_provided:
+            for p in parties:
+                if p['percentage'] is not None:
+                    p['amount'] = round((p['percentage'] / 100.0) * amount, 2)
+        if amounts_provided:
+            total_party_amount = sum(p['amount'] for p in parties if p['amount'] is not None)
+            if abs(total_party_amount - amount) > 0.01 and not force:
+                errors.append(f'party amounts total {total_party_amount}, expected {amount}')
+
+    return payment, parties, errors
+
+@app.route('/api/payments/<int:deal_id>/bulk', methods=['POST'])
+@token_required
+@response_cache.invalidates('payments')
+def bulk_create_payments(current_user, deal_id):
+    """
+    Import many payments for a deal in one request (JSON array or CSV, see read_bulk_payment_rows).
+    All rows are validated first; if any row fails nothing is written and per-row errors are returned.
+    Valid batches are inserted with multi-row INSERTs into payments and payment_parties in one transaction.
+    Query params: dry_run=true to validate only, force=true to skip the party total checks (as in create_payment).
+    """
+    dry_run = request.args.get('dry_run', 'false').lower() == 'true'
+    force = request.args.get('force', 'false').lower() == 'true'
+    try:
+        rows = read_bulk_payment_rows()
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+    if not rows:
+        return jsonify({'error': 'No payments provided'}), 400
+    if len(rows) > BULK_PAYMENT_MAX_ROWS:
+        return jsonify({'error': f'Too many rows: {len(rows)} (max {BULK_PAYMENT_MAX_ROWS})'}), 400
+
+    # Normalize each date column in one batch; repeated statement dates are parsed once
+    payment_dates = normalize_dates([row.get('payment_date') if isinstance(row, dict) else None for row in rows])
+    due_dates = normalize_dates([row.get('due_date') if isinstance(row, dict) else None for row in rows])
+
+    validated = []
+    row_errors = []
+    for index, row in enumerate(rows, start=1):
+        payment, parties, errors = validate_bulk_payment_row(row, payment_dates[index - 1], due_dates[index - 1], force=force)
+        if errors:
+            row_errors.append({'row': index, 'errors': errors})
+        else:
+            validated.append((index, payment, parties))
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        # Validation reads and all inserts run in one transaction
+        conn.start_transaction()
+        cursor = conn.cursor()
+
+        # Also takes the deal row lock before any insert (see deal_summary.lock_deal)
+        if not lock_deal(conn, deal_id):
+            return jsonify({'error': 'Deal not found'}), 404
+
+        # Referenced owners/investors/buyers must belong to this deal: one IN query per party type
+        referenced = {}
+        for _, payment, parties in validated:
+            for ref in [payment] + parties:
+                if ref['party_type'] in ('owner', 'investor', 'buyer') and ref['party_id'] is not None:
+                    referenced.setdefault(ref['party_type'], set()).add(ref['party_id'])
+        known = {}
+        for party_type, ids in referenced.items():
+            table = {'owner': 'owners', 'investor': 'investors', 'buyer': 'buyers'}[party_type]
+            id_list = list(ids)
+            placeholders = ','.join(['%s'] * len(id_list))
+            cursor.execute(f"SELECT id FROM {table} WHERE deal_id = %s AND id IN ({placeholders})", [deal_id] + id_list)
+            known[party_type] = {r[0] for r in cursor.fetchall()}
+        for index, payment, parties in validated:
+            missing = [f"{ref['party_type']} {ref['party_id']} is not part of this deal"
+                       for ref in [payment] + parties
+                       if ref['party_type'] in known and ref['party_id'] is not None and ref['party_id'] not in known[ref['party_type']]]
+            if missing:
+                row_errors.append({'row': index, 'errors': missing})
+
+        summary = {
+            'dry_run': dry_run,
+            'total_rows': len(rows),
+            'valid_rows': len(rows) - len(row_errors),
+            'total_amount': round(sum(payment['amount'] for _, payment, _ in validated), 2),
+            'errors': sorted(row_errors, key=lambda e: e['row']),
+        }
+        if row_errors:
+            return jsonify(dict(summary, error='Validation failed; no payments were imported')), 400
+        if dry_run:
+            return jsonify(summary), 200
+
+        cursor.execute("DESCRIBE payments")
+        payment_columns = [c for c in BULK_PAYMENT_COLUMNS if c in {r[0] for r in cursor.fetchall()}]
+        cursor.execute("DESCRIBE payment_parties")
+        party_columns = [c for c in BULK_PARTY_COLUMNS if c in {r[0] for r in cursor.fetchall()}]
+
+        payment_ids = []
+        party_rows = []
+        for start in range(0, len(validated), BULK_INSERT_CHUNK):
+            chunk = validated[start:start + BULK_INSERT_CHUNK]
+            values = []
+            for _, payment, _ in chunk:
+                payment = dict(payment, deal_id=deal_id, created_by=current_user['id'])
+                values.append([payment.get(c) for c in payment_columns])
+            placeholders = ', '.join(['%s'] * len(payment_columns))
+            cursor.executemany(f"INSERT INTO payments ({', '.join(payment_columns)}) VALUES ({placeholders})", values)
+            # A multi-row INSERT reports the first generated id and allocates the rest consecutively
+            first_id = cursor.lastrowid
+            ids = list(range(first_id, first_id + len(chunk)))
+            cursor.execute("SELECT COUNT(*) FROM payments WHERE id BETWEEN %s AND %s AND deal_id = %s AND created_by = %s",
+                           (ids[0], ids[-1], deal_id, current_user['id']))
+            if cursor.fetchone()[0] != len(chunk):
+                raise RuntimeError('Could not resolve ids of inserted payments')
+            payment_ids.extend(ids)
+            # One audit entry per inserted batch, committed (or rolled back) with the payments
+            log_activity(
+                user_id=current_user['id'],
+                action='IMPORT_PAYMENTS',
+                entity_type='deal',
+                entity_id=deal_id,
+                entity_name=f"Imported payments {ids[0]}-{ids[-1]}",
+                changes={'payment_ids': ids,
+                         'total_amount': round(sum(payment['amount'] for _, payment, _ in chunk), 2)},
+                request_obj=request,
+                connection=conn
+            )
+            for payment_id, (_, _, parties) in zip(ids, chunk):
+                for part in parties:
+                    part = dict(part, payment_id=payment_id)
+                    party_rows.append([part.get(c) for c in party_columns])
+
+        for start in range(0, len(party_rows), BULK_INSERT_CHUNK):
+            placeholders = ', '.join(['%s'] * len(party_columns))
+            cursor.executemany(f"INSERT INTO payment_parties ({', '.join(party_columns)}) VALUES ({placeholders})",
+                               party_rows[start:start + BULK_INSERT_CHUNK])
+
+        refresh_deal_summary(conn, deal_id)
+        refresh_cashflow(conn, deal_id, [payment.get('payment_date') for _, payment, _ in validated])
+        conn.commit()
+        return jsonify(dict(summary, message=f'Imported {len(payment_ids)} payments',
+                            payment_ids=payment_ids, parties_inserted=len(party_rows))), 201
+    except Exception as e:
+        try:
+            if conn:
+                conn.rollback()
+        except Exception:
+            pass
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if conn:
+            conn.close()
+
 @app.route('/api/payments/<int:deal_id>/split-installments', methods=['POST'])
 @token_required
+@response_cache.invalidates('payments')
 def split_payment_into_installments(current_user, deal_id):
-    """Split a payment into multiple installments"""
+    """
+    Split a payment into multiple installments.
+    Creates an installment_plans row and inserts all installments with one multi-row INSERT,
+    each carrying the plan_id so siblings are found by key instead of by amount matching.
+    """
+    conn = None
     try:
         data = request.get_json()
         
@@ -1172,52 +1614,71 @@ def split_payment_into_installments(current_user, deal_id):
         receiver_bank_name = data.get('receiver_bank_name', '')
         receiver_bank_account_no = data.get('receiver_bank_account_no', '')
         
+        # Validate every installment before writing anything
+        payment_dates = normalize_dates([inst.get('payment_date') for inst in installments])
+        due_dates = normalize_dates([inst.get('due_date') or inst.get('payment_date') for inst in installments])
+        rows = []
+        for i, installment in enumerate(installments, 1):
+            try:
+                amount = float(installment['amount'])
+            except (KeyError, TypeError, ValueError):
+                return jsonify({'error': f'Installment {i}: amount must be a number'}), 400
+            if installment.get('payment_date') and payment_dates[i - 1] is None:
+                return jsonify({'error': f'Installment {i}: invalid payment_date'}), 400
+            rows.append((i, amount, payment_dates[i - 1], due_dates[i - 1]))
+        
         # Calculate parent amount (total of all installments)
-        parent_amount = sum(float(inst.get('amount', 0)) for inst in installments)
-        total_installments = len(installments)
+        parent_amount = sum(amount for _, amount, _, _ in rows)
+        total_installments = len(rows)
+        
+        try:
+            ensure_payment_schema()
+        except Exception:
+            pass
         
         conn = get_db_connection()
+        conn.start_transaction()
+        if not lock_deal(conn, deal_id):
+            return jsonify({'error': 'Deal not found'}), 404
         cursor = conn.cursor()
         
-        created_payments = []
-        
-        # Create each installment as a separate payment
-        for i, installment in enumerate(installments, 1):
-            amount = float(installment['amount'])
-            payment_date = installment['payment_date']
-            due_date = installment.get('due_date', payment_date)
-            
-            # Parse dates
-            parsed_payment_date = datetime.strptime(payment_date, '%Y-%m-%d').date() if payment_date else None
-            parsed_due_date = datetime.strptime(due_date, '%Y-%m-%d').date() if due_date else None
-            
-            # Insert installment payment
-            cursor.execute("""
-                INSERT INTO payments 
-                (deal_id, amount, currency, payment_date, due_date, payment_mode, reference, notes, 
-                description, category, paid_by, paid_to, status, created_by, payment_type, 
-                is_installment, installment_number, total_installments, parent_amount,
-                payer_bank_name, payer_bank_account_no, receiver_bank_name, receiver_bank_account_no)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                deal_id, amount, 'INR', parsed_payment_date, parsed_due_date, payment_mode, 
-                reference, notes, description, category, paid_by, paid_to, status, current_user['id'], 
-                payment_type, True, i, total_installments, parent_amount,
-                payer_bank_name, payer_bank_account_no, receiver_bank_name, receiver_bank_account_no
-            ))
-            
-            payment_id = cursor.lastrowid
-            created_payments.append({
-                'payment_id': payment_id,
-                'installment_number': i,
-                'amount': amount,
-                'payment_date': payment_date
-            })
-        
+        cursor.execute("""
+            INSERT INTO installment_plans (deal_id, total_amount, total_installments, payment_type, created_by)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (deal_id, parent_amount, total_installments, payment_type, current_user['id']))
+        plan_id = cursor.lastrowid
+        
+        # All installments in one multi-row INSERT
+        cursor.executemany("""
+            INSERT INTO payments 
+            (deal_id, amount, currency, payment_date, due_date, payment_mode, reference, notes, 
+            description, category, paid_by, paid_to, status, created_by, payment_type, 
+            is_installment, installment_number, total_installments, parent_amount, plan_id,
+            payer_bank_name, payer_bank_account_no, receiver_bank_name, receiver_bank_account_no)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, [(
+            deal_id, amount, 'INR', payment_date, due_date, payment_mode,
+            reference, notes, description, category, paid_by, paid_to, status, current_user['id'],
+            payment_type, True, i, total_installments, parent_amount, plan_id,
+            payer_bank_name, payer_bank_account_no, receiver_bank_name, receiver_bank_account_no
+        ) for i, amount, payment_date, due_date in rows])
+        
+        cursor.execute("SELECT id, installment_number FROM payments WHERE plan_id = %s ORDER BY installment_number", (plan_id,))
+        ids_by_number = {number: payment_id for payment_id, number in cursor.fetchall()}
+        created_payments = [{
+            'payment_id': ids_by_number.get(i),
+            'installment_number': i,
+            'amount': amount,
+            'payment_date': payment_date
+        } for i, amount, payment_date, _ in rows]
+        
+        refresh_deal_summary(conn, deal_id)
+        refresh_cashflow(conn, deal_id, [payment_date for _, _, payment_date, _ in rows])
         conn.commit()
         
         return jsonify({
             'message': f'Successfully created {total_installments} installment payments',
+            'plan_id': plan_id,
             'parent_amount': parent_amount,
             'total_installments': total_installments,
             'payments': created_payments
@@ -1238,13 +1699,14 @@ def split_payment_into_installments(current_user, deal_id):
 @token_required
 def get_payment_installments(current_user, deal_id, payment_id):
     """Get all installments for a payment (if it's part of an installment plan)"""
+    conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
         # First, get the payment details to check if it's an installment
         cursor.execute("""
-            SELECT is_installment, parent_amount, total_installments, installment_number
+            SELECT *
             FROM payments 
             WHERE id = %s AND deal_id = %s
         """, (payment_id, deal_id))
@@ -1256,19 +1718,29 @@ def get_payment_installments(current_user, deal_id, payment_id):
         if not payment['is_installment']:
             return jsonify({'error': 'This payment is not part of an installment plan'}), 400
         
-        # Get all installments with the same parent_amount and total_installments
-        cursor.execute("""
-            SELECT id, amount, payment_date, due_date, status, installment_number, 
-                   paid_by, paid_to, payment_mode, reference, notes
-            FROM payments 
-            WHERE deal_id = %s AND is_installment = 1 
-            AND parent_amount = %s AND total_installments = %s
-            ORDER BY installment_number
-        """, (deal_id, payment['parent_amount'], payment['total_installments']))
+        if payment.get('plan_id'):
+            cursor.execute("""
+                SELECT id, amount, payment_date, due_date, status, installment_number, 
+                       paid_by, paid_to, payment_mode, reference, notes
+                FROM payments 
+                WHERE plan_id = %s
+                ORDER BY installment_number
+            """, (payment['plan_id'],))
+        else:
+            # Installments created before installment_plans existed are matched the old way
+            cursor.execute("""
+                SELECT id, amount, payment_date, due_date, status, installment_number, 
+                       paid_by, paid_to, payment_mode, reference, notes
+                FROM payments 
+                WHERE deal_id = %s AND is_installment = 1 
+                AND parent_amount = %s AND total_installments = %s
+                ORDER BY installment_number
+            """, (deal_id, payment['parent_amount'], payment['total_installments']))
         
         installments = cursor.fetchall()
         
         return jsonify({
+            'plan_id': payment.get('plan_id'),
             'parent_amount': payment['parent_amount'],
             'total_installments': payment['total_installments'],
             'installments': installments
@@ -1283,6 +1755,74 @@ def get_payment_installments(current_user, deal_id, payment_id):
             conn.close()
 
 
+# Per-plan totals; every column comes from idx_payments_plan_status_due
+INSTALLMENT_PLAN_SUMMARY_SQL = """
+    SELECT ip.id AS plan_id, ip.deal_id, ip.total_amount, ip.total_installments, ip.payment_type, ip.created_at,
+           COUNT(p.id) AS installments,
+           COALESCE(SUM(CASE WHEN p.status = 'completed' THEN p.amount END), 0) AS paid_amount,
+           COALESCE(SUM(CASE WHEN p.status IN ('pending', 'overdue') THEN p.amount END), 0) AS due_amount,
+           COALESCE(SUM(CASE WHEN p.status = 'overdue' OR (p.status = 'pending' AND p.due_date < CURDATE())
+                             THEN p.amount END), 0) AS overdue_amount,
+           SUM(p.status = 'completed') AS paid_count,
+           SUM(p.status = 'overdue' OR (p.status = 'pending' AND p.due_date < CURDATE())) AS overdue_count,
+           MIN(CASE WHEN p.status IN ('pending', 'overdue') THEN p.due_date END) AS next_due_date
+    FROM installment_plans ip
+    LEFT JOIN payments p ON p.plan_id = ip.id
+    WHERE {where}
+    GROUP BY ip.id
+    ORDER BY ip.id
+"""
+
+@app.route('/api/deals/<int:deal_id>/installment-plans', methods=['GET'])
+@token_required
+@response_cache.cached('payments')
+def get_deal_installment_plans(current_user, deal_id):
+    """Paid, due and overdue totals for every installment plan of a deal"""
+    conn = None
+    try:
+        conn = get_read_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(INSTALLMENT_PLAN_SUMMARY_SQL.format(where='ip.deal_id = %s'), (deal_id,))
+        return jsonify({'plans': cursor.fetchall()}), 200
+    except mysql.connector.Error as e:
+        if getattr(e, 'errno', None) == ER_NO_SUCH_TABLE:
+            return jsonify({'plans': []}), 200
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if conn:
+            conn.close()
+
+@app.route('/api/installment-plans/<int:plan_id>', methods=['GET'])
+@token_required
+@response_cache.cached('payments')
+def get_installment_plan(current_user, plan_id):
+    """One installment plan with its totals and installments"""
+    conn = None
+    try:
+        conn = get_read_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(INSTALLMENT_PLAN_SUMMARY_SQL.format(where='ip.id = %s'), (plan_id,))
+        plan = cursor.fetchone()
+        if not plan:
+            return jsonify({'error': 'Installment plan not found'}), 404
+        cursor.execute("""
+            SELECT id, amount, payment_date, due_date, status, installment_number,
+                   paid_by, paid_to, payment_mode, reference, notes
+            FROM payments
+            WHERE plan_id = %s
+            ORDER BY installment_number
+        """, (plan_id,))
+        plan['installment_payments'] = cursor.fetchall()
+        return jsonify(plan), 200
+    except mysql.connector.Error as e:
+        if getattr(e, 'errno', None) == ER_NO_SUCH_TABLE:
+            return jsonify({'error': 'Installment plan not found'}), 404
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if conn:
+            conn.close()
+
+
 def ensure_payment_schema():
     """Ensure the payments table has all required columns"""
     conn = None
@@ -1320,6 +1860,36 @@ def ensure_payment_schema():
                     # Don't fail the whole operation if one column fails
                     pass
         
+        # Installment plans: payments of one split share a plan_id (see split_payment_into_installments)
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS installment_plans (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    deal_id INT NOT NULL,
+                    total_amount DECIMAL(15,2) NOT NULL,
+                    total_installments INT NOT NULL,
+                    payment_type VARCHAR(50) NULL,
+                    created_by INT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_installment_plans_deal (deal_id)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """)
+            if 'plan_id' not in existing_columns:
+                cursor.execute("ALTER TABLE payments ADD COLUMN plan_id INT NULL")
+            cursor.execute("SHOW INDEX FROM payments WHERE Key_name = 'idx_payments_plan_status_due'")
+            if not cursor.fetchall():
+                # Covers the per-plan paid/due/overdue aggregates
+                cursor.execute("ALTER TABLE payments ADD INDEX idx_payments_plan_status_due (plan_id, status, due_date, amount)")
+            cursor.execute("""
+                SELECT COUNT(*) FROM information_schema.table_constraints
+                WHERE table_schema = DATABASE() AND table_name = 'payments' AND constraint_name = 'fk_payments_plan'
+            """)
+            if cursor.fetchone()[0] == 0:
+                cursor.execute("ALTER TABLE payments ADD CONSTRAINT fk_payments_plan FOREIGN KEY (plan_id) REFERENCES installment_plans(id) ON DELETE SET NULL")
+            conn.commit()
+        except mysql.connector.Error:
+            pass
+        
     except Exception as e:
         # Don't fail the payment update if schema update fails
         # The update function will check which columns exist anyway
@@ -1417,7 +1987,62 @@ def ensure_deals_schema():
         except mysql.connector.Error as e:
             # If ENUM update fails, it's not critical
             pass
-        
+
+        # Child tables need updated_at so deal_graph_etag notices in-place edits
+        for table in ('owners', 'buyers', 'investors', 'expenses'):
+            try:
+                cursor.execute(f"SHOW COLUMNS FROM {table} LIKE 'updated_at'")
+                if not cursor.fetchall():
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN updated_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP")
+                    conn.commit()
+            except mysql.connector.Error:
+                pass
+
+        # Normalized investor keys (see INVESTOR_KEY_EXPRESSIONS) for the available-investors anti-join
+        try:
+            cursor.execute("SHOW COLUMNS FROM investors")
+            investor_columns = {row[0] for row in cursor.fetchall()}
+            for column_name, expression in INVESTOR_KEY_EXPRESSIONS.items():
+                if column_name not in investor_columns:
+                    length = 50 if column_name == 'mobile_key' else 255
+                    cursor.execute(f"ALTER TABLE investors ADD COLUMN {column_name} VARCHAR({length}) AS ({expression.replace('{t}.', '')}) VIRTUAL")
+                    conn.commit()
+            cursor.execute("SHOW INDEX FROM investors")
+            investor_indexes = {row[2] for row in cursor.fetchall()}
+            indexes_to_add = [
+                ("idx_investors_keys", "ALTER TABLE investors ADD INDEX idx_investors_keys (name_key, mobile_key, email_key)"),
+                ("idx_investors_deal_name_key", "ALTER TABLE investors ADD INDEX idx_investors_deal_name_key (deal_id, name_key)"),
+                ("idx_investors_deal_mobile_key", "ALTER TABLE investors ADD INDEX idx_investors_deal_mobile_key (deal_id, mobile_key)"),
+                ("idx_investors_deal_email_key", "ALTER TABLE investors ADD INDEX idx_investors_deal_email_key (deal_id, email_key)")
+            ]
+            for index_name, alter_sql in indexes_to_add:
+                if index_name not in investor_indexes:
+                    cursor.execute(alter_sql)
+                    conn.commit()
+        except mysql.connector.Error:
+            # The endpoint falls back to inline key expressions
+            pass
+
+        # Composite indexes backing keyset pagination and year/status filters
+        try:
+            cursor.execute("SHOW INDEX FROM deals")
+            existing_indexes = {row[2] for row in cursor.fetchall()}
+            indexes_to_add = [
+                ("idx_deals_status_purchase_date", "ALTER TABLE deals ADD INDEX idx_deals_status_purchase_date (status, purchase_date)"),
+                ("idx_deals_purchase_date", "ALTER TABLE deals ADD INDEX idx_deals_purchase_date (purchase_date)"),
+                ("idx_deals_created_at_id", "ALTER TABLE deals ADD INDEX idx_deals_created_at_id (created_at, id)")
+            ]
+            for index_name, alter_sql in indexes_to_add:
+                if index_name not in existing_indexes:
+                    try:
+                        cursor.execute(alter_sql)
+                        conn.commit()
+                    except mysql.connector.Error:
+                        # Index creation is an optimization only
+                        pass
+        except mysql.connector.Error:
+            pass
+
     except Exception as e:
         # Don't fail if schema update fails
         pass
@@ -1427,6 +2052,7 @@ def ensure_deals_schema():
 
 @app.route('/api/payments/<int:deal_id>/<int:payment_id>', methods=['PUT'])
 @token_required
+@response_cache.invalidates('payments')
 def update_payment(current_user, deal_id, payment_id):
     """Update a payment's details"""
     try:
@@ -1442,11 +2068,15 @@ def update_payment(current_user, deal_id, payment_id):
         conn = None
         try:
             conn = get_db_connection()
+            # Deal row lock first, as in every write that refreshes the deal summary
+            if not lock_deal(conn, deal_id):
+                return jsonify({'error': 'Payment not found'}), 404
             cursor = conn.cursor()
             
             # Check if payment exists and user has permission
-            cursor.execute("SELECT id FROM payments WHERE id = %s AND deal_id = %s", (payment_id, deal_id))
-            if not cursor.fetchone():
+            cursor.execute("SELECT id, payment_date FROM payments WHERE id = %s AND deal_id = %s", (payment_id, deal_id))
+            existing = cursor.fetchone()
+            if not existing:
                 return jsonify({'error': 'Payment not found'}), 404
             
             # Get the table structure to see what columns exist
@@ -1530,6 +2160,9 @@ def update_payment(current_user, deal_id, payment_id):
             if cursor.rowcount == 0:
                 return jsonify({'error': 'Payment not found or no changes made'}), 404
             
+            refresh_deal_summary(conn, deal_id)
+            # The old month loses the payment when payment_date moves
+            refresh_cashflow(conn, deal_id, [existing[1], fields.get('payment_date')])
             conn.commit()
             
             return jsonify({
@@ -1567,6 +2200,7 @@ def update_payment(current_user, deal_id, payment_id):
 
 @app.route('/api/payments/<int:deal_id>/<int:payment_id>', methods=['DELETE'])
 @token_required
+@response_cache.invalidates('payments')
 def delete_payment(current_user, deal_id, payment_id):
     """Delete a payment and its proof files (admin or owner)."""
     conn = None
@@ -1582,11 +2216,19 @@ def delete_payment(current_user, deal_id, payment_id):
         if current_user.get('role') != 'admin':
             return jsonify({'error': 'Only admin users can delete payments'}), 403
 
+        # Deal row lock before the deletes, as in every write that refreshes the deal summary
+        lock_deal(conn, deal_id)
+
         # Delete DB rows for proofs
         cursor.execute("DELETE FROM payment_proofs WHERE payment_id = %s", (payment_id,))
 
         # Delete payment row
+        cursor.execute("SELECT payment_date FROM payments WHERE deal_id = %s AND id = %s", (deal_id, payment_id))
+        payment = cursor.fetchone()
         cursor.execute("DELETE FROM payments WHERE deal_id = %s AND id = %s", (deal_id, payment_id))
+        refresh_deal_summary(conn, deal_id)
+        if payment:
+            refresh_cashflow(conn, deal_id, [payment['payment_date']])
         conn.commit()
 
         # remove files from disk (best-effort)
@@ -1618,6 +2260,7 @@ def delete_payment(current_user, deal_id, payment_id):
 
 @app.route('/api/payments/<int:deal_id>/investor-to-owner', methods=['POST'])
 @token_required
+@response_cache.invalidates('payments')
 def create_investor_to_owner_payment(current_user, deal_id):
     """Create a payment from investor to owner with real-time tracking"""
     try:
@@ -1663,9 +2306,8 @@ def create_investor_to_owner_payment(current_user, deal_id):
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # Verify deal exists
-        cursor.execute("SELECT id FROM deals WHERE id = %s", (deal_id,))
-        if not cursor.fetchone():
+        # Verify deal exists; the row lock comes before the payment insert (see deal_summary.lock_deal)
+        if not lock_deal(conn, deal_id):
             return jsonify({'error': 'Deal not found'}), 404
             
         # Verify investor belongs to this deal
@@ -1714,6 +2356,8 @@ def create_investor_to_owner_payment(current_user, deal_id):
                 ) VALUES (%s, %s, %s, %s, %s)
             """, (payment_id, 'owner', owner_id, amount, 'recipient'))
             
+            refresh_deal_summary(conn, deal_id)
+            refresh_cashflow(conn, deal_id, [parsed_payment_date])
             conn.commit()
             
             # Return the created payment with party details
@@ -1752,7 +2396,7 @@ def create_investor_to_owner_payment(current_user, deal_id):
 def get_miscellaneous_summary(current_user, deal_id):
     """Get miscellaneous payments summary for all investors and owners in a deal"""
     try:
-        conn = get_db_connection()
+        conn = get_read_db_connection()
         cursor = conn.cursor(dictionary=True)
         
         # Get all investors for this deal
@@ -1813,8 +2457,8 @@ def get_miscellaneous_summary(current_user, deal_id):
             for mp in misc_payments:
                 miscellaneous_payments.append({
                     'payment_id': mp['id'],
-                    'amount': float(mp['amount']),
-                    'payment_date': mp['payment_date'].isoformat() if mp['payment_date'] else None,
+                    'amount': mp['amount'],
+                    'payment_date': mp['payment_date'],
                     'payment_type': mp['payment_type'],
                     'notes': mp['notes'],
                     'description': mp['description'],
@@ -1869,8 +2513,8 @@ def get_miscellaneous_summary(current_user, deal_id):
             for mp in misc_payments:
                 miscellaneous_payments.append({
                     'payment_id': mp['id'],
-                    'amount': float(mp['amount']),
-                    'payment_date': mp['payment_date'].isoformat() if mp['payment_date'] else None,
+                    'amount': mp['amount'],
+                    'payment_date': mp['payment_date'],
                     'payment_type': mp['payment_type'],
                     'notes': mp['notes'],
                     'description': mp['description'],
@@ -1905,7 +2549,7 @@ def get_miscellaneous_summary(current_user, deal_id):
 def get_payment_tracking_data(current_user, deal_id):
     """Get real-time payment tracking data for owners and investors"""
     try:
-        conn = get_db_connection()
+        conn = get_read_db_connection()
         cursor = conn.cursor(dictionary=True)
         
         # Get deal purchase amount
@@ -1997,8 +2641,8 @@ def get_payment_tracking_data(current_user, deal_id):
             for mp in misc_payments:
                 miscellaneous_payments.append({
                     'payment_id': mp['id'],
-                    'amount': float(mp['amount']),
-                    'payment_date': mp['payment_date'].isoformat() if mp['payment_date'] else None,
+                    'amount': mp['amount'],
+                    'payment_date': mp['payment_date'],
                     'payment_type': mp['payment_type'],
                     'notes': mp['notes'],
                     'description': mp['description'],
@@ -2020,8 +2664,8 @@ def get_payment_tracking_data(current_user, deal_id):
                 investor_breakdown[inv_id]['total_paid'] += float(payment['amount'])
                 investor_breakdown[inv_id]['payments'].append({
                     'payment_id': payment['id'],
-                    'amount': float(payment['amount']),
-                    'payment_date': payment['payment_date'].isoformat() if payment['payment_date'] else None,
+                    'amount': payment['amount'],
+                    'payment_date': payment['payment_date'],
                     'status': payment['status']
                 })
             
@@ -2076,8 +2720,8 @@ def get_payment_tracking_data(current_user, deal_id):
             for mp in misc_payments:
                 miscellaneous_payments.append({
                     'payment_id': mp['id'],
-                    'amount': float(mp['amount']),
-                    'payment_date': mp['payment_date'].isoformat() if mp['payment_date'] else None,
+                    'amount': mp['amount'],
+                    'payment_date': mp['payment_date'],
                     'payment_type': mp['payment_type'],
                     'notes': mp['notes'],
                     'description': mp['description'],
@@ -2099,8 +2743,8 @@ def get_payment_tracking_data(current_user, deal_id):
                 owner_breakdown[owner_id]['total_paid'] += float(payment['amount'])
                 owner_breakdown[owner_id]['payments'].append({
                     'payment_id': payment['id'],
-                    'amount': float(payment['amount']),
-                    'payment_date': payment['payment_date'].isoformat() if payment['payment_date'] else None,
+                    'amount': payment['amount'],
+                    'payment_date': payment['payment_date'],
                     'status': payment['status']
                 })
             
@@ -2133,6 +2777,7 @@ def get_payment_tracking_data(current_user, deal_id):
 
 @app.route('/api/payments/<int:payment_id>/parties', methods=['POST'])
 @token_required
+@response_cache.invalidates('payments')
 def add_payment_party(current_user, payment_id):
     """Add a party share to an existing payment."""
     data = request.get_json() or {}
@@ -2201,6 +2846,7 @@ def add_payment_party(current_user, payment_id):
 
 @app.route('/api/payments/parties/<int:party_id>', methods=['PUT'])
 @token_required
+@response_cache.invalidates('payments')
 def update_payment_party(current_user, party_id):
     data = request.get_json() or {}
     fields = {}
@@ -2259,6 +2905,7 @@ def update_payment_party(current_user, party_id):
 
 @app.route('/api/payments/parties/<int:party_id>', methods=['DELETE'])
 @token_required
+@response_cache.invalidates('payments')
 def delete_payment_party(current_user, party_id):
     conn = None
     try:
@@ -2277,43 +2924,106 @@ def delete_payment_party(current_user, party_id):
 @app.route('/api/deals/<int:deal_id>/financials', methods=['GET'])
 @token_required
 def deal_financials(current_user, deal_id):
-    """Return a financial summary for a deal: totals for payments by mode, total expenses, investments, owners' shares (if profit_allocation set), and simple P&L estimate."""
+    """
+    Return a deal's financial summary: payment totals by mode and status, expenses, investments,
+    outstanding purchase balance and P&L (sold_price - purchase_amount - expenses).
+    Read from deal_financial_summary, which every payment/expense/investor/deal write keeps current;
+    a deal without a row yet is computed once and stored.
+    """
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_read_db_connection()
         cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT * FROM deal_financial_summary WHERE deal_id = %s", (deal_id,))
+            summary = cursor.fetchone()
+        except mysql.connector.Error as e:
+            if getattr(e, 'errno', None) != ER_NO_SUCH_TABLE:
+                raise
+            summary = None
+        conn.close()
+        conn = None
 
-        # total payments grouped by payment_mode
-        cursor.execute("SELECT payment_mode, SUM(amount) as total FROM payments WHERE deal_id = %s GROUP BY payment_mode", (deal_id,))
-        payments_by_mode = cursor.fetchall() or []
-
-        # total payments overall
-        cursor.execute("SELECT SUM(amount) as total_payments FROM payments WHERE deal_id = %s", (deal_id,))
-        total_pay = cursor.fetchone() or {}
-
-        # total expenses
-        cursor.execute("SELECT SUM(amount) as total_expenses FROM expenses WHERE deal_id = %s", (deal_id,))
-        total_exp = cursor.fetchone() or {}
+        if summary is None:
+            conn = get_db_connection()
+            ensure_deal_summary_schema(conn)
+            summary = refresh_deal_summary(conn, deal_id)
+            conn.commit()
+            if summary is None:
+                return jsonify({'error': 'Deal not found'}), 404
 
-        # total investments
-        cursor.execute("SELECT SUM(investment_amount) as total_invested FROM investors WHERE deal_id = %s", (deal_id,))
-        total_inv = cursor.fetchone() or {}
+        summary = dict(summary)
+        summary['payments_by_mode'] = json.loads(summary.get('payments_by_mode') or '[]')
+        summary['deal_profit_estimate'] = summary.get('profit')
+        return jsonify(summary)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if conn:
+            conn.close()
 
-        # owners count and basic split if profit_allocation exists on deals
-        cursor.execute("SELECT profit_allocation FROM deals WHERE id = %s", (deal_id,))
-        deal = cursor.fetchone() or {}
 
-        # profit calculation not available without purchase/selling amounts
-        profit = None
+@app.route('/api/analytics/cashflow', methods=['GET'])
+@token_required
+@user_access_control
+@response_cache.cached('payments')
+def cashflow_analytics(current_user):
+    """
+    Monthly cash-flow series from the cashflow_monthly rollups.
+    Query params: start / end (YYYY-MM, default the last 12 months), deal_ids (comma separated),
+    group_by (total | deal | payment_type), status (comma separated, default completed).
+    Regular users only see deals they are linked to as owner or investor.
+    """
+    conn = None
+    try:
+        end = month_start(request.args.get('end')) or date.today().replace(day=1).isoformat()
+        start = month_start(request.args.get('start')) or add_months(end, -11)
+        if start > end:
+            return jsonify({'error': 'start must not be after end'}), 400
+        months = month_range(start, end)
+        if len(months) > MAX_MONTHS:
+            return jsonify({'error': f'Range too long; at most {MAX_MONTHS} months'}), 400
+
+        group_by = request.args.get('group_by', 'total')
+        if group_by not in CASHFLOW_GROUPS:
+            return jsonify({'error': f"group_by must be one of: {', '.join(CASHFLOW_GROUPS)}"}), 400
+        statuses = [x.strip() for x in request.args.get('status', 'completed').split(',') if x.strip()]
+        if not statuses or any(x not in ROLLUP_STATUSES for x in statuses):
+            return jsonify({'error': f"status must be among: {', '.join(ROLLUP_STATUSES)}"}), 400
+
+        deal_ids = None
+        if request.args.get('deal_ids'):
+            try:
+                deal_ids = sorted({int(x) for x in request.args.get('deal_ids').split(',') if x.strip()})
+            except ValueError:
+                return jsonify({'error': 'deal_ids must be comma separated integers'}), 400
 
-        return jsonify({
-            'payments_by_mode': payments_by_mode,
-            'total_payments': total_pay.get('total_payments'),
-            'total_expenses': total_exp.get('total_expenses'),
-            'total_invested': total_inv.get('total_invested'),
-            'deal_profit_estimate': profit,
-            'profit_allocation': deal.get('profit_allocation')
-        })
+        conn = get_read_db_connection()
+        cursor = conn.cursor()
+        access = request.user_access
+        if not access['can_access_all']:
+            cursor.execute("""
+                SELECT deal_id FROM owners WHERE id = %s
+                UNION
+                SELECT deal_id FROM investors WHERE id = %s
+            """, (access['owner_id'], access['investor_id']))
+            allowed = {row[0] for row in cursor.fetchall() if row[0] is not None}
+            deal_ids = sorted(allowed if deal_ids is None else allowed.intersection(deal_ids))
+
+        if deal_ids == []:
+            rows = []
+        else:
+            try:
+                rows = query_rollups(cursor, start, end, statuses, group_by, deal_ids)
+            except mysql.connector.Error as e:
+                if getattr(e, 'errno', None) != ER_NO_SUCH_TABLE:
+                    raise
+                return jsonify({'error': 'Cash-flow rollups are not built yet; run python cashflow.py'}), 503
+
+        result = build_series(rows, months)
+        result.update({'start': start[:7], 'end': end[:7], 'group_by': group_by, 'statuses': statuses,
+                       'deal_ids': deal_ids})
+        return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -2358,11 +3068,6 @@ def get_payment_detail(deal_id, payment_id):
         if not payment:
             return jsonify({'error': 'Payment not found'}), 404
         
-        # Convert dates to isoformat
-        for k in ('payment_date', 'created_at'):
-            if payment.get(k) is not None and isinstance(payment.get(k), datetime):
-                payment[k] = payment[k].isoformat()
-        
         # Get payment parties with names
         cursor.execute("""
             SELECT pp.id, pp.party_type, pp.party_id, pp.amount, pp.percentage, pp.role,
@@ -2386,8 +3091,8 @@ def get_payment_detail(deal_id, payment_id):
                 'party_type': p.get('party_type'),
                 'party_id': p.get('party_id'),
                 'party_name': p.get('party_name'),
-                'amount': float(p.get('amount')) if p.get('amount') is not None else None,
-                'percentage': float(p.get('percentage')) if p.get('percentage') is not None else None,
+                'amount': p.get('amount'),
+                'percentage': p.get('percentage'),
                 'role': p.get('role')
             })
         payment['parties'] = party_list
@@ -2401,10 +3106,9 @@ def get_payment_detail(deal_id, payment_id):
                 'id': proof.get('id'),
                 'file_path': proof.get('file_path'),
                 'uploaded_by': proof.get('uploaded_by'),
-                'doc_type': proof.get('doc_type')
+                'doc_type': proof.get('doc_type'),
+                'uploaded_at': proof.get('uploaded_at')
             }
-            if proof.get('uploaded_at') and isinstance(proof.get('uploaded_at'), datetime):
-                proof_data['uploaded_at'] = proof.get('uploaded_at').isoformat()
             
             # Add file_name and file_url for frontend compatibility
             if proof.get('file_path'):
@@ -2444,6 +3148,7 @@ def get_payment_detail(deal_id, payment_id):
 
 @app.route('/api/payments/<int:deal_id>/<int:payment_id>/proofs/<int:proof_id>', methods=['DELETE'])
 @token_required
+@response_cache.invalidates('payments')
 def delete_proof(current_user, deal_id, payment_id, proof_id):
     """Delete a single proof by id (best-effort file removal)."""
     conn = None
@@ -2493,6 +3198,7 @@ def delete_proof(current_user, deal_id, payment_id, proof_id):
 
 @app.route('/api/payments/<int:deal_id>/<int:payment_id>/proof', methods=['POST'])
 @token_required
+@response_cache.invalidates('payments')
 def upload_payment_proof(current_user, deal_id, payment_id):
     """Upload an image/file as proof for a payment. Expects form-data with key 'proof'."""
     if 'proof' not in request.files:
@@ -2627,6 +3333,7 @@ def list_payment_proofs(deal_id, payment_id):
 
 @app.route('/api/login', methods=['POST'])
 def login():
+    connection = None
     try:
         data = request.get_json()
         username = data.get('username')
@@ -2646,8 +3353,22 @@ def login():
         if not user:
             return jsonify({'error': 'Invalid credentials'}), 401
         
-        # Test password verification
-        is_valid = verify_password_comprehensive(password, user.get('password'))
+        # Verify on the password pool; legacy hashes come back with their bcrypt replacement
+        try:
+            is_valid, new_hash = password_hasher.run(verify_and_upgrade, password, user.get('password'))
+        except PasswordHasherBusy:
+            response = jsonify({'error': 'Server busy, please retry'})
+            response.headers['Retry-After'] = '1'
+            return response, 503
+        
+        if is_valid and new_hash:
+            try:
+                # Only replace the hash we verified, in case the password changed meanwhile
+                cursor.execute("UPDATE users SET password = %s WHERE id = %s AND password = %s",
+                               (new_hash, user['id'], user.get('password')))
+                connection.commit()
+            except mysql.connector.Error as e:
+                print(f"[WARNING] Could not upgrade password hash for user {user['id']}: {e}")
         
         if user and is_valid:
             token = jwt.encode({
@@ -2717,11 +3438,18 @@ def register():
             )
         """)
         
+        try:
+            hashed = password_hasher.run(hash_password, password)
+        except PasswordHasherBusy:
+            response = jsonify({'error': 'Server busy, please retry'})
+            response.headers['Retry-After'] = '1'
+            return response, 503
+        
         # Insert new user
         cursor.execute("""
             INSERT INTO users (username, password, full_name, role)
             VALUES (%s, %s, %s, %s)
-        """, (username, password, full_name, role))
+        """, (username, hashed, full_name, role))
         
         connection.commit()
         
@@ -2743,15 +3471,19 @@ def register():
     # DELETE route for deals
 @app.route('/api/deals/<int:deal_id>', methods=['DELETE'])
 @token_required
+@response_cache.invalidates('deals', 'deal:{deal_id}', 'owners', 'investors', 'payments')
 def delete_deal(current_user, deal_id):
     """
-    Delete a deal and all its associated data (owners, buyers, investors, expenses, documents)
+    Delete a deal and all its associated data (payments, parties, proofs, reminders, owners,
+    buyers, investors, expenses, documents, offers) with chunked, index-driven deletes.
+    Uploaded files are queued for the background file reaper.
     Only admin users can delete deals.
     """
     # Check if user has admin role
     if current_user.get('role') != 'admin':
         return jsonify({'error': 'Only admin users can delete deals'}), 403
         
+    connection = None
     try:
         connection = get_db_connection()
         cursor = connection.cursor()
@@ -2761,46 +3493,14 @@ def delete_deal(current_user, deal_id):
         if not cursor.fetchone():
             return jsonify({'error': 'Deal not found'}), 404
         
-        # Delete all associated data in the correct order (foreign key constraints)
-        
-        # 1. Delete owner documents first (if table exists)
-        try:
-            cursor.execute("""
-                DELETE od FROM owner_documents od 
-                INNER JOIN owners o ON od.owner_id = o.id 
-                WHERE o.deal_id = %s
-            """, (deal_id,))
-        except Exception as e:
-            # Table might not exist, continue
-            pass
-        
-        # 2. Delete deal documents (if table exists)
-        try:
-            cursor.execute("DELETE FROM deal_documents WHERE deal_id = %s", (deal_id,))
-        except Exception as e:
-            # Table might not exist, continue
-            pass
-        
-        # 3. Delete owners associated with this deal
-        cursor.execute("DELETE FROM owners WHERE deal_id = %s", (deal_id,))
-        
-        # 4. Delete buyers associated with this deal  
-        cursor.execute("DELETE FROM buyers WHERE deal_id = %s", (deal_id,))
-        
-        # 5. Delete investors associated with this deal
-        cursor.execute("DELETE FROM investors WHERE deal_id = %s", (deal_id,))
-        
-        # 6. Delete expenses associated with this deal
-        cursor.execute("DELETE FROM expenses WHERE deal_id = %s", (deal_id,))
-        
-        # 7. Finally delete the deal itself
-        cursor.execute("DELETE FROM deals WHERE id = %s", (deal_id,))
-        
-        connection.commit()
+        report = delete_deal_cascade(connection, deal_id, app.config['UPLOAD_FOLDER'])
         
         return jsonify({
             'message': 'Deal and all associated data deleted successfully',
-            'deleted_deal_id': deal_id
+            'deleted_deal_id': deal_id,
+            'deleted': report['deleted'],
+            'skipped_tables': report['skipped_tables'],
+            'files_queued': report['files_queued']
         })
         
     except Exception as e:
@@ -2813,57 +3513,34 @@ def delete_deal(current_user, deal_id):
 
 @app.route('/api/cleanup/orphaned-owners', methods=['DELETE'])
 @token_required  
+@response_cache.invalidates('owners')
 def cleanup_orphaned_owners(current_user):
     """
     Clean up orphaned owners whose associated deals have been deleted
     """
+    connection = None
     try:
         connection = get_db_connection()
-        cursor = connection.cursor()
         
-        # Find owners whose deal_id no longer exists in deals table
-        cursor.execute("""
-            SELECT o.id, o.name, o.deal_id 
-            FROM owners o 
-            LEFT JOIN deals d ON o.deal_id = d.id 
-            WHERE d.id IS NULL
-        """)
-        orphaned_owners = cursor.fetchall()
+        result = delete_orphans(connection, 'owners', 'deals', 'deal_id', label_column='name')
         
-        if not orphaned_owners:
+        # Delete documents left behind by the removed owners (if table exists)
+        try:
+            delete_orphans(connection, 'owner_documents', 'owners', 'owner_id')
+        except mysql.connector.Error as e:
+            if getattr(e, 'errno', None) != ER_NO_SUCH_TABLE:
+                raise
+        
+        if not result['count']:
             return jsonify({
                 'message': 'No orphaned owners found',
                 'deleted_count': 0
             })
         
-        orphaned_owner_ids = [owner[0] for owner in orphaned_owners]
-        
-        # Delete documents for orphaned owners (if table exists)
-        try:
-            if orphaned_owner_ids:
-                placeholders = ','.join(['%s'] * len(orphaned_owner_ids))
-                cursor.execute(f"""
-                    DELETE FROM owner_documents 
-                    WHERE owner_id IN ({placeholders})
-                """, orphaned_owner_ids)
-        except Exception as e:
-            # Table might not exist, continue
-            pass
-        
-        # Delete the orphaned owners
-        if orphaned_owner_ids:
-            placeholders = ','.join(['%s'] * len(orphaned_owner_ids))
-            cursor.execute(f"""
-                DELETE FROM owners 
-                WHERE id IN ({placeholders})
-            """, orphaned_owner_ids)
-        
-        connection.commit()
-        
         return jsonify({
-            'message': f'Successfully cleaned up {len(orphaned_owners)} orphaned owners',
-            'deleted_count': len(orphaned_owners),
-            'deleted_owners': [{'id': owner[0], 'name': owner[1], 'deal_id': owner[2]} for owner in orphaned_owners]
+            'message': f"Successfully cleaned up {result['count']} orphaned owners",
+            'deleted_count': result['count'],
+            'deleted_owners': [{'id': owner_id, 'name': name} for owner_id, name in zip(result['ids'], result['labels'])]
         })
         
     except Exception as e:
@@ -2876,125 +3553,46 @@ def cleanup_orphaned_owners(current_user):
 
 @app.route('/api/cleanup/all-orphaned-data', methods=['DELETE'])
 @token_required
+@response_cache.invalidates('owners', 'investors', 'payments')
 def cleanup_all_orphaned_data(current_user):
     """
-    Clean up all orphaned data (owners, buyers, investors, expenses) whose deals have been deleted
+    Clean up all orphaned data whose parent rows have been deleted: owners, buyers, investors,
+    expenses and documents without a deal, and payment parties/proofs without a payment.
     """
+    connection = None
     try:
         connection = get_db_connection()
-        cursor = connection.cursor()
         
         cleanup_results = {}
         
-        # 1. Clean up orphaned owners
-        cursor.execute("""
-            SELECT o.id, o.name, o.deal_id 
-            FROM owners o 
-            LEFT JOIN deals d ON o.deal_id = d.id 
-            WHERE d.id IS NULL
-        """)
-        orphaned_owners = cursor.fetchall()
+        # (result key, table, parent table, parent key, label column, label key)
+        orphan_steps = [
+            ('owners', 'owners', 'deals', 'deal_id', 'name', 'names'),
+            ('buyers', 'buyers', 'deals', 'deal_id', 'name', 'names'),
+            ('investors', 'investors', 'deals', 'deal_id', 'investor_name', 'names'),
+            ('expenses', 'expenses', 'deals', 'deal_id', 'expense_type', 'types'),
+            ('installment_plans', 'installment_plans', 'deals', 'deal_id', None, None),
+            ('documents', 'documents', 'deals', 'deal_id', 'file_path', 'files'),
+            ('owner_documents', 'owner_documents', 'owners', 'owner_id', 'file_path', 'files'),
+            ('investor_documents', 'investor_documents', 'investors', 'investor_id', 'file_path', 'files'),
+            ('payment_parties', 'payment_parties', 'payments', 'payment_id', None, None),
+            ('payment_proofs', 'payment_proofs', 'payments', 'payment_id', 'file_path', 'files'),
+        ]
         
-        if orphaned_owners:
-            orphaned_owner_ids = [owner[0] for owner in orphaned_owners]
-            
-            # Delete owner documents first
+        reaper = get_file_reaper(app.config['UPLOAD_FOLDER'])
+        for key, table, parent_table, parent_key, label_column, label_key in orphan_steps:
             try:
-                placeholders = ','.join(['%s'] * len(orphaned_owner_ids))
-                cursor.execute(f"""
-                    DELETE FROM owner_documents 
-                    WHERE owner_id IN ({placeholders})
-                """, orphaned_owner_ids)
-            except Exception:
-                pass
-            
-            # Delete orphaned owners
-            placeholders = ','.join(['%s'] * len(orphaned_owner_ids))
-            cursor.execute(f"""
-                DELETE FROM owners 
-                WHERE id IN ({placeholders})
-            """, orphaned_owner_ids)
-            
-            cleanup_results['owners'] = {
-                'count': len(orphaned_owners),
-                'names': [owner[1] for owner in orphaned_owners]
-            }
-        else:
-            cleanup_results['owners'] = {'count': 0, 'names': []}
-        
-        # 2. Clean up orphaned buyers
-        cursor.execute("""
-            SELECT b.id, b.name, b.deal_id 
-            FROM buyers b 
-            LEFT JOIN deals d ON b.deal_id = d.id 
-            WHERE d.id IS NULL
-        """)
-        orphaned_buyers = cursor.fetchall()
-        
-        if orphaned_buyers:
-            orphaned_buyer_ids = [buyer[0] for buyer in orphaned_buyers]
-            placeholders = ','.join(['%s'] * len(orphaned_buyer_ids))
-            cursor.execute(f"""
-                DELETE FROM buyers 
-                WHERE id IN ({placeholders})
-            """, orphaned_buyer_ids)
-            
-            cleanup_results['buyers'] = {
-                'count': len(orphaned_buyers),
-                'names': [buyer[1] for buyer in orphaned_buyers]
-            }
-        else:
-            cleanup_results['buyers'] = {'count': 0, 'names': []}
-        
-        # 3. Clean up orphaned investors
-        cursor.execute("""
-            SELECT i.id, i.investor_name, i.deal_id 
-            FROM investors i 
-            LEFT JOIN deals d ON i.deal_id = d.id 
-            WHERE d.id IS NULL
-        """)
-        orphaned_investors = cursor.fetchall()
-        
-        if orphaned_investors:
-            orphaned_investor_ids = [investor[0] for investor in orphaned_investors]
-            placeholders = ','.join(['%s'] * len(orphaned_investor_ids))
-            cursor.execute(f"""
-                DELETE FROM investors 
-                WHERE id IN ({placeholders})
-            """, orphaned_investor_ids)
-            
-            cleanup_results['investors'] = {
-                'count': len(orphaned_investors),
-                'names': [investor[1] for investor in orphaned_investors]
-            }
-        else:
-            cleanup_results['investors'] = {'count': 0, 'names': []}
-        
-        # 4. Clean up orphaned expenses
-        cursor.execute("""
-            SELECT e.id, e.expense_type, e.deal_id 
-            FROM expenses e 
-            LEFT JOIN deals d ON e.deal_id = d.id 
-            WHERE d.id IS NULL
-        """)
-        orphaned_expenses = cursor.fetchall()
-        
-        if orphaned_expenses:
-            orphaned_expense_ids = [expense[0] for expense in orphaned_expenses]
-            placeholders = ','.join(['%s'] * len(orphaned_expense_ids))
-            cursor.execute(f"""
-                DELETE FROM expenses 
-                WHERE id IN ({placeholders})
-            """, orphaned_expense_ids)
-            
-            cleanup_results['expenses'] = {
-                'count': len(orphaned_expenses),
-                'types': [expense[1] for expense in orphaned_expenses]
-            }
-        else:
-            cleanup_results['expenses'] = {'count': 0, 'types': []}
-        
-        connection.commit()
+                result = delete_orphans(connection, table, parent_table, parent_key, label_column=label_column)
+            except mysql.connector.Error as e:
+                if getattr(e, 'errno', None) != ER_NO_SUCH_TABLE:
+                    raise
+                continue
+            cleanup_results[key] = {'count': result['count']}
+            if label_key == 'files':
+                # Files are removed in the background; only report how many were queued
+                cleanup_results[key]['files_queued'] = sum(1 for path in result['labels'] if reaper.enqueue(path))
+            elif label_key:
+                cleanup_results[key][label_key] = result['labels']
         
         total_cleaned = sum(result['count'] for result in cleanup_results.values())
         
@@ -3012,173 +3610,298 @@ def cleanup_all_orphaned_data(current_user):
         if connection:
             connection.close()
 
+def normalize_investment_amount(value):
+    """Normalize investment_amount: always numeric, 0 if empty/'null'/invalid"""
+    if isinstance(value, str):
+        value = value.strip()
+        if value.lower() == 'null':
+            value = None
+    if value is None or value == '':
+        return 0
+    try:
+        return float(value)
+    except Exception:
+        return 0
+
+def normalize_investment_percentage(value):
+    """Normalize investment_percentage: None if empty or invalid"""
+    if isinstance(value, str):
+        value = value.strip()
+        if value == '':
+            return None
+        try:
+            return float(value)
+        except Exception:
+            return None
+    return value
+
+def normalize_investors(investors):
+    """
+    Pre-pass over submitted investors: normalizes investment_amount and
+    investment_percentage for every new investor in one pass so the insert
+    step only has to build parameter rows.
+    """
+    normalized = []
+    for investor in investors or []:
+        if investor.get('existing_investor_id') or not investor.get('investor_name'):
+            normalized.append(investor)
+            continue
+        normalized.append(dict(
+            investor,
+            investment_amount=normalize_investment_amount(investor.get('investment_amount')),
+            investment_percentage=normalize_investment_percentage(investor.get('investment_percentage'))
+        ))
+    return normalized
+
+def _row_id(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+def fetch_rows_by_id(cursor, table, columns, ids):
+    """
+    {id: (columns...)} for the given ids of `table` in one query. Ids that do not parse or
+    do not exist are simply absent; callers look each submitted id up in request order.
+    """
+    keys = sorted({key for key in (_row_id(value) for value in ids) if key is not None})
+    if not keys:
+        return {}
+    cursor.execute(
+        f"SELECT id, {', '.join(columns)} FROM {table} WHERE id IN ({', '.join(['%s'] * len(keys))})",
+        keys
+    )
+    return {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+
+# Editable columns per child collection of a deal: (column, kind) where kind is 'str', 'num' or 'date'.
+# 'required' lists the fields a submitted row must have to be kept (rows without them are dropped,
+# matching what the edit screen has always done).
+DEAL_CHILD_SPECS = {
+    'owners': {
+        'fields': [('name', 'str'), ('mobile', 'str'), ('email', 'str'), ('aadhar_card', 'str'),
+                   ('pan_card', 'str'), ('address', 'str')],
+        'required': ['name'],
+    },
+    'buyers': {
+        'fields': [('name', 'str'), ('mobile', 'str'), ('email', 'str'), ('aadhar_card', 'str'),
+                   ('pan_card', 'str')],
+        'required': ['name'],
+    },
+    'investors': {
+        'fields': [('investor_name', 'str'), ('investment_amount', 'num'), ('investment_percentage', 'num'),
+                   ('mobile', 'str'), ('email', 'str'), ('aadhar_card', 'str'), ('pan_card', 'str')],
+        'required': ['investor_name'],
+    },
+    'expenses': {
+        'fields': [('expense_type', 'str'), ('expense_description', 'str'), ('amount', 'num'),
+                   ('paid_by', 'str'), ('expense_date', 'date'), ('receipt_number', 'str')],
+        'required': ['expense_type', 'amount'],
+    },
+}
+
+# Editable columns on the deals row itself
+DEAL_FIELDS = [
+    ('project_name', 'str'), ('survey_number', 'str'), ('location', 'str'), ('taluka', 'str'),
+    ('village', 'str'), ('total_area', 'num'), ('area_unit', 'str'), ('status', 'str'),
+    ('payment_mode', 'str'), ('profit_allocation', 'str'),
+]
+
+def normalize_field_value(kind, value):
+    """
+    Normalize a DB or request value to a JSON-safe comparable form.
+    Empty strings and None compare equal; numbers compare to 2 decimals; dates as YYYY-MM-DD.
+    """
+    if value is None or (isinstance(value, str) and value.strip() in ('', 'null')):
+        return None
+    if kind == 'num':
+        try:
+            return round(float(value), 2)
+        except (ValueError, TypeError):
+            return None
+    if kind == 'date':
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d')
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return parse_date_to_mysql_format(value)
+    return str(value).strip()
+
+def diff_fields(current, submitted, fields):
+    """Return {column: {'old': ..., 'new': ...}} for the submitted fields that differ from current"""
+    changes = {}
+    for column, kind in fields:
+        if column not in submitted:
+            continue
+        old = normalize_field_value(kind, current.get(column))
+        new = normalize_field_value(kind, submitted.get(column))
+        if old != new:
+            changes[column] = {'old': old, 'new': new}
+    return changes
+
+def diff_child_rows(existing_rows, submitted_rows, spec):
+    """
+    Compute the change set for one child collection, matching rows by id only:
+    a submitted row carrying the `id` of an existing row updates it, a submitted row without
+    one (or with an id this deal does not have) is an insert, and an existing row whose id was
+    not submitted is a delete. Rows are never matched by position, so removing or reordering
+    people cannot move one person's payments and documents onto another.
+    Returns {'inserts': [row, ...], 'updates': {id: {column: {'old', 'new'}}}, 'deletes': [id, ...]}
+    """
+    fields = spec['fields']
+    kept = [r for r in submitted_rows if all(r.get(f) for f in spec['required'])]
+    existing_by_id = {row['id']: row for row in existing_rows}
+
+    matched = {}
+    inserts = []
+    for row in kept:
+        try:
+            row_id = int(row.get('id')) if row.get('id') not in (None, '') else None
+        except (ValueError, TypeError):
+            row_id = None
+        if row_id in existing_by_id and row_id not in matched:
+            matched[row_id] = row
+        else:
+            inserts.append({column: normalize_field_value(kind, row.get(column)) for column, kind in fields})
+
+    updates = {}
+    for row_id, row in matched.items():
+        changes = diff_fields(existing_by_id[row_id], row, fields)
+        if changes:
+            updates[row_id] = changes
+
+    deletes = [row['id'] for row in existing_rows if row['id'] not in matched]
+    return {'inserts': inserts, 'updates': updates, 'deletes': deletes}
+
+def apply_child_changes(cursor, table, deal_id, changeset, fields):
+    """
+    Apply a change set from diff_child_rows with batched statements:
+    one multi-row INSERT, one executemany per distinct set of changed columns, one DELETE ... IN.
+    """
+    if changeset['deletes']:
+        placeholders = ','.join(['%s'] * len(changeset['deletes']))
+        cursor.execute(f"DELETE FROM {table} WHERE deal_id = %s AND id IN ({placeholders})",
+                       [deal_id] + changeset['deletes'])
+
+    updates_by_columns = {}
+    for row_id, changes in changeset['updates'].items():
+        columns = tuple(sorted(changes.keys()))
+        params = [changes[c]['new'] for c in columns] + [row_id, deal_id]
+        updates_by_columns.setdefault(columns, []).append(params)
+    for columns, rows in updates_by_columns.items():
+        set_clause = ', '.join(f"{c} = %s" for c in columns)
+        cursor.executemany(f"UPDATE {table} SET {set_clause} WHERE id = %s AND deal_id = %s", rows)
+
+    if changeset['inserts']:
+        columns = [column for column, _ in fields]
+        placeholders = ', '.join(['%s'] * (len(columns) + 1))
+        cursor.executemany(
+            f"INSERT INTO {table} (deal_id, {', '.join(columns)}) VALUES ({placeholders})",
+            [[deal_id] + [row.get(c) for c in columns] for row in changeset['inserts']]
+        )
+
 @app.route('/api/deals/<int:deal_id>', methods=['PUT'])
 @token_required
+@response_cache.invalidates('deals', 'deal:{deal_id}', 'owners', 'investors')
 def update_deal(current_user, deal_id):
-    """Update an existing deal with all its related data"""
+    """
+    Update an existing deal with all its related data.
+    Only fields and collections present in the payload are considered, and only rows that
+    actually changed are written: the current graph is loaded once, diffed per collection,
+    and the resulting inserts/updates/deletes are applied in one transaction.
+    """
+    connection = None
     try:
-        data = request.get_json()
+        data = request.get_json() or {}
         
         connection = get_db_connection()
+        connection.start_transaction()
         cursor = connection.cursor()
         
-        # Check if deal exists
-        cursor.execute("SELECT id FROM deals WHERE id = %s", (deal_id,))
-        if not cursor.fetchone():
+        # Deal row lock before the child writes (see deal_summary.lock_deal)
+        if not lock_deal(connection, deal_id):
+            connection.rollback()
             return jsonify({'error': 'Deal not found'}), 404
-        
-        # Handle empty strings for numeric fields
-        total_area = data.get('total_area') if data.get('total_area') != '' else None
 
-        # Validate and clean status field
-        status = data.get('status', 'open')
-        if status:
+        # Load the current deal graph once
+        graph = load_deal_graph(connection, deal_id)
+        if graph is None:
+            connection.rollback()
+            return jsonify({'error': 'Deal not found'}), 404
+
+        submitted = dict(data)
+        if 'status' in submitted:
+            # Validate and clean status field
+            status = submitted.get('status') or 'open'
             status = str(status).strip().lower()
-        
-        # Map valid status values
-        valid_statuses = {
-            'open': 'open',
-            'closed': 'closed', 
-            'commission': 'commission',
-            'for sale': 'For Sale',
-            'sold': 'Sold',
-            'in progress': 'In Progress',
-            'completed': 'Completed',
-            'on hold': 'On Hold',
-            'cancelled': 'Cancelled'
-        }
-        
-        # Use mapped status or default to 'open'
-        final_status = valid_statuses.get(status, 'open')
+            
+            # Map valid status values
+            valid_statuses = {
+                'open': 'open',
+                'closed': 'closed', 
+                'commission': 'commission',
+                'for sale': 'For Sale',
+                'sold': 'Sold',
+                'in progress': 'In Progress',
+                'completed': 'Completed',
+                'on hold': 'On Hold',
+                'cancelled': 'Cancelled'
+            }
+            
+            # Use mapped status or default to 'open'
+            submitted['status'] = valid_statuses.get(status, 'open')
 
-        # Update main deal record
-        cursor.execute("""
-            UPDATE deals SET 
-                project_name = %s, survey_number = %s, location = %s, 
-                taluka = %s, village = %s, total_area = %s, area_unit = %s, 
-                status = %s, payment_mode = %s, profit_allocation = %s, 
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = %s
-        """, (
-            data.get('project_name'),
-            data.get('survey_number'),
-            data.get('location'),
-            data.get('taluka'),
-            data.get('village'),
-            total_area,
-            data.get('area_unit'),
-            final_status,
-            data.get('payment_mode'),
-            data.get('profit_allocation'),
-            deal_id
-        ))
+        # Update main deal record with changed columns only
+        deal_changes = diff_fields(graph['deal'], submitted, DEAL_FIELDS)
+        if deal_changes:
+            columns = list(deal_changes.keys())
+            set_clause = ', '.join(f"{c} = %s" for c in columns)
+            cursor.execute(
+                f"UPDATE deals SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                [deal_changes[c]['new'] for c in columns] + [deal_id]
+            )
 
-        # Update owners - delete existing and insert new ones
-        cursor.execute("DELETE FROM owners WHERE deal_id = %s", (deal_id,))
-        owners = data.get('owners', [])
-        for owner in owners:
-            if owner.get('name'):
-                cursor.execute("""
-                    INSERT INTO owners (deal_id, name, mobile, email, aadhar_card, pan_card, address)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    deal_id,
-                    owner.get('name'),
-                    owner.get('mobile'),
-                    owner.get('email'),
-                    owner.get('aadhar_card'),
-                    owner.get('pan_card'),
-                    owner.get('address')
-                ))
+        # Diff and apply each child collection that was submitted
+        changes = dict(deal_changes)
+        summary = {}
+        for table, spec in DEAL_CHILD_SPECS.items():
+            if table not in data:
+                continue
+            rows = data.get(table) or []
+            if table == 'investors':
+                rows = normalize_investors(rows)
+            changeset = diff_child_rows(graph[table], rows, spec)
+            apply_child_changes(cursor, table, deal_id, changeset, spec['fields'])
+            summary[table] = {
+                'inserted': len(changeset['inserts']),
+                'updated': len(changeset['updates']),
+                'deleted': len(changeset['deletes'])
+            }
+            if changeset['inserts'] or changeset['updates'] or changeset['deletes']:
+                changes[table] = {
+                    'inserted': changeset['inserts'],
+                    'updated': {str(row_id): diff for row_id, diff in changeset['updates'].items()},
+                    'deleted': changeset['deletes']
+                }
 
-        # Update buyers - delete existing and insert new ones
-        cursor.execute("DELETE FROM buyers WHERE deal_id = %s", (deal_id,))
-        buyers = data.get('buyers', [])
-        for buyer in buyers:
-            if buyer.get('name'):
-                cursor.execute("""
-                    INSERT INTO buyers (deal_id, name, mobile, email, aadhar_card, pan_card)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (
-                    deal_id,
-                    buyer.get('name'),
-                    buyer.get('mobile'),
-                    buyer.get('email'),
-                    buyer.get('aadhar_card'),
-                    buyer.get('pan_card')
-                ))
-        
-        # Update investors - delete existing and insert new ones
-        cursor.execute("DELETE FROM investors WHERE deal_id = %s", (deal_id,))
-        investors = data.get('investors', [])
-        for investor in investors:
-            if investor.get('investor_name'):
-                # Normalize investment_amount -> always send a numeric (0 if empty/invalid)
-                inv_amt_raw = investor.get('investment_amount')
-                if isinstance(inv_amt_raw, str):
-                    inv_amt_raw = inv_amt_raw.strip()
-                    if inv_amt_raw.lower() == 'null':
-                        inv_amt_raw = None
-                if inv_amt_raw is None or inv_amt_raw == '':
-                    investment_amount = 0
-                else:
-                    try:
-                        investment_amount = float(inv_amt_raw)
-                    except Exception:
-                        investment_amount = 0
-
-                # Normalize investment_percentage -> None if empty or invalid
-                inv_pct_raw = investor.get('investment_percentage')
-                if isinstance(inv_pct_raw, str):
-                    inv_pct_raw = inv_pct_raw.strip()
-                    if inv_pct_raw == '':
-                        investment_percentage = None
-                    else:
-                        try:
-                            investment_percentage = float(inv_pct_raw)
-                        except Exception:
-                            investment_percentage = None
-                else:
-                    investment_percentage = inv_pct_raw if inv_pct_raw is not None else None
-                    
-                cursor.execute("""
-                    INSERT INTO investors (deal_id, investor_name, investment_amount, 
-                                         investment_percentage, mobile, email, 
-                                         aadhar_card, pan_card)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    deal_id,
-                    investor.get('investor_name'),
-                    investment_amount,
-                    investment_percentage,
-                    investor.get('mobile'),
-                    investor.get('email'),
-                    investor.get('aadhar_card'),
-                    investor.get('pan_card')
-                ))
+        refresh_deal_summary(connection, deal_id)
+        connection.commit()
 
-        # Update expenses - delete existing and insert new ones
-        cursor.execute("DELETE FROM expenses WHERE deal_id = %s", (deal_id,))
-        expenses = data.get('expenses', [])
-        for expense in expenses:
-            if expense.get('expense_type') and expense.get('amount'):
-                cursor.execute("""
-                    INSERT INTO expenses (deal_id, expense_type, expense_description, amount, paid_by, expense_date, receipt_number)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    deal_id,
-                    expense.get('expense_type'),
-                    expense.get('expense_description'),
-                    expense.get('amount'),
-                    expense.get('paid_by'),
-                    expense.get('expense_date'),
-                    expense.get('receipt_number')
-                ))
+        if changes:
+            log_activity(
+                user_id=current_user['id'],
+                action='UPDATE',
+                entity_type='deal',
+                entity_id=deal_id,
+                entity_name=graph['deal'].get('project_name'),
+                changes=changes,
+                request_obj=request
+            )
 
-        connection.commit()
-        return jsonify({'message': 'Deal updated successfully', 'deal_id': deal_id})
+        return jsonify({'message': 'Deal updated successfully', 'deal_id': deal_id, 'changes': summary})
     
     except Exception as e:
+        if connection:
+            connection.rollback()
         return jsonify({'error': str(e)}), 500
     finally:
         if connection:
@@ -3186,6 +3909,7 @@ def update_deal(current_user, deal_id):
 
 @app.route('/api/deals/<int:deal_id>/status', methods=['PUT'])
 @token_required
+@response_cache.invalidates('deals', 'deal:{deal_id}')
 def update_deal_status(current_user, deal_id):
     """Update deal status only"""
     try:
@@ -3243,14 +3967,14 @@ def update_deal_status(current_user, deal_id):
 
 @app.route('/api/deals', methods=['GET'])
 @token_required
+@response_cache.cached('deals')
 def get_deals(current_user):
     try:
-        connection = get_db_connection()
+        connection = get_read_db_connection()
         cursor = connection.cursor(dictionary=True)
         
-        # Get user role and permissions from database
-        cursor.execute("SELECT role, owner_id, investor_id FROM users WHERE id = %s", (current_user['id'],))
-        user_data = cursor.fetchone()
+        # Get user role and permissions (cached with the token)
+        user_data = get_user_access(current_user, cursor)
         
         if not user_data:
             return jsonify({'error': 'User not found'}), 403
@@ -3281,15 +4005,9 @@ def get_deals(current_user):
                 ORDER BY d.created_at DESC
             """)
         
-        deals = cursor.fetchall()
-        
-        # Convert datetime objects to strings for JSON serialization
-        for deal in deals:
-            for key, value in deal.items():
-                if isinstance(value, datetime):
-                    deal[key] = value.isoformat()
-        
-        return jsonify(deals)
+        response = stream_json_rows(connection, cursor)
+        connection = None  # closed by the stream
+        return response
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -3297,17 +4015,43 @@ def get_deals(current_user):
         if connection:
             connection.close()
 
+def encode_deal_cursor(created_at, deal_id):
+    """Encode a (created_at, id) keyset position as an opaque URL-safe cursor; a NULL created_at is kept as null"""
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    raw = json.dumps([created_at, deal_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_deal_cursor(cursor_str):
+    """Decode a cursor produced by encode_deal_cursor. Returns (created_at or None, id), or None if invalid"""
+    if not cursor_str:
+        return None
+    try:
+        padded = cursor_str + '=' * (-len(cursor_str) % 4)
+        created_at, deal_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return (datetime.fromisoformat(created_at) if created_at is not None else None), int(deal_id)
+    except Exception:
+        return None
+
 @app.route('/api/deals/paginated', methods=['GET'])
 @token_required
 def get_deals_paginated(current_user):
-    """Get deals with pagination and filtering support"""
+    """Get deals with pagination and filtering support.
+
+    Two paging modes are supported:
+    - keyset: pass the `cursor` returned in pagination.nextCursor to fetch the next page.
+      Pages are seeked on (created_at, id) so deep pages cost the same as the first one.
+    - offset: legacy `page` parameter, kept for existing clients.
+
+    The `count` parameter controls the total count: 'exact' (default), 'estimate'
+    (optimizer row estimate, no table scan) or 'none' (skip counting entirely).
+    """
     try:
-        connection = get_db_connection()
+        connection = get_read_db_connection()
         cursor = connection.cursor(dictionary=True)
         
-        # Get user role and permissions from database
-        cursor.execute("SELECT role, owner_id, investor_id FROM users WHERE id = %s", (current_user['id'],))
-        user_data = cursor.fetchone()
+        # Get user role and permissions (cached with the token)
+        user_data = get_user_access(current_user, cursor)
         
         if not user_data:
             return jsonify({'error': 'User not found'}), 403
@@ -3322,9 +4066,18 @@ def get_deals_paginated(current_user):
         year_filter = request.args.get('year')
         status_filter = request.args.get('status')
         search_term = request.args.get('search', '').strip()
+        count_mode = request.args.get('count', 'exact').strip().lower()
+        if count_mode not in ('exact', 'estimate', 'none'):
+            count_mode = 'exact'
+        
+        # Keyset cursor takes precedence over page/offset
+        cursor_param = request.args.get('cursor')
+        keyset = decode_deal_cursor(cursor_param)
+        if cursor_param and keyset is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
         
         # Calculate offset
-        offset = (page - 1) * limit
+        offset = (page - 1) * limit if keyset is None else 0
         
         # Build WHERE clause for filters
         where_conditions = []
@@ -3346,14 +4099,20 @@ def get_deals_paginated(current_user):
                         'totalCount': 0,
                         'itemsPerPage': limit,
                         'hasNextPage': False,
-                        'hasPrevPage': False
+                        'hasPrevPage': False,
+                        'nextCursor': None
                     }
                 })
         # Admin and auditor roles can see all deals (no additional filtering)
         
         if year_filter:
-            where_conditions.append("YEAR(d.purchase_date) = %s")
-            params.append(year_filter)
+            # Use a date range instead of YEAR() so idx_deals_status_purchase_date can be used
+            try:
+                year = int(year_filter)
+            except (ValueError, TypeError):
+                return jsonify({'error': f'Invalid year: {year_filter}'}), 400
+            where_conditions.append("d.purchase_date >= %s AND d.purchase_date < %s")
+            params.extend([f"{year:04d}-01-01", f"{year + 1:04d}-01-01"])
         
         if status_filter and status_filter != 'all':
             where_conditions.append("d.status = %s")
@@ -3399,45 +4158,77 @@ def get_deals_paginated(current_user):
         if where_conditions:
             where_clause = "WHERE " + " AND ".join(where_conditions)
         
-        # Get total count for pagination
-        count_query = f"""
-            SELECT COUNT(*) as total_count
-            FROM deals d 
-            {where_clause}
-        """
-        cursor.execute(count_query, params)
-        total_count = cursor.fetchone()['total_count']
-        
-        # Get paginated deals
+        # Get total count for pagination (filters only, independent of the cursor position)
+        total_count = None
+        if count_mode == 'exact':
+            count_query = f"""
+                SELECT COUNT(*) as total_count
+                FROM deals d 
+                {where_clause}
+            """
+            cursor.execute(count_query, params)
+            total_count = cursor.fetchone()['total_count']
+        elif count_mode == 'estimate':
+            if where_conditions:
+                # Optimizer row estimate for the filtered set; no rows are read
+                cursor.execute(f"EXPLAIN SELECT d.id FROM deals d {where_clause}", params)
+                plan = cursor.fetchall() or []
+                total_count = int(plan[0].get('rows') or 0) if plan else 0
+            else:
+                cursor.execute("""
+                    SELECT TABLE_ROWS as total_count FROM information_schema.TABLES
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'deals'
+                """)
+                row = cursor.fetchone() or {}
+                total_count = int(row.get('total_count') or 0)
+        
+        # Seek past the cursor position on (created_at, id), served by idx_deals_created_at_id.
+        # MySQL sorts NULL created_at last in DESC order, so those rows follow every dated one.
+        page_conditions = list(where_conditions)
+        page_params = list(params)
+        if keyset is not None and keyset[0] is None:
+            page_conditions.append("(d.created_at IS NULL AND d.id < %s)")
+            page_params.append(keyset[1])
+        elif keyset is not None:
+            page_conditions.append("(d.created_at < %s OR (d.created_at = %s AND d.id < %s) OR d.created_at IS NULL)")
+            page_params.extend([keyset[0], keyset[0], keyset[1]])
+        page_where_clause = ""
+        if page_conditions:
+            page_where_clause = "WHERE " + " AND ".join(page_conditions)
+        
+        # Fetch one extra row to know whether another page exists without counting
         deals_query = f"""
             SELECT d.*, u.full_name as created_by_name 
             FROM deals d 
             LEFT JOIN users u ON d.created_by = u.id 
-            {where_clause}
-            ORDER BY d.created_at DESC
+            {page_where_clause}
+            ORDER BY d.created_at DESC, d.id DESC
             LIMIT %s OFFSET %s
         """
-        cursor.execute(deals_query, params + [limit, offset])
+        cursor.execute(deals_query, page_params + [limit + 1, offset])
         deals = cursor.fetchall()
+        has_next_page = len(deals) > limit
+        deals = deals[:limit]
         
-        # Convert datetime objects to strings for JSON serialization
-        for deal in deals:
-            for key, value in deal.items():
-                if isinstance(value, datetime):
-                    deal[key] = value.isoformat()
+        next_cursor = None
+        if has_next_page and deals:
+            last = deals[-1]
+            next_cursor = encode_deal_cursor(last['created_at'], last['id'])
         
         # Calculate pagination info
-        total_pages = (total_count + limit - 1) // limit  # Ceiling division
+        total_pages = (total_count + limit - 1) // limit if total_count is not None else None  # Ceiling division
         
         response_data = {
             'deals': deals,
             'pagination': {
-                'currentPage': page,
+                'currentPage': page if keyset is None else None,
                 'totalPages': total_pages,
                 'totalCount': total_count,
+                'countMode': count_mode,
                 'itemsPerPage': limit,
-                'hasNextPage': page < total_pages,
-                'hasPrevPage': page > 1
+                'hasNextPage': has_next_page,
+                'hasPrevPage': page > 1 if keyset is None else True,
+                'nextCursor': next_cursor
             }
         }
         
@@ -3455,7 +4246,7 @@ def get_deals_stats(current_user):
     """Get deal statistics for dashboard"""
     connection = None
     try:
-        connection = get_db_connection()
+        connection = get_read_db_connection()
         cursor = connection.cursor(dictionary=True)
         
         # First ensure users schema exists
@@ -3466,8 +4257,7 @@ def get_deals_stats(current_user):
         
         # Get user role and permissions from database with fallback
         try:
-            cursor.execute("SELECT role, owner_id, investor_id FROM users WHERE id = %s", (current_user['id'],))
-            user_data = cursor.fetchone()
+            user_data = get_user_access(current_user, cursor)
         except mysql.connector.Error as e:
             if "Unknown column" in str(e):
                 # Columns don't exist yet, treat as admin for backward compatibility
@@ -3567,6 +4357,7 @@ def get_deals_stats(current_user):
 
 @app.route('/api/deals', methods=['POST'])
 @token_required
+@response_cache.invalidates('deals', 'owners', 'investors')
 def create_deal(current_user):
     try:
         data = request.get_json()
@@ -3624,124 +4415,98 @@ def create_deal(current_user):
             data.get('profit_allocation')
         ))
         deal_id = cursor.lastrowid
-        # Insert owners
+        # Insert owners in request order with one batched INSERT: existing owners are copied
+        # from their source rows (fetched in one query), repeated entries give repeated rows
         owners = data.get('owners', [])
+        owner_sources = fetch_rows_by_id(cursor, 'owners', ['name', 'mobile', 'email', 'aadhar_card', 'pan_card'],
+                                         [owner.get('existing_owner_id') for owner in owners if owner.get('existing_owner_id')])
+        owner_rows = []
         for owner in owners:
             if owner.get('existing_owner_id'):
-                # Associate existing owner with this deal
-                cursor.execute("""
-                    INSERT INTO owners (deal_id, name, mobile, email, aadhar_card, pan_card)
-                    SELECT %s, name, mobile, email, aadhar_card, pan_card
-                    FROM owners 
-                    WHERE id = %s
-                    LIMIT 1
-                """, (deal_id, owner.get('existing_owner_id')))
+                source = owner_sources.get(_row_id(owner.get('existing_owner_id')))
+                if source:
+                    owner_rows.append((deal_id,) + source)
             elif owner.get('name'):
-                # Create new owner
-                cursor.execute("""
-                    INSERT INTO owners (deal_id, name, mobile, aadhar_card, pan_card)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (
-                    deal_id,
-                    owner.get('name'),
-                    owner.get('mobile'),
-                    owner.get('aadhar_card'),
-                    owner.get('pan_card')
-                ))
+                owner_rows.append((deal_id, owner.get('name'), owner.get('mobile'), None,
+                                   owner.get('aadhar_card'), owner.get('pan_card')))
+        if owner_rows:
+            cursor.executemany("""
+                INSERT INTO owners (deal_id, name, mobile, email, aadhar_card, pan_card)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, owner_rows)
 
         # Insert buyers
         buyers = data.get('buyers', [])
-        for buyer in buyers:
-            if buyer.get('name'):
-                cursor.execute("""
-                    INSERT INTO buyers (deal_id, name, mobile, aadhar_card, pan_card)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (
-                    deal_id,
-                    buyer.get('name'),
-                    buyer.get('mobile'),
-                    buyer.get('aadhar_card'),
-                    buyer.get('pan_card')
-                ))
+        buyer_rows = [
+            (deal_id, buyer.get('name'), buyer.get('mobile'), buyer.get('aadhar_card'), buyer.get('pan_card'))
+            for buyer in buyers
+            if buyer.get('name')
+        ]
+        if buyer_rows:
+            cursor.executemany("""
+                INSERT INTO buyers (deal_id, name, mobile, aadhar_card, pan_card)
+                VALUES (%s, %s, %s, %s, %s)
+            """, buyer_rows)
         
         # Insert investors
-        investors = data.get('investors', [])
+        investors = normalize_investors(data.get('investors', []))
+        # Same as owners. Copies of existing investors are linked to the original with
+        # parent_investor_id instead of being duplicated
+        investor_sources = fetch_rows_by_id(
+            cursor, 'investors',
+            ['investor_name', 'investment_amount', 'investment_percentage', 'mobile', 'email', 'aadhar_card', 'pan_card', 'is_starred'],
+            [investor.get('existing_investor_id') for investor in investors if investor.get('existing_investor_id')]
+        )
+        investor_rows = []
         for investor in investors:
             if investor.get('existing_investor_id'):
-                # Link to existing investor instead of duplicating
-                # Create a new record but mark it as linked to the original with parent_investor_id
-                cursor.execute("""
-                    INSERT INTO investors (deal_id, investor_name, investment_amount, 
-                                         investment_percentage, mobile, email,
-                                         aadhar_card, pan_card, is_starred, parent_investor_id)
-                    SELECT %s, investor_name, investment_amount, investment_percentage, 
-                           mobile, email, aadhar_card, pan_card, is_starred, %s
-                    FROM investors 
-                    WHERE id = %s
-                    LIMIT 1
-                """, (deal_id, investor.get('existing_investor_id'), investor.get('existing_investor_id')))
+                parent_id = _row_id(investor.get('existing_investor_id'))
+                source = investor_sources.get(parent_id)
+                if source:
+                    investor_rows.append((deal_id,) + source + (parent_id,))
             elif investor.get('investor_name'):
-                # Create new investor
-                # Normalize investment_amount -> always send a numeric (0 if empty/invalid)
-                inv_amt_raw = investor.get('investment_amount')
-                if isinstance(inv_amt_raw, str):
-                    inv_amt_raw = inv_amt_raw.strip()
-                    if inv_amt_raw.lower() == 'null':
-                        inv_amt_raw = None
-                if inv_amt_raw is None or inv_amt_raw == '':
-                    investment_amount = 0
-                else:
-                    try:
-                        investment_amount = float(inv_amt_raw)
-                    except Exception:
-                        investment_amount = 0
-
-                # Normalize investment_percentage -> None if empty or invalid
-                inv_pct_raw = investor.get('investment_percentage')
-                if isinstance(inv_pct_raw, str):
-                    inv_pct_raw = inv_pct_raw.strip()
-                    if inv_pct_raw == '':
-                        investment_percentage = None
-                    else:
-                        try:
-                            investment_percentage = float(inv_pct_raw)
-                        except Exception:
-                            investment_percentage = None
-                else:
-                    investment_percentage = inv_pct_raw if inv_pct_raw is not None else None
-
-                cursor.execute("""
-                    INSERT INTO investors (deal_id, investor_name, investment_amount, 
-                                         investment_percentage, mobile, 
-                                         aadhar_card, pan_card)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (
+                investor_rows.append((
                     deal_id,
                     investor.get('investor_name'),
-                    investment_amount,
-                    investment_percentage,
+                    investor.get('investment_amount'),
+                    investor.get('investment_percentage'),
                     investor.get('mobile'),
+                    None,
                     investor.get('aadhar_card'),
-                    investor.get('pan_card')
+                    investor.get('pan_card'),
+                    False,
+                    None
                 ))
+        if investor_rows:
+            cursor.executemany("""
+                INSERT INTO investors (deal_id, investor_name, investment_amount, 
+                                     investment_percentage, mobile, email,
+                                     aadhar_card, pan_card, is_starred, parent_investor_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, investor_rows)
 
         # Insert expenses
         expenses = data.get('expenses', [])
-        for expense in expenses:
-            if expense.get('expense_type') and expense.get('amount'):
-                cursor.execute("""
-                    INSERT INTO expenses (deal_id, expense_type, expense_description, amount, paid_by, expense_date, receipt_number)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    deal_id,
-                    expense.get('expense_type'),
-                    expense.get('expense_description'),
-                    expense.get('amount'),
-                    expense.get('paid_by'),
-                    expense.get('expense_date'),
-                    expense.get('receipt_number')
-                ))
+        expense_rows = [
+            (
+                deal_id,
+                expense.get('expense_type'),
+                expense.get('expense_description'),
+                expense.get('amount'),
+                expense.get('paid_by'),
+                expense.get('expense_date'),
+                expense.get('receipt_number')
+            )
+            for expense in expenses
+            if expense.get('expense_type') and expense.get('amount')
+        ]
+        if expense_rows:
+            cursor.executemany("""
+                INSERT INTO expenses (deal_id, expense_type, expense_description, amount, paid_by, expense_date, receipt_number)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, expense_rows)
 
+        refresh_deal_summary(connection, deal_id)
         connection.commit()
 
         return jsonify({'message': 'Deal created successfully', 'deal_id': deal_id})
@@ -3752,60 +4517,88 @@ def create_deal(current_user):
         if connection:
             connection.close()
 
+# Child collections loaded with a deal, in the order their statements are issued
+DEAL_GRAPH_QUERIES = [
+    ('deal', "SELECT * FROM deals WHERE id = %(deal_id)s"),
+    ('owners', "SELECT * FROM owners WHERE deal_id = %(deal_id)s"),
+    ('buyers', "SELECT * FROM buyers WHERE deal_id = %(deal_id)s"),
+    ('investors', "SELECT * FROM investors WHERE deal_id = %(deal_id)s"),
+    ('expenses', """
+        SELECT e.*, i.investor_name as paid_by_name 
+        FROM expenses e 
+        LEFT JOIN investors i ON e.paid_by = i.id 
+        WHERE e.deal_id = %(deal_id)s
+    """),
+    ('documents', "SELECT * FROM documents WHERE deal_id = %(deal_id)s"),
+]
+
+def load_deal_graph(connection, deal_id):
+    """
+    Load a deal with its owners, buyers, investors, expenses and documents in a single
+    round trip using multi-statement execution. Returns None if the deal does not exist.
+    Shared by GET /api/deals/<id> and any export that needs the full deal.
+    """
+    cursor = connection.cursor(dictionary=True)
+    sql = ';\n'.join(query.strip() for _, query in DEAL_GRAPH_QUERIES)
+    graph = {}
+    try:
+        results = cursor.execute(sql, {'deal_id': deal_id}, multi=True)
+        names = iter(DEAL_GRAPH_QUERIES)
+        for result in results:
+            if not result.with_rows:
+                continue
+            name, _ = next(names)
+            graph[name] = result.fetchall()
+    finally:
+        cursor.close()
+
+    deal_rows = graph.get('deal') or []
+    if not deal_rows:
+        return None
+    graph['deal'] = deal_rows[0]
+    for name, _ in DEAL_GRAPH_QUERIES[1:]:
+        graph.setdefault(name, [])
+    return graph
+
+def deal_graph_etag(graph):
+    """
+    Weak ETag for a deal graph: the newest updated_at/created_at across all rows plus the
+    row ids of every collection, so inserts, edits and deletes all change the tag.
+    """
+    newest = None
+    parts = []
+    for name, _ in DEAL_GRAPH_QUERIES:
+        rows = graph[name] if isinstance(graph[name], list) else [graph[name]]
+        parts.append(name + ':' + ','.join(str(r.get('id')) for r in rows))
+        for r in rows:
+            for key in ('updated_at', 'created_at', 'uploaded_at'):
+                value = r.get(key)
+                if isinstance(value, datetime) and (newest is None or value > newest):
+                    newest = value
+    parts.append(newest.isoformat() if newest else '')
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
 @app.route('/api/deals/<int:deal_id>', methods=['GET'])
 @token_required
+@response_cache.cached('deal:{deal_id}', 'owners', 'investors')
 def get_deal(current_user, deal_id):
+    connection = None
     try:
         connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-
-        # Get deal details
-        cursor.execute("SELECT * FROM deals WHERE id = %s", (deal_id,))
-        deal = cursor.fetchone()
-
-        # Get owners
-        cursor.execute("SELECT * FROM owners WHERE deal_id = %s", (deal_id,))
-        owners = cursor.fetchall()
-
-        # Get buyers
-        cursor.execute("SELECT * FROM buyers WHERE deal_id = %s", (deal_id,))
-        buyers = cursor.fetchall()
 
-        if not deal:
-            return jsonify({'error': 'Deal not found'}), 404
-
-        # Get investors
-        cursor.execute("SELECT * FROM investors WHERE deal_id = %s", (deal_id,))
-        investors = cursor.fetchall()
-
-        # Get expenses
-        cursor.execute("""
-            SELECT e.*, i.investor_name as paid_by_name 
-            FROM expenses e 
-            LEFT JOIN investors i ON e.paid_by = i.id 
-            WHERE e.deal_id = %s
-        """, (deal_id,))
-        expenses = cursor.fetchall()
-
-        # Get documents
-        cursor.execute("SELECT * FROM documents WHERE deal_id = %s", (deal_id,))
-        documents = cursor.fetchall()
+        graph = load_deal_graph(connection, deal_id)
+        if graph is None:
+            return jsonify({'error': 'Deal not found'}), 404
 
-        # Convert datetime objects
-        for item in [deal] + owners + buyers + investors + expenses + documents:
-            if item:
-                for key, value in item.items():
-                    if isinstance(value, datetime):
-                        item[key] = value.isoformat()
+        etag = deal_graph_etag(graph)
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag, weak=True)
+            return response
 
-        return jsonify({
-            'deal': deal,
-            'owners': owners,
-            'buyers': buyers,
-            'investors': investors,
-            'expenses': expenses,
-            'documents': documents
-        })
+        response = jsonify(graph)
+        response.set_etag(etag, weak=True)
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -3814,6 +4607,7 @@ def get_deal(current_user, deal_id):
 
 @app.route('/api/deals/<int:deal_id>/purchase-amount', methods=['PUT'])
 @token_required
+@response_cache.invalidates('deals', 'deal:{deal_id}')
 def update_purchase_amount(current_user, deal_id):
     """Update the purchase amount for a specific deal"""
     try:
@@ -3847,6 +4641,7 @@ def update_purchase_amount(current_user, deal_id):
             "UPDATE deals SET purchase_amount = %s WHERE id = %s",
             (purchase_amount, deal_id)
         )
+        refresh_deal_summary(connection, deal_id)
         connection.commit()
         
         return jsonify({
@@ -3871,53 +4666,39 @@ def update_purchase_amount(current_user, deal_id):
 
 @app.route('/api/deals/<int:deal_id>/owner-shares', methods=['PUT'])
 @token_required
+@response_cache.invalidates('deals', 'deal:{deal_id}', 'owners', 'investors')
 def update_owner_shares(current_user, deal_id):
     """Update owner share percentages and investment amounts for a specific deal"""
+    connection = None
     try:
-        data = request.get_json()
-        owners = data.get('owners', [])
-        
-        if not owners:
-            return jsonify({'error': 'No owners provided'}), 400
-        
+        data = request.get_json() or {}
+        shares = parse_shares(data.get('owners', []), 'id',
+                              {'percentage_share': ('percentage_share', float), 'investment_amount': ('investment_amount', int)},
+                              skip_missing_ids=True)
+
         connection = get_db_connection()
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
-            
-        cursor = connection.cursor()
-        
-        # Check if deal exists
-        cursor.execute("SELECT id FROM deals WHERE id = %s", (deal_id,))
-        if not cursor.fetchone():
-            return jsonify({'error': 'Deal not found'}), 404
-        
-        # Update owner share percentages and amounts
-        for owner_data in owners:
-            owner_id = owner_data.get('id')
-            percentage_share = float(owner_data.get('percentage_share', 0))
-            investment_amount = int(owner_data.get('investment_amount', 0))
-            
-            if owner_id:
-                # Check if owner exists for this deal
-                cursor.execute(
-                    "SELECT id FROM owners WHERE id = %s AND deal_id = %s", 
-                    (owner_id, deal_id)
-                )
-                if cursor.fetchone():
-                    # Update owner's share percentage and investment amount
-                    cursor.execute(
-                        "UPDATE owners SET percentage_share = %s, investment_amount = %s WHERE id = %s AND deal_id = %s",
-                        (percentage_share, investment_amount, owner_id, deal_id)
-                    )
-        
+
+        # Validation read and one batched UPDATE in a single transaction. Lenient like the
+        # original endpoint: the deal page sends rounded percentages (33+33+33), so no 100% check
+        result = apply_shares(connection, 'owner', deal_id, shares, 'percentage_share', strict=False)
         connection.commit()
-        
+
         return jsonify({
             'success': True,
             'message': 'Owner shares updated successfully',
-            'owners': owners
+            'owners': data.get('owners'),
+            'purchase_amount': result['purchase_amount'],
+            'total_percentage': result['total_percentage'],
+            'expected_amounts': [{'id': row['id'], 'percentage_share': row['percentage_share'],
+                                  'expected_amount': row['expected_amount']} for row in result['rows']]
         })
-        
+
+    except ShareUpdateError as e:
+        if connection:
+            connection.rollback()
+        return jsonify({'error': e.message}), e.status
     except mysql.connector.Error as e:
         if connection:
             connection.rollback()
@@ -3935,82 +4716,40 @@ def update_owner_shares(current_user, deal_id):
 # ORIGINAL ENDPOINT FOR PURCHASING SECTION - RESTORED
 @app.route('/api/deals/<int:deal_id>/investor-shares', methods=['PUT'])
 @token_required
+@response_cache.invalidates('deals', 'deal:{deal_id}', 'owners', 'investors')
 def update_investor_shares(current_user, deal_id):
     """Update investor share percentages and investment amounts for a specific deal"""
+    connection = None
     try:
-        data = request.get_json()
-        print(f"Received data: {data}")  # Debug log
-        
-        investors = data.get('investors', [])
-        print(f"Investors data: {investors}")  # Debug log
-        
-        if not investors:
-            return jsonify({'error': 'No investors provided'}), 400
-        
+        data = request.get_json() or {}
+        shares = parse_shares(data.get('investors', []), 'id',
+                              {'percentage_share': ('percentage_share', float), 'investment_amount': ('investment_amount', int)},
+                              skip_missing_ids=True)
+
         connection = get_db_connection()
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
-            
-        cursor = connection.cursor()
-        
-        # Ensure autocommit is off for transaction control
-        connection.autocommit = False
-        
-        # Check if deal exists
-        cursor.execute("SELECT id FROM deals WHERE id = %s", (deal_id,))
-        if not cursor.fetchone():
-            return jsonify({'error': 'Deal not found'}), 404
-        
-        # Update investor share percentages and amounts
-        updated_count = 0
-        for investor_data in investors:
-            investor_id = investor_data.get('id')
-            percentage_share = float(investor_data.get('percentage_share', 0))
-            investment_amount = int(investor_data.get('investment_amount', 0))
-            
-            print(f"Processing investor {investor_id}: percentage={percentage_share}, amount={investment_amount}")  # Debug log
-            
-            if investor_id:
-                # Check if investor exists for this deal
-                cursor.execute(
-                    "SELECT id FROM investors WHERE id = %s AND deal_id = %s", 
-                    (investor_id, deal_id)
-                )
-                if cursor.fetchone():
-                    # Update investor's share percentage and investment amount
-                    cursor.execute(
-                        "UPDATE investors SET percentage_share = %s, investment_amount = %s WHERE id = %s AND deal_id = %s",
-                        (percentage_share, investment_amount, investor_id, deal_id)
-                    )
-                    updated_count += 1
-                    print(f"Updated investor {investor_id}")  # Debug log
-                else:
-                    print(f"Investor {investor_id} not found for deal {deal_id}")  # Debug log
-        
+
+        # Validation read and one batched UPDATE in a single transaction. Lenient like the
+        # original endpoint: the deal page sends rounded percentages (33+33+33), so no 100% check
+        result = apply_shares(connection, 'investor', deal_id, shares, 'percentage_share', strict=False)
+        refresh_deal_summary(connection, deal_id)
         connection.commit()
-        print(f"Successfully updated {updated_count} investors")  # Debug log
-        
-        # Verify the changes were actually saved
-        print("Verifying changes were saved...")
-        for investor_data in investors:
-            investor_id = investor_data.get('id')
-            if investor_id:
-                cursor.execute(
-                    "SELECT percentage_share, investment_amount FROM investors WHERE id = %s AND deal_id = %s",
-                    (investor_id, deal_id)
-                )
-                result = cursor.fetchone()
-                if result:
-                    print(f"Verified investor {investor_id}: percentage={result[0]}, amount={result[1]}")
-                else:
-                    print(f"WARNING: Could not verify investor {investor_id}")
-        
+
         return jsonify({
             'success': True,
-            'message': f'Updated {updated_count} investor shares successfully',
-            'investors': investors
+            'message': f"Updated {result['updated']} investor shares successfully",
+            'investors': data.get('investors'),
+            'purchase_amount': result['purchase_amount'],
+            'total_percentage': result['total_percentage'],
+            'expected_amounts': [{'id': row['id'], 'percentage_share': row['percentage_share'],
+                                  'expected_amount': row['expected_amount']} for row in result['rows']]
         })
-        
+
+    except ShareUpdateError as e:
+        if connection:
+            connection.rollback()
+        return jsonify({'error': e.message}), e.status
     except mysql.connector.Error as e:
         if connection:
             connection.rollback()
@@ -4027,72 +4766,34 @@ def update_investor_shares(current_user, deal_id):
 
 @app.route('/api/deals/<int:deal_id>/investors/percentage-shares', methods=['PUT'])
 @token_required
+@response_cache.invalidates('deals', 'deal:{deal_id}', 'owners', 'investors')
 def update_investor_percentage_shares(current_user, deal_id):
     """Update percentage shares for investors of a deal"""
+    conn = None
     try:
-        data = request.get_json()
-        investor_shares = data.get('investor_shares', [])
-        
-        # Validate that investor_shares is a list
-        if not isinstance(investor_shares, list):
-            return jsonify({'error': 'investor_shares must be a list'}), 400
-        
-        # Validate total percentage equals 100%
-        total_percentage = sum(float(share.get('percentage_share', 0)) for share in investor_shares)
-        if abs(total_percentage - 100.0) > 0.01:  # Allow small floating point differences
-            return jsonify({'error': f'Total percentage must equal 100%. Current total: {total_percentage}%'}), 400
-        
-        # Validate each investor share
-        for share in investor_shares:
-            if 'investor_id' not in share or 'percentage_share' not in share:
-                return jsonify({'error': 'Each investor share must have investor_id and percentage_share'}), 400
-            
-            try:
-                percentage = float(share['percentage_share'])
-                if percentage < 0 or percentage > 100:
-                    return jsonify({'error': 'Percentage share must be between 0 and 100'}), 400
-            except (ValueError, TypeError):
-                return jsonify({'error': 'Invalid percentage_share value'}), 400
-        
-        # Get database connection
+        data = request.get_json() or {}
+        shares = parse_shares(data.get('investor_shares', []), 'investor_id',
+                              {'investment_percentage': ('percentage_share', float)})
+
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Check if deal exists and user has permission
-        cursor.execute("SELECT id FROM deals WHERE id = %s", (deal_id,))
-        deal = cursor.fetchone()
-        if not deal:
-            return jsonify({'error': 'Deal not found'}), 404
-        
-        # Update each investor's percentage share
-        for share in investor_shares:
-            investor_id = share['investor_id']
-            percentage_share = float(share['percentage_share'])
-            
-            # Verify investor belongs to this deal
-            cursor.execute("SELECT id FROM investors WHERE id = %s AND deal_id = %s", (investor_id, deal_id))
-            investor = cursor.fetchone()
-            if not investor:
-                return jsonify({'error': f'Investor {investor_id} not found for deal {deal_id}'}), 400
-            
-            # Update the percentage share (following owners pattern exactly)
-            cursor.execute(
-                "UPDATE investors SET investment_percentage = %s WHERE id = %s AND deal_id = %s",
-                (percentage_share, investor_id, deal_id)
-            )
-        
+        # Validation read and one batched UPDATE in a single transaction
+        result = apply_shares(conn, 'investor', deal_id, shares, 'investment_percentage')
         conn.commit()
-        
-        # Return updated investors data
-        cursor.execute("SELECT * FROM investors WHERE deal_id = %s ORDER BY id", (deal_id,))
-        updated_investors = cursor.fetchall()
-        
+
         return jsonify({
             'message': 'Investor percentage shares updated successfully',
-            'investors': updated_investors
+            'investors': result['rows'],
+            'purchase_amount': result['purchase_amount'],
+            'total_percentage': result['total_percentage']
         }), 200
-        
+
+    except ShareUpdateError as e:
+        if conn:
+            conn.rollback()
+        return jsonify({'error': e.message}), e.status
     except Exception as e:
+        if conn:
+            conn.rollback()
         print(f"Error updating investor percentage shares: {e}")
         return jsonify({'error': 'Failed to update investor percentage shares'}), 500
     finally:
@@ -4101,6 +4802,7 @@ def update_investor_percentage_shares(current_user, deal_id):
 
 @app.route('/api/deals/<int:deal_id>/buyers', methods=['POST'])
 @token_required
+@response_cache.invalidates('deals', 'deal:{deal_id}')
 def add_buyer_to_deal(current_user, deal_id):
     """Add a new buyer to an existing deal"""
     try:
@@ -4160,6 +4862,7 @@ def add_buyer_to_deal(current_user, deal_id):
 
 @app.route('/api/deals/<int:deal_id>/buyers/<int:buyer_id>', methods=['DELETE'])
 @token_required
+@response_cache.invalidates('deals', 'deal:{deal_id}')
 def delete_buyer_from_deal(current_user, deal_id, buyer_id):
     """Delete a buyer from a deal - Only admin users can delete buyers"""
     # Check if user has admin role
@@ -4208,6 +4911,7 @@ def delete_buyer_from_deal(current_user, deal_id, buyer_id):
 
 @app.route('/api/deals/<int:deal_id>/selling-amount', methods=['PUT'])
 @token_required
+@response_cache.invalidates('deals', 'deal:{deal_id}')
 def update_selling_amount(current_user, deal_id):
     """Update the selling amount for a specific deal"""
     try:
@@ -4265,6 +4969,7 @@ def update_selling_amount(current_user, deal_id):
             f"UPDATE deals SET {', '.join(update_fields)} WHERE id = %s",
             update_values
         )
+        refresh_deal_summary(connection, deal_id)
         connection.commit()
         
         return jsonify({
@@ -4290,11 +4995,15 @@ def update_selling_amount(current_user, deal_id):
 
 @app.route('/api/deals/<int:deal_id>/expenses', methods=['POST'])
 @token_required
+@response_cache.invalidates('deals', 'deal:{deal_id}')
 def add_expense(current_user, deal_id):
     try:
         data = request.get_json()
         
         connection = get_db_connection()
+        if not lock_deal(connection, deal_id):
+            connection.rollback()
+            return jsonify({'error': 'Deal not found'}), 404
         cursor = connection.cursor()
         
         cursor.execute("""
@@ -4311,6 +5020,7 @@ def add_expense(current_user, deal_id):
             data.get('receipt_number')
         ))
         
+        refresh_deal_summary(connection, deal_id)
         connection.commit()
         
         return jsonify({'message': 'Expense added successfully'})
@@ -4325,6 +5035,7 @@ def add_expense(current_user, deal_id):
 @app.route('/api/owners', methods=['GET'])
 @token_required
 @user_access_control
+@response_cache.cached('owners', 'deals')
 def get_all_owners(current_user):
     """Get owners with pagination, search, and sorting - filtered by user access level"""
     try:
@@ -4346,7 +5057,7 @@ def get_all_owners(current_user):
         # Calculate offset
         offset = (page - 1) * limit
         
-        connection = get_db_connection()
+        connection = get_read_db_connection()
         cursor = connection.cursor(dictionary=True)
         
         # Build base query based on user access level
@@ -4493,6 +5204,7 @@ def get_all_owners(current_user):
 
 @app.route('/api/owners/<int:owner_id>', methods=['GET'])
 @token_required
+@response_cache.cached('owners', 'deals')
 def get_owner_details(current_user, owner_id):
     """Get detailed owner information including all their projects"""
     try:
@@ -4534,13 +5246,6 @@ def get_owner_details(current_user, owner_id):
         """, (owner['name'], owner['mobile'], owner['mobile'], owner['email'], owner['email']))
         projects = cursor.fetchall()
         
-        # Convert datetime objects for projects
-        for item in projects:
-            if item:
-                for key, value in item.items():
-                    if isinstance(value, datetime):
-                        item[key] = value.isoformat()
-        
         return jsonify({
             'owner': owner,
             'projects': projects
@@ -4554,6 +5259,7 @@ def get_owner_details(current_user, owner_id):
 
 @app.route('/api/owners', methods=['POST'])
 @token_required
+@response_cache.invalidates('owners')
 def create_owner(current_user):
     """Create a new owner"""
     try:
@@ -4588,6 +5294,7 @@ def create_owner(current_user):
 
 @app.route('/api/owners/<int:owner_id>/star', methods=['POST'])
 @token_required
+@response_cache.invalidates('owners')
 def star_owner(current_user, owner_id):
     """Star/unstar an owner (Gmail-style)"""
     try:
@@ -4650,6 +5357,7 @@ def get_starred_owners(current_user):
 
 @app.route('/api/owners/<int:owner_id>', methods=['DELETE'])
 @token_required
+@response_cache.invalidates('owners')
 def delete_owner(current_user, owner_id):
     """Delete an owner - Only admin users can delete owners"""
     # Check if user has admin role
@@ -4678,6 +5386,7 @@ def delete_owner(current_user, owner_id):
 
 @app.route('/api/owners/<int:owner_id>/documents', methods=['POST'])
 @token_required
+@response_cache.invalidates('owners')
 def upload_owner_document(current_user, owner_id):
     """Upload document for an owner"""
     try:
@@ -4754,6 +5463,7 @@ def upload_owner_document(current_user, owner_id):
 
 @app.route('/api/owners/<int:owner_id>/documents', methods=['GET'])
 @token_required
+@response_cache.cached('owners', 'deals')
 def get_owner_documents(current_user, owner_id):
     """Get all documents for an owner"""
     try:
@@ -4802,7 +5512,7 @@ def get_owner_documents(current_user, owner_id):
                     'name': doc['document_name'],
                     'file_path': doc['file_path'],
                     'file_size': doc['file_size'],
-                    'created_at': doc['created_at'].isoformat() if doc['created_at'] else None,
+                    'created_at': doc['created_at'],
                     'uploaded_by': doc['uploaded_by']
                 })
             
@@ -4829,6 +5539,7 @@ def get_owner_documents(current_user, owner_id):
 @app.route('/api/investors', methods=['GET'])
 @token_required
 @user_access_control
+@response_cache.cached('investors', 'deals')
 def get_investors(current_user):
     """Get investors with pagination, search, and sorting - filtered by user access level"""
     connection = None
@@ -4851,7 +5562,7 @@ def get_investors(current_user):
         # Calculate offset
         offset = (page - 1) * limit
         
-        connection = get_db_connection()
+        connection = get_read_db_connection()
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
             
@@ -4978,7 +5689,7 @@ def get_investors(current_user):
                 'pan_card': investor['pan_card'],
                 'address': investor['address'],
                 'is_starred': bool(investor.get('is_starred', False)),
-                'created_at': investor['created_at'].isoformat() if investor['created_at'] else None
+                'created_at': investor['created_at']
             })
         
         # Calculate pagination info
@@ -5003,6 +5714,7 @@ def get_investors(current_user):
 
 @app.route('/api/investors/<int:investor_id>', methods=['GET'])
 @token_required
+@response_cache.cached('investors', 'deals')
 def get_investor_details(current_user, investor_id):
     """Get detailed investor information including all their projects"""
     try:
@@ -5051,13 +5763,6 @@ def get_investor_details(current_user, investor_id):
         """, (investor_id, investor_id, investor['investor_name'], investor['mobile'], investor['mobile'], investor['email'], investor['email']))
         projects = cursor.fetchall()
         
-        # Convert datetime objects for projects
-        for item in projects:
-            if item:
-                for key, value in item.items():
-                    if isinstance(value, datetime):
-                        item[key] = value.isoformat()
-        
         return jsonify({
             'investor': investor,
             'projects': projects
@@ -5069,8 +5774,51 @@ def get_investor_details(current_user, investor_id):
         if connection:
             connection.close()
 
+@app.route('/api/investors/<int:party_id>/statement', defaults={'party_type': 'investor', 'fmt': 'json'}, methods=['GET'])
+@app.route('/api/investors/<int:party_id>/statement.csv', defaults={'party_type': 'investor', 'fmt': 'csv'}, methods=['GET'])
+@app.route('/api/investors/<int:party_id>/statement.pdf', defaults={'party_type': 'investor', 'fmt': 'pdf'}, methods=['GET'])
+@app.route('/api/owners/<int:party_id>/statement', defaults={'party_type': 'owner', 'fmt': 'json'}, methods=['GET'])
+@app.route('/api/owners/<int:party_id>/statement.csv', defaults={'party_type': 'owner', 'fmt': 'csv'}, methods=['GET'])
+@app.route('/api/owners/<int:party_id>/statement.pdf', defaults={'party_type': 'owner', 'fmt': 'pdf'}, methods=['GET'])
+@token_required
+@user_access_control
+def party_statement(current_user, party_type, party_id, fmt):
+    """
+    Portfolio statement for one investor or owner: every deal they are on with committed, paid,
+    miscellaneous and balance amounts, plus totals. ?include_payments=true lists the
+    miscellaneous payments per deal (JSON only). Regular users can only fetch their own.
+    """
+    if fmt == 'pdf' and load_reportlab() is None:
+        return jsonify({'error': 'reportlab not available on server'}), 500
+    conn = None
+    try:
+        conn = get_read_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        include_payments = fmt == 'json' and request.args.get('include_payments', 'false').lower() == 'true'
+        statement = build_statement(cursor, party_type, party_id, include_payments)
+        if statement is None:
+            return jsonify({'error': f'{party_type.title()} not found'}), 404
+
+        access = request.user_access
+        if not access['can_access_all'] and access.get(f'{party_type}_id') not in [d['record_id'] for d in statement['deals']] + [party_id]:
+            return jsonify({'error': 'Access denied'}), 403
+
+        if fmt == 'csv':
+            return app.response_class(statement_csv(statement), mimetype='text/csv',
+                                      headers={"Content-Disposition": f"attachment; filename={party_type}_{party_id}_statement.csv"})
+        if fmt == 'pdf':
+            return send_file(statement_pdf(statement, load_reportlab()), mimetype='application/pdf', as_attachment=True,
+                             download_name=f'{party_type}_{party_id}_statement.pdf')
+        return jsonify(statement)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if conn:
+            conn.close()
+
 @app.route('/api/investors', methods=['POST'])
 @token_required
+@response_cache.invalidates('investors')
 def create_investor(current_user):
     """Create a new investor"""
     try:
@@ -5078,6 +5826,10 @@ def create_investor(current_user):
         print(f"DEBUG: Received data for investor creation: {data}")  # Debug log
         
         connection = get_db_connection()
+        # Deal row lock before the insert (see deal_summary.lock_deal)
+        if data.get('deal_id') and not lock_deal(connection, data['deal_id']):
+            connection.rollback()
+            return jsonify({'error': 'Deal not found'}), 404
         cursor = connection.cursor()
         
         # Helper function to convert empty strings to None
@@ -5101,6 +5853,8 @@ def create_investor(current_user):
         ))
         
         investor_id = cursor.lastrowid
+        if data.get('deal_id'):
+            refresh_deal_summary(connection, data['deal_id'])
         connection.commit()
         
         return jsonify({'message': 'Investor created successfully', 'investor_id': investor_id})
@@ -5116,6 +5870,7 @@ def create_investor(current_user):
 
 @app.route('/api/investors/<int:investor_id>', methods=['PUT'])
 @token_required
+@response_cache.invalidates('investors')
 def update_investor(current_user, investor_id):
     """Update an existing investor"""
     try:
@@ -5125,8 +5880,9 @@ def update_investor(current_user, investor_id):
         cursor = connection.cursor()
         
         # Check if investor exists
-        cursor.execute("SELECT id FROM investors WHERE id = %s", (investor_id,))
-        if not cursor.fetchone():
+        cursor.execute("SELECT id, deal_id FROM investors WHERE id = %s", (investor_id,))
+        existing = cursor.fetchone()
+        if not existing:
             return jsonify({'error': 'Investor not found'}), 404
         
         # Build update query dynamically
@@ -5150,10 +5906,15 @@ def update_investor(current_user, investor_id):
             if not cursor.fetchone():
                 return jsonify({'error': 'Deal not found'}), 404
         
+        # Deal row locks before the update (see deal_summary.lock_deal)
+        lock_deals(connection, [d for d in (existing[1], data.get('deal_id')) if d])
+        
         update_values.append(investor_id)
         query = f"UPDATE investors SET {', '.join(update_fields)} WHERE id = %s"
         
         cursor.execute(query, update_values)
+        # Both the old and (if moved) the new deal's totals change
+        refresh_deal_summaries(connection, [d for d in (existing[1], data.get('deal_id')) if d])
         connection.commit()
         
         return jsonify({'message': 'Investor updated successfully'})
@@ -5166,6 +5927,7 @@ def update_investor(current_user, investor_id):
 
 @app.route('/api/investors/<int:investor_id>', methods=['DELETE'])
 @token_required
+@response_cache.invalidates('investors')
 def delete_investor(current_user, investor_id):
     """Delete an investor - Only admin users can delete investors"""
     # Check if user has admin role
@@ -5177,12 +5939,18 @@ def delete_investor(current_user, investor_id):
         cursor = connection.cursor()
         
         # Check if investor exists
-        cursor.execute("SELECT id FROM investors WHERE id = %s", (investor_id,))
-        if not cursor.fetchone():
+        cursor.execute("SELECT id, deal_id FROM investors WHERE id = %s", (investor_id,))
+        existing = cursor.fetchone()
+        if not existing:
             return jsonify({'error': 'Investor not found'}), 404
         
+        if existing[1]:
+            lock_deal(connection, existing[1])
+        
         # Delete investor
         cursor.execute("DELETE FROM investors WHERE id = %s", (investor_id,))
+        if existing[1]:
+            refresh_deal_summary(connection, existing[1])
         connection.commit()
         
         return jsonify({'message': 'Investor deleted successfully'})
@@ -5195,6 +5963,7 @@ def delete_investor(current_user, investor_id):
 
 @app.route('/api/investors/<int:investor_id>/star', methods=['POST'])
 @token_required
+@response_cache.invalidates('investors')
 def star_investor(current_user, investor_id):
     """Star/unstar an investor (Gmail-style)"""
     try:
@@ -5257,6 +6026,7 @@ def get_starred_investors(current_user):
 
 @app.route('/api/investors/<int:investor_id>/documents', methods=['POST'])
 @token_required
+@response_cache.invalidates('investors')
 def upload_investor_document(current_user, investor_id):
     """Upload document for an investor"""
     try:
@@ -5333,6 +6103,7 @@ def upload_investor_document(current_user, investor_id):
 
 @app.route('/api/investors/<int:investor_id>/documents', methods=['GET'])
 @token_required
+@response_cache.cached('investors', 'deals')
 def get_investor_documents(current_user, investor_id):
     """Get all documents for an investor"""
     try:
@@ -5381,7 +6152,7 @@ def get_investor_documents(current_user, investor_id):
                     'name': doc['document_name'],
                     'file_path': doc['file_path'],
                     'file_size': doc['file_size'],
-                    'created_at': doc['created_at'].isoformat() if doc['created_at'] else None,
+                    'created_at': doc['created_at'],
                     'uploaded_by': doc['uploaded_by']
                 })
             
@@ -5407,6 +6178,7 @@ def get_investor_documents(current_user, investor_id):
 
 @app.route('/api/upload', methods=['POST'])
 @token_required
+@response_cache.invalidates('deal:{deal_id}')
 def upload_file(current_user):
     try:
         if 'file' not in request.files:
@@ -5492,6 +6264,7 @@ def serve_file(filename):
         file_name = os.path.basename(file_path)
         
         # Determine MIME type
+        import mimetypes
         mime_type, _ = mimetypes.guess_type(file_path)
         
         # Enhanced MIME type detection for common file types
@@ -5560,7 +6333,7 @@ def test():
 def get_status():
     """Get comprehensive application and database status"""
     try:
-        connection = get_db_connection()
+        connection = get_read_db_connection()
         if not connection:
             return jsonify({
                 'status': 'error',
@@ -5597,6 +6370,8 @@ def get_status():
                 'ssl_enabled': True
             },
             'tables': table_counts,
+            'replicas': replica_router.status(),
+            'capabilities': CAPABILITIES,
             'message': 'Application is running successfully with cloud database connection'
         })
         
@@ -5631,6 +6406,7 @@ def get_districts():
 @app.route('/api/test-districts/<state_name>', methods=['GET'])
 def test_districts_debug(state_name):
     """Debug endpoint to test district fetching for a specific state"""
+    import requests
     try:
         # Test postal API directly
         response = requests.get(f'https://api.postalpincode.in/postoffice/jaipur', timeout=5)
@@ -5820,9 +6596,11 @@ def admin_create_user(current_user):
 
     # hash password
     try:
-        hashed = generate_password_hash(password)
-    except Exception:
-        hashed = password
+        hashed = password_hasher.run(hash_password, password)
+    except PasswordHasherBusy:
+        response = jsonify({'error': 'Server busy, please retry'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
 
     conn = None
     try:
@@ -5851,6 +6629,7 @@ def admin_create_user(current_user):
 
 @app.route('/api/admin/users/<int:user_id>', methods=['PUT'])
 @token_required
+@response_cache.invalidates('deals', 'owners', 'investors', 'payments')
 def admin_update_user(current_user, user_id):
     try:
         if request.user.get('role') != 'admin':
@@ -5888,9 +6667,11 @@ def admin_update_user(current_user, user_id):
         params.append(investor_id if investor_id else None)
     if password is not None:
         try:
-            hashed = generate_password_hash(password)
-        except Exception:
-            hashed = password
+            hashed = password_hasher.run(hash_password, password)
+        except PasswordHasherBusy:
+            response = jsonify({'error': 'Server busy, please retry'})
+            response.headers['Retry-After'] = '1'
+            return response, 503
         updates.append('password = %s')
         params.append(hashed)
 
@@ -5906,6 +6687,7 @@ def admin_update_user(current_user, user_id):
         cur = conn.cursor()
         cur.execute(sql, tuple(params))
         conn.commit()
+        token_cache.invalidate_user(user_id)
         return jsonify({'message': 'user updated'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -5916,6 +6698,7 @@ def admin_update_user(current_user, user_id):
 
 @app.route('/api/admin/users/<int:user_id>', methods=['DELETE'])
 @token_required
+@response_cache.invalidates('deals', 'owners', 'investors', 'payments')
 def admin_delete_user(current_user, user_id):
     try:
         if request.user.get('role') != 'admin':
@@ -5929,6 +6712,7 @@ def admin_delete_user(current_user, user_id):
         cur = conn.cursor()
         cur.execute('DELETE FROM users WHERE id = %s', (user_id,))
         conn.commit()
+        token_cache.drop_user(user_id)
         return jsonify({'message': 'user deleted'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -5937,12 +6721,111 @@ def admin_delete_user(current_user, user_id):
             conn.close()
 
 
+@app.route('/api/admin/cache/stats', methods=['GET'])
+@token_required
+def admin_cache_stats(current_user):
+    """Per-tag response cache hit rates"""
+    if current_user.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    return jsonify({
+        'enabled': response_cache.enabled,
+        'backend': type(response_cache.backend).__name__,
+        'tags': response_cache.metrics()
+    })
+
+@app.route('/api/admin/token-cache/stats', methods=['GET'])
+@token_required
+def token_cache_stats(current_user):
+    """Verified-token cache size, hit rate and access-context hit rate"""
+    if current_user.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    return jsonify(token_cache.metrics())
+
+@app.route('/api/admin/password-hasher/stats', methods=['GET'])
+@token_required
+def password_hasher_stats(current_user):
+    """Password pool usage: accepted/rejected jobs and queue wait / run time"""
+    if current_user.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    return jsonify(password_hasher.metrics())
+
+@app.route('/api/admin/scheduler/run', methods=['POST'])
+@token_required
+def run_payment_scheduler(current_user):
+    """
+    Run the overdue sweep and reminder dispatch now instead of waiting for the next tick.
+    Pass {"dry_run": true} to only count what would change.
+    """
+    if current_user.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+
+    data = request.get_json(silent=True) or {}
+    dry_run = data.get('dry_run', False) not in (False, 'false', '0', 0)
+    try:
+        return jsonify(payment_scheduler.run_once(dry_run=dry_run))
+    except Exception as e:
+        return jsonify({'error': f'Scheduler run failed: {str(e)}'}), 500
+
+@app.route('/api/admin/scheduler/status', methods=['GET'])
+@token_required
+def payment_scheduler_status(current_user):
+    """Result of the last scheduler run in this process"""
+    if current_user.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    return jsonify({
+        'running': payment_scheduler._thread is not None,
+        'last_report': payment_scheduler.last_report
+    })
+
+@app.route('/api/admin/uploads/gc', methods=['POST'])
+@token_required
+def admin_upload_gc(current_user):
+    """
+    Start a background scan of the next slice of the uploads tree for files no longer
+    referenced by any table; answers 202 with the run's id and status (poll GET .../gc/<run_id>).
+    Dry run by default; pass {"dry_run": false} to move unreferenced files to quarantine.
+    Optional: max_files (per run), max_files_per_second, min_age_seconds (this run only).
+    If a run is already in progress its status is returned instead (200).
+    """
+    if current_user.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+
+    data = request.get_json(silent=True) or {}
+    try:
+        dry_run = data.get('dry_run', True) not in (False, 'false', '0', 0)
+        max_files = max(1, min(int(data.get('max_files', 1000)), 50000))
+        rate = data.get('max_files_per_second')
+        rate = float(rate) if rate else None
+        min_age = int(data.get('min_age_seconds', 3600))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid GC parameters'}), 400
+
+    gc = get_upload_gc(app.config['UPLOAD_FOLDER'], UPLOAD_QUARANTINE_FOLDER, get_db_connection)
+    entry, started = gc.start(dry_run=dry_run, max_files=max_files, max_files_per_second=rate, min_age_seconds=min_age)
+    return jsonify(entry), 202 if started else 200
+
+
+@app.route('/api/admin/uploads/gc', methods=['GET'])
+@app.route('/api/admin/uploads/gc/<run_id>', methods=['GET'])
+@token_required
+def admin_upload_gc_status(current_user, run_id=None):
+    """Status and report of a background upload GC run (the latest one without run_id)"""
+    if current_user.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    gc = get_upload_gc(app.config['UPLOAD_FOLDER'], UPLOAD_QUARANTINE_FOLDER, get_db_connection)
+    entry = gc.get_run(run_id)
+    if entry is None:
+        return jsonify({'error': 'GC run not found'}), 404
+    return jsonify(entry)
+
+
 # ============================================================================
 # STRUCTURED DOCUMENT MANAGEMENT ENDPOINTS
 # ============================================================================
 
 @app.route('/api/deals/<int:deal_id>/land-documents', methods=['POST'])
 @token_required
+@response_cache.invalidates('deal:{deal_id}')
 def upload_land_document(current_user, deal_id):
     """Upload land document with structured folder organization"""
     try:
@@ -6069,6 +6952,7 @@ def upload_land_document(current_user, deal_id):
 
 @app.route('/api/deals/<int:deal_id>/owners/<int:owner_id>/documents', methods=['POST'])
 @token_required
+@response_cache.invalidates('deal:{deal_id}', 'owners')
 def upload_owner_document_structured(current_user, deal_id, owner_id):
     """Upload owner document with structured folder organization"""
     try:
@@ -6171,6 +7055,7 @@ def upload_owner_document_structured(current_user, deal_id, owner_id):
 
 @app.route('/api/deals/<int:deal_id>/investors/<int:investor_id>/documents', methods=['POST'])
 @token_required
+@response_cache.invalidates('deal:{deal_id}', 'investors')
 def upload_investor_document_structured(current_user, deal_id, investor_id):
     """Upload investor document with structured folder organization"""
     try:
@@ -6273,6 +7158,7 @@ def upload_investor_document_structured(current_user, deal_id, investor_id):
 
 @app.route('/api/deals/<int:deal_id>/documents/structure', methods=['GET'])
 @token_required
+@response_cache.cached('deal:{deal_id}', 'owners', 'investors')
 def get_deal_documents_structured(current_user, deal_id):
     """Get all documents for a deal in structured format"""
     try:
@@ -6313,7 +7199,7 @@ def get_deal_documents_structured(current_user, deal_id):
                 'document_type': doc['document_type'],
                 'file_size': doc['file_size'],
                 'uploaded_by': doc['uploaded_by'],
-                'uploaded_at': doc['uploaded_at'].isoformat() if doc['uploaded_at'] else None,
+                'uploaded_at': doc['uploaded_at'],
                 'file_url': doc_manager.get_document_url(doc['file_path']) if doc['file_path'] else None
             }
             
@@ -6364,6 +7250,7 @@ def get_document_types(current_user):
 
 @app.route('/api/deals/<int:deal_id>/land-documents/<int:document_id>', methods=['DELETE'])
 @token_required
+@response_cache.invalidates('deal:{deal_id}')
 def delete_land_document(current_user, deal_id, document_id):
     """Delete a land document"""
     connection = None
@@ -6415,6 +7302,7 @@ def delete_land_document(current_user, deal_id, document_id):
 
 @app.route('/api/deals/<int:deal_id>/owners/<int:owner_id>/documents/<int:document_id>', methods=['DELETE'])
 @token_required
+@response_cache.invalidates('deal:{deal_id}', 'owners')
 def delete_owner_document(current_user, deal_id, owner_id, document_id):
     """Delete an owner document"""
     connection = None
@@ -6466,6 +7354,7 @@ def delete_owner_document(current_user, deal_id, owner_id, document_id):
 
 @app.route('/api/deals/<int:deal_id>/investors/<int:investor_id>/documents/<int:document_id>', methods=['DELETE'])
 @token_required
+@response_cache.invalidates('deal:{deal_id}', 'investors')
 def delete_investor_document(current_user, deal_id, investor_id, document_id):
     """Delete an investor document"""
     connection = None
@@ -6518,31 +7407,22 @@ def delete_investor_document(current_user, deal_id, investor_id, document_id):
 # ===== LAND SELLING FEATURES =====
 
 # Audit logging utility
-def log_activity(user_id, action, entity_type, entity_id, entity_name=None, changes=None, request_obj=None):
-    """Log user activity for audit trail"""
+def log_activity(user_id, action, entity_type, entity_id, entity_name=None, changes=None, request_obj=None, connection=None):
+    """
+    Log user activity for audit trail.
+    With `connection` the entry is written in the caller's transaction and committed with it;
+    errors then propagate so the caller's write rolls back too.
+    """
+    if connection is not None:
+        _insert_activity(connection.cursor(), user_id, action, entity_type, entity_id, entity_name, changes, request_obj)
+        return True
     conn = None
     try:
         conn = get_db_connection()
         if not conn:
             return False
             
-        cursor = conn.cursor()
-        
-        # Get IP address and user agent from request
-        ip_address = None
-        user_agent = None
-        if request_obj:
-            ip_address = request_obj.remote_addr
-            user_agent = request_obj.headers.get('User-Agent')
-        
-        # Convert changes to JSON string
-        changes_json = json.dumps(changes) if changes else None
-        
-        cursor.execute("""
-            INSERT INTO activity_logs (user_id, action, entity_type, entity_id, entity_name, changes, ip_address, user_agent)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (user_id, action, entity_type, entity_id, entity_name, changes_json, ip_address, user_agent))
-        
+        _insert_activity(conn.cursor(), user_id, action, entity_type, entity_id, entity_name, changes, request_obj)
         conn.commit()
         return True
         
@@ -6553,6 +7433,22 @@ def log_activity(user_id, action, entity_type, entity_id, entity_name=None, chan
         if conn:
             conn.close()
 
+def _insert_activity(cursor, user_id, action, entity_type, entity_id, entity_name, changes, request_obj):
+    # Get IP address and user agent from request
+    ip_address = None
+    user_agent = None
+    if request_obj:
+        ip_address = request_obj.remote_addr
+        user_agent = request_obj.headers.get('User-Agent')
+    
+    # Convert changes to JSON string
+    changes_json = json.dumps(changes) if changes else None
+    
+    cursor.execute("""
+        INSERT INTO activity_logs (user_id, action, entity_type, entity_id, entity_name, changes, ip_address, user_agent)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, (user_id, action, entity_type, entity_id, entity_name, changes_json, ip_address, user_agent))
+
 @app.route('/api/test/add-selling-columns', methods=['POST'])
 def add_selling_columns():
     """Add missing selling columns to deals table"""
@@ -6623,10 +7519,10 @@ def test_selling_data():
                 'location': deal.get('location'),
                 'status': deal.get('status'),
                 'asking_price': float(deal.get('asking_price')) if deal.get('asking_price') else None,
-                'listing_date': deal.get('listing_date').isoformat() if deal.get('listing_date') else None,
-                'sold_date': deal.get('sold_date').isoformat() if deal.get('sold_date') else None,
+                'listing_date': deal.get('listing_date'),
+                'sold_date': deal.get('sold_date'),
                 'offer_count': 0,  # Default to 0 for now
-                'created_at': deal.get('created_at').isoformat() if deal.get('created_at') else None
+                'created_at': deal.get('created_at')
             }
             formatted_deals.append(deal_data)
         
@@ -6768,14 +7664,6 @@ def get_deal_offers(current_user, deal_id):
         
         offers = cursor.fetchall() or []
         
-        # Convert dates to ISO format
-        for offer in offers:
-            for date_field in ['offer_date', 'valid_until', 'created_at', 'updated_at']:
-                if offer.get(date_field) and isinstance(offer[date_field], datetime):
-                    offer[date_field] = offer[date_field].isoformat()
-                elif offer.get(date_field):
-                    offer[date_field] = str(offer[date_field])
-        
         return jsonify(offers)
         
     except mysql.connector.Error as e:
@@ -6786,6 +7674,7 @@ def get_deal_offers(current_user, deal_id):
 
 @app.route('/api/deals/<int:deal_id>/offers', methods=['POST'])
 @token_required
+@response_cache.invalidates('deal:{deal_id}')
 def create_offer(current_user, deal_id):
     """Create a new offer for a deal"""
     data = request.get_json() or {}
@@ -6880,6 +7769,8 @@ def update_offer_status(current_user, offer_id):
         # Update offer status
         cursor.execute("UPDATE offers SET status = %s WHERE id = %s", (new_status, offer_id))
         conn.commit()
+        # The route has no deal_id for @response_cache.invalidates to format
+        response_cache.invalidate(f"deal:{offer['deal_id']}")
         
         # Log the activity
         log_activity(
@@ -6902,6 +7793,7 @@ def update_offer_status(current_user, offer_id):
 
 @app.route('/api/deals/<int:deal_id>/location', methods=['PUT'])
 @token_required
+@response_cache.invalidates('deals', 'deal:{deal_id}')
 def update_deal_location(current_user, deal_id):
     """Update deal geolocation"""
     data = request.get_json() or {}
@@ -6988,9 +7880,6 @@ def get_deal_logs(current_user, deal_id):
         
         # Process logs for display
         for log in logs:
-            if log.get('timestamp') and isinstance(log['timestamp'], datetime):
-                log['timestamp'] = log['timestamp'].isoformat()
-            
             # Parse changes JSON
             if log.get('changes'):
                 try:
@@ -7032,18 +7921,6 @@ def get_payment_reminders(current_user, deal_id):
         
         reminders = cursor.fetchall() or []
         
-        # Convert dates to ISO format
-        for reminder in reminders:
-            for date_field in ['reminder_date', 'sent_at', 'created_at', 'payment_date']:
-                if reminder.get(date_field) and isinstance(reminder[date_field], datetime):
-                    reminder[date_field] = reminder[date_field].isoformat()
-                elif reminder.get(date_field):
-                    reminder[date_field] = str(reminder[date_field])
-            
-            # Convert payment amount to float
-            if reminder.get('payment_amount'):
-                reminder['payment_amount'] = float(reminder['payment_amount'])
-        
         return jsonify(reminders), 200
         
     except mysql.connector.Error as e:
@@ -7054,6 +7931,7 @@ def get_payment_reminders(current_user, deal_id):
 
 @app.route('/api/deals/<int:deal_id>/payment-reminders', methods=['POST'])
 @token_required
+@response_cache.invalidates('deal:{deal_id}')
 def create_payment_reminder(current_user, deal_id):
     conn = None
     try:
@@ -7121,13 +7999,14 @@ def update_payment_reminder_status(current_user, reminder_id):
         cursor = conn.cursor()
         
         # Get current reminder for logging
-        cursor.execute("SELECT status, description FROM payment_reminders WHERE id = %s", (reminder_id,))
+        cursor.execute("SELECT status, description, deal_id FROM payment_reminders WHERE id = %s", (reminder_id,))
         current_reminder = cursor.fetchone()
         if not current_reminder:
             return jsonify({'error': 'Payment reminder not found'}), 404
             
         old_status = current_reminder[0]
         description = current_reminder[1]
+        deal_id = current_reminder[2]
         
         cursor.execute("""
             UPDATE payment_reminders 
@@ -7137,6 +8016,8 @@ def update_payment_reminder_status(current_user, reminder_id):
         
         conn.commit()
         cursor.close()
+        # The route has no deal_id for @response_cache.invalidates to format
+        response_cache.invalidate(f"deal:{deal_id}")
         
         # Log the activity
         log_activity(
@@ -7170,16 +8051,19 @@ def delete_payment_reminder(current_user, reminder_id):
         cursor = conn.cursor()
         
         # Get reminder details for logging
-        cursor.execute("SELECT description FROM payment_reminders WHERE id = %s", (reminder_id,))
+        cursor.execute("SELECT description, deal_id FROM payment_reminders WHERE id = %s", (reminder_id,))
         reminder = cursor.fetchone()
         if not reminder:
             return jsonify({'error': 'Payment reminder not found'}), 404
             
         description = reminder[0]
+        deal_id = reminder[1]
         
         cursor.execute("DELETE FROM payment_reminders WHERE id = %s", (reminder_id,))
         conn.commit()
         cursor.close()
+        # The route has no deal_id for @response_cache.invalidates to format
+        response_cache.invalidate(f"deal:{deal_id}")
         
         # Log the activity
         log_activity(
@@ -7203,72 +8087,34 @@ def delete_payment_reminder(current_user, reminder_id):
 
 @app.route('/api/deals/<int:deal_id>/owners/percentage-shares', methods=['PUT'])
 @token_required
+@response_cache.invalidates('deals', 'deal:{deal_id}', 'owners', 'investors')
 def update_owner_percentage_shares(current_user, deal_id):
     """Update percentage shares for owners of a deal"""
+    conn = None
     try:
-        data = request.get_json()
-        owner_shares = data.get('owner_shares', [])
-        
-        # Validate that owner_shares is a list
-        if not isinstance(owner_shares, list):
-            return jsonify({'error': 'owner_shares must be a list'}), 400
-        
-        # Validate total percentage equals 100%
-        total_percentage = sum(float(share.get('percentage_share', 0)) for share in owner_shares)
-        if abs(total_percentage - 100.0) > 0.01:  # Allow small floating point differences
-            return jsonify({'error': f'Total percentage must equal 100%. Current total: {total_percentage}%'}), 400
-        
-        # Validate each owner share
-        for share in owner_shares:
-            if 'owner_id' not in share or 'percentage_share' not in share:
-                return jsonify({'error': 'Each owner share must have owner_id and percentage_share'}), 400
-            
-            try:
-                percentage = float(share['percentage_share'])
-                if percentage < 0 or percentage > 100:
-                    return jsonify({'error': 'Percentage share must be between 0 and 100'}), 400
-            except (ValueError, TypeError):
-                return jsonify({'error': 'Invalid percentage_share value'}), 400
-        
-        # Get database connection
+        data = request.get_json() or {}
+        shares = parse_shares(data.get('owner_shares', []), 'owner_id',
+                              {'percentage_share': ('percentage_share', float)})
+
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Check if deal exists and user has permission
-        cursor.execute("SELECT id FROM deals WHERE id = %s", (deal_id,))
-        deal = cursor.fetchone()
-        if not deal:
-            return jsonify({'error': 'Deal not found'}), 404
-        
-        # Update each owner's percentage share
-        for share in owner_shares:
-            owner_id = share['owner_id']
-            percentage_share = float(share['percentage_share'])
-            
-            # Verify owner belongs to this deal
-            cursor.execute("SELECT id FROM owners WHERE id = %s AND deal_id = %s", (owner_id, deal_id))
-            owner = cursor.fetchone()
-            if not owner:
-                return jsonify({'error': f'Owner {owner_id} not found for deal {deal_id}'}), 400
-            
-            # Update the percentage share
-            cursor.execute(
-                "UPDATE owners SET percentage_share = %s WHERE id = %s AND deal_id = %s",
-                (percentage_share, owner_id, deal_id)
-            )
-        
+        # Validation read and one batched UPDATE in a single transaction
+        result = apply_shares(conn, 'owner', deal_id, shares, 'percentage_share')
         conn.commit()
-        
-        # Return updated owners data
-        cursor.execute("SELECT * FROM owners WHERE deal_id = %s ORDER BY id", (deal_id,))
-        updated_owners = cursor.fetchall()
-        
+
         return jsonify({
             'message': 'Owner percentage shares updated successfully',
-            'owners': updated_owners
+            'owners': result['rows'],
+            'purchase_amount': result['purchase_amount'],
+            'total_percentage': result['total_percentage']
         }), 200
-        
+
+    except ShareUpdateError as e:
+        if conn:
+            conn.rollback()
+        return jsonify({'error': e.message}), e.status
     except Exception as e:
+        if conn:
+            conn.rollback()
         print(f"Error updating owner percentage shares: {e}")
         return jsonify({'error': 'Failed to update owner percentage shares'}), 500
     finally:
@@ -7339,15 +8185,75 @@ def test_investors_simple(deal_id):
         if conn:
             conn.close()
 
+# Normalized match keys for investors. ensure_deals_schema adds them as indexed generated
+# columns; the expressions are used inline when the columns are not there yet.
+INVESTOR_KEY_EXPRESSIONS = {
+    'name_key': "LEFT(LOWER(TRIM(COALESCE({t}.investor_name, ''))), 255)",
+    'mobile_key': "LEFT(TRIM(COALESCE({t}.mobile, '')), 50)",
+    'email_key': "LEFT(LOWER(TRIM(COALESCE({t}.email, ''))), 255)",
+}
+
+def available_investors_query(use_key_columns, with_prefix):
+    """
+    Build the anti-join for /api/investors/available: top-level investors of other deals,
+    minus anyone matching the deal's investors by name, mobile or email, one row per
+    (name, mobile, email) identity (the lowest id wins), ordered by name.
+    """
+    def key(name, t):
+        return f"{t}.{name}" if use_key_columns else INVESTOR_KEY_EXPRESSIONS[name].format(t=t)
+
+    prefix_filter = f"AND {key('name_key', 'i1')} LIKE %(prefix)s" if with_prefix else ""
+    return f"""
+        SELECT i1.id, i1.investor_name, i1.mobile, i1.email,
+               i1.aadhar_card, i1.pan_card, i1.address, i1.bank_name,
+               i1.account_number, i1.created_at
+        FROM investors i1
+        WHERE i1.deal_id != %(deal_id)s
+        AND i1.parent_investor_id IS NULL
+        AND {key('name_key', 'i1')} != ''
+        {prefix_filter}
+        AND NOT EXISTS (
+            SELECT 1 FROM investors c
+            WHERE c.deal_id = %(deal_id)s AND {key('name_key', 'c')} = {key('name_key', 'i1')}
+        )
+        AND ({key('mobile_key', 'i1')} = '' OR NOT EXISTS (
+            SELECT 1 FROM investors c
+            WHERE c.deal_id = %(deal_id)s AND {key('mobile_key', 'c')} = {key('mobile_key', 'i1')}
+        ))
+        AND ({key('email_key', 'i1')} = '' OR NOT EXISTS (
+            SELECT 1 FROM investors c
+            WHERE c.deal_id = %(deal_id)s AND {key('email_key', 'c')} = {key('email_key', 'i1')}
+        ))
+        AND NOT EXISTS (
+            SELECT 1 FROM investors d
+            WHERE {key('name_key', 'd')} = {key('name_key', 'i1')}
+            AND {key('mobile_key', 'd')} = {key('mobile_key', 'i1')}
+            AND {key('email_key', 'd')} = {key('email_key', 'i1')}
+            AND d.id < i1.id
+            AND d.deal_id != %(deal_id)s
+            AND d.parent_investor_id IS NULL
+        )
+        ORDER BY {key('name_key', 'i1')}, i1.id
+        LIMIT %(limit)s
+    """
+
 @app.route('/api/investors/available/<int:deal_id>', methods=['GET'])
 @token_required
 def get_available_investors(current_user, deal_id):
-    """Get investors that are not already part of the specified deal"""
+    """
+    Get investors that are not already part of the specified deal.
+    Optional query params: q (case-insensitive name prefix, for typeahead) and limit (default 100, max 1000).
+    """
+    conn = None
+    try:
+        limit = max(1, min(int(request.args.get('limit', 100)), 1000))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'limit must be an integer'}), 400
+    prefix = (request.args.get('q') or '').strip().lower()
+
     try:
-        print(f"DEBUG: Getting available investors for deal {deal_id}")
         conn = get_db_connection()
         if not conn:
-            print("DEBUG: Failed to get database connection")
             return jsonify({'error': 'Database connection failed'}), 500
             
         cursor = conn.cursor(dictionary=True)
@@ -7355,97 +8261,27 @@ def get_available_investors(current_user, deal_id):
         # Check if deal exists
         cursor.execute("SELECT id FROM deals WHERE id = %s", (deal_id,))
         if not cursor.fetchone():
-            print(f"DEBUG: Deal {deal_id} not found")
             return jsonify({'error': 'Deal not found'}), 404
         
-        print(f"DEBUG: Deal {deal_id} found, getting available investors")
-        # Get all investors from other deals (simplified approach)
-        query = """
-            SELECT DISTINCT i1.id, i1.investor_name, i1.mobile, i1.email, 
-                   i1.aadhar_card, i1.pan_card, i1.address, i1.bank_name, 
-                   i1.account_number, i1.created_at
-            FROM investors i1
-            WHERE i1.deal_id != %s 
-            AND i1.investor_name IS NOT NULL
-            AND i1.investor_name != ''
-            AND i1.parent_investor_id IS NULL
-            ORDER BY i1.investor_name
-        """
-        
-        print(f"DEBUG: Executing simplified query with deal_id={deal_id}")
-        cursor.execute(query, (deal_id,))
-        available_investors = cursor.fetchall()
-        print(f"DEBUG: Found {len(available_investors)} available investors")
-        
-        # Filter out duplicates based on name and contact info on the backend
-        seen_investors = set()
-        unique_investors = []
-        
-        # Get current deal investors for comparison
-        cursor.execute("SELECT investor_name, mobile, email FROM investors WHERE deal_id = %s", (deal_id,))
-        current_investors = cursor.fetchall()
-        current_names = set()
-        current_contacts = set()
-        
-        for current in current_investors:
-            if current['investor_name']:
-                current_names.add(current['investor_name'].lower().strip())
-            if current['mobile']:
-                current_contacts.add(current['mobile'].strip())
-            if current['email']:
-                current_contacts.add(current['email'].lower().strip())
-        
-        print(f"DEBUG: Current deal has {len(current_names)} investor names and {len(current_contacts)} contacts")
-        
-        for investor in available_investors:
-            name = investor['investor_name']
-            if not name:
-                continue
-                
-            name_key = name.lower().strip()
-            mobile = investor['mobile'] or ''
-            email = investor['email'] or ''
-            
-            # Skip if already in current deal
-            if name_key in current_names:
-                continue
-            if mobile.strip() in current_contacts:
-                continue
-            if email.lower().strip() in current_contacts:
-                continue
-                
-            # Skip if we've already seen this investor
-            investor_key = (name_key, mobile.strip(), email.lower().strip())
-            if investor_key in seen_investors:
-                continue
-                
-            seen_investors.add(investor_key)
-            unique_investors.append(investor)
-        
-        print(f"DEBUG: After filtering, found {len(unique_investors)} unique available investors")
+        params = {'deal_id': deal_id, 'limit': limit}
+        if prefix:
+            # Escape LIKE wildcards so the search is a literal prefix match
+            params['prefix'] = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
         
-        # Format the data
-        formatted_investors = []
-        for investor in unique_investors:
-            formatted_investors.append({
-                'id': investor['id'],
-                'investor_name': investor['investor_name'],
-                'mobile': investor['mobile'],
-                'email': investor['email'],
-                'aadhar_card': investor['aadhar_card'],
-                'pan_card': investor['pan_card'],
-                'address': investor['address'],
-                'bank_name': investor['bank_name'],
-                'account_number': investor['account_number'],
-                'created_at': investor['created_at'].isoformat() if investor['created_at'] else None
-            })
+        try:
+            cursor.execute(available_investors_query(True, bool(prefix)), params)
+        except mysql.connector.Error as e:
+            if getattr(e, 'errno', None) != ER_BAD_FIELD_ERROR:
+                raise
+            # Key columns not added yet on this database; compute the keys inline
+            cursor.execute(available_investors_query(False, bool(prefix)), params)
         
-        print(f"DEBUG: Returning {len(formatted_investors)} formatted investors")
-        return jsonify(formatted_investors), 200
+        response = stream_json_rows(conn, cursor)
+        conn = None  # closed by the stream
+        return response, 200
         
     except Exception as e:
         print(f"ERROR getting available investors: {e}")
-        print(f"ERROR type: {type(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': 'Failed to get available investors'}), 500
@@ -7574,9 +8410,9 @@ def get_investor_direct(investor_id):
                         'project_name': row['project_name'],
                         'location': row['location'],
                         'status': row['status'],
-                        'total_area': float(row['total_area']) if row['total_area'] else 0,
-                        'asking_price': float(row['asking_price']) if row['asking_price'] else 0,
-                        'investment_amount': float(row['investment_amount']) if row['investment_amount'] else 0
+                        'total_area': row['total_area'] or 0,
+                        'asking_price': row['asking_price'] or 0,
+                        'investment_amount': row['investment_amount'] or 0
                     }
                     deals.append(deal)
             
@@ -7597,6 +8433,17 @@ def get_investor_direct(investor_id):
         if conn:
             conn.close()
 
+# Overdue sweep and reminder dispatch. Every worker may start the thread; the MySQL lock
+# makes sure only one of them runs the jobs per tick. For cron use `python scheduler.py` instead;
+# it invalidates the web workers' cached responses only with a shared CACHE_BACKEND_URL (Redis).
+payment_scheduler = get_payment_scheduler(
+    get_db_connection,
+    create_notifier(os.environ.get('REMINDER_NOTIFIER_URL')),
+    on_change=lambda: response_cache.invalidate('payments')
+)
+if os.environ.get('SCHEDULER_ENABLED', 'false').lower() in ('1', 'true', 'yes'):
+    payment_scheduler.start(int(os.environ.get('SCHEDULER_INTERVAL_SECONDS', 300)))
+
 # ============================================================================
 
 def initialize_database():
@@ -7605,6 +8452,13 @@ def initialize_database():
         ensure_users_schema()
         ensure_deals_schema()
         ensure_payment_schema()
+        conn = get_db_connection()
+        if conn:
+            try:
+                ensure_deal_summary_schema(conn)
+                ensure_cashflow_schema(conn)
+            finally:
+                conn.close()
     except Exception as e:
         print(f"[WARNING] Database initialization failed: {e}")
 
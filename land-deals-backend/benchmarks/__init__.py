@@ -0,0 +1,15 @@
+"""
+Reproducible performance benchmarks for the land-deals backend.
+
+    python -m benchmarks generate --scale 10k --reset   # load a synthetic dataset into DB_NAME
+    python -m benchmarks run --output results.json       # drive the endpoints through the test client
+    python -m benchmarks compare baseline.json results.json
+    python -m benchmarks seed-users                      # loadtest_<role>_<n> accounts
+    python -m benchmarks loadtest --rps 50 --duration 120  # mixed traffic against a running server
+    python -m benchmarks startup                         # import-time cost per module on cold start
+    python -m benchmarks indexes --apply --revert        # EXPLAIN the hot queries, before/after index timings
+
+Point DB_* at a local, disposable MySQL/MariaDB database: `generate --reset` truncates tables.
+generate and indexes --apply refuse to run unless DB_NAME equals BENCH_DB_NAME or ends in `_bench`; to use another
+disposable database, repeat its name with --confirm-destroy <DB_NAME>.
+"""
@@ -0,0 +1,201 @@
+import os
+import sys
+import argparse
+
+from benchmarks import datagen, runner, loadtest, startup, index_advisor
+
+
+def _load_app():
+    # Cached responses would turn every iteration after the first into a cache hit
+    os.environ.setdefault('CACHE_ENABLED', 'false')
+    os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+    import app as app_module
+    return app_module
+
+
+def cmd_generate(args):
+    app_module = _load_app()
+    payments = datagen.SCALES.get(args.scale)
+    if payments is None:
+        try:
+            payments = int(args.scale)
+        except ValueError:
+            sys.exit(f"Unknown scale {args.scale!r}; use one of {', '.join(datagen.SCALES)} or a number")
+
+    connection = app_module.get_db_connection()
+    if connection is None:
+        sys.exit('Database connection failed; check DB_HOST/DB_USER/DB_PASSWORD/DB_NAME')
+    try:
+        # generate inserts fixed ids, so even without --reset it only belongs in a bench database
+        datagen.require_bench_database(connection, args.confirm_destroy)
+        datagen.load_schema(connection)
+        if args.reset:
+            datagen.reset(connection, args.confirm_destroy)
+        print(f"Generating {payments} payments (seed {args.seed}) into {app_module.DB_CONFIG['database']}")
+        counts = datagen.DatasetGenerator(payments, seed=args.seed, batch_size=args.batch_size).generate(connection)
+    except datagen.UnsafeDatabaseError as e:
+        sys.exit(str(e))
+    finally:
+        connection.close()
+
+    # Indexes and generated columns the app would add on startup
+    app_module.ensure_deals_schema()
+    app_module.ensure_payment_schema()
+    print(counts)
+
+
+def cmd_run(args):
+    app_module = _load_app()
+    only = set(args.only.split(',')) if args.only else None
+    print(f"Running scenarios ({args.iterations} iterations, {args.warmup} warmup)")
+    report = runner.run(app_module.app, app_module.get_db_connection,
+                        iterations=args.iterations, warmup=args.warmup, only=only)
+    report['scale'] = args.label
+    runner.write_report(report, args.output)
+    print(f"Wrote {args.output} (peak RSS {report['peak_rss_mb']} MB)")
+
+
+def cmd_compare(args):
+    rows, regressions = runner.compare(runner.load_report(args.baseline), runner.load_report(args.current),
+                                       threshold=args.threshold)
+    for row in rows:
+        if row['metric'] is None:
+            print(f"{row['scenario']:28s} {row['note']}")
+            continue
+        flag = '  REGRESSION' if row in regressions else ''
+        print(f"{row['scenario']:28s} {row['metric']:20s} {row['baseline']:>12} -> {row['current']:>12} "
+              f"({row['change'] * 100:+.1f}%){flag}")
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold * 100:.0f}%")
+        sys.exit(1)
+    print('\nNo regressions')
+
+
+def cmd_seed_users(args):
+    app_module = _load_app()
+    counts = dict(loadtest.ROLE_COUNTS, **{role: n for role, n in (('admin', args.admins), ('auditor', args.auditors),
+                                                                  ('user', args.users)) if n is not None})
+    users = loadtest.seed_users(app_module.get_db_connection, counts, args.password)
+    print(f"Seeded {len(users)} load test users (password {args.password!r})")
+
+
+def cmd_loadtest(args):
+    # Works against any running instance, so the app itself is not imported here
+    counts = dict(loadtest.ROLE_COUNTS, **{role: n for role, n in (('admin', args.admins), ('auditor', args.auditors),
+                                                                  ('user', args.users)) if n is not None})
+    users = [loadtest.VirtualUser(args.base_url, f"loadtest_{role}_{n}", role)
+             for role, count in counts.items() for n in range(1, count + 1)]
+    test = loadtest.LoadTest(args.base_url, users, rps=args.rps, duration=args.duration,
+                             max_in_flight=args.max_in_flight, timeout=args.timeout, seed=args.seed)
+    test.login_all(args.password)
+    test.discover_deals()
+    report = test.run()
+    loadtest.print_report(report)
+    if args.output:
+        loadtest.write_report(report, args.output)
+        print(f"Wrote {args.output}")
+
+
+def cmd_startup(args):
+    wall, modules = startup.profile_import(args.module)
+    startup.print_profile(wall, modules, limit=args.limit)
+
+
+def cmd_indexes(args):
+    app_module = _load_app()
+    connection = app_module.get_db_connection()
+    if connection is None:
+        sys.exit('Database connection failed; check DB_HOST/DB_USER/DB_PASSWORD/DB_NAME')
+    try:
+        if args.apply:
+            # ALTER TABLE on the app's tables: same guard as generate --reset
+            datagen.require_bench_database(connection, args.confirm_destroy)
+        context = index_advisor.load_context(connection, runner.load_context(app_module.get_db_connection))
+        report = index_advisor.run(connection, context, apply=args.apply, revert=args.revert, iterations=args.iterations)
+    except datagen.UnsafeDatabaseError as e:
+        sys.exit(str(e))
+    finally:
+        connection.close()
+    index_advisor.print_report(report)
+
+    if args.output:
+        runner.write_report(report, args.output)
+        print(f"Wrote {args.output}")
+    if args.migration:
+        candidates = index_advisor.CANDIDATE_INDEXES if args.all else [
+            (r['table'], r['index'], tuple(r['columns']), r['reason']) for r in report['recommended']]
+        with open(args.migration, 'w') as f:
+            f.write(index_advisor.migration_sql(candidates, os.path.basename(args.migration)))
+        print(f"Wrote {args.migration} ({len(candidates)} indexes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Land deals backend benchmarks')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('generate', help='load a deterministic synthetic dataset')
+    p.add_argument('--scale', default='1k', help=f"{', '.join(datagen.SCALES)} or a number of payments")
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--batch-size', type=int, default=1000, help='rows per INSERT batch')
+    p.add_argument('--reset', action='store_true', help='truncate the benchmark tables first')
+    p.add_argument('--confirm-destroy', metavar='DB_NAME',
+                   help=f"allow a database not named by BENCH_DB_NAME or ending in {datagen.BENCH_DB_SUFFIX}")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser('run', help='run the endpoint scenarios and write a JSON report')
+    p.add_argument('--iterations', type=int, default=20)
+    p.add_argument('--warmup', type=int, default=2)
+    p.add_argument('--only', help='comma-separated scenario names')
+    p.add_argument('--label', help='free-form label stored in the report, e.g. the scale')
+    p.add_argument('--output', default='benchmark-results.json')
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser('compare', help='compare a report against a stored baseline')
+    p.add_argument('baseline')
+    p.add_argument('current')
+    p.add_argument('--threshold', type=float, default=0.15, help='allowed growth before a metric counts as a regression')
+    p.set_defaults(func=cmd_compare)
+
+    p = sub.add_parser('seed-users', help='create loadtest_<role>_<n> accounts for the load test')
+    p.add_argument('--admins', type=int)
+    p.add_argument('--auditors', type=int)
+    p.add_argument('--users', type=int)
+    p.add_argument('--password', default=loadtest.LOADTEST_PASSWORD)
+    p.set_defaults(func=cmd_seed_users)
+
+    p = sub.add_parser('loadtest', help='replay the weighted route mix against a running server')
+    p.add_argument('--base-url', default='http://localhost:5000')
+    p.add_argument('--rps', type=float, default=20, help='target requests per second')
+    p.add_argument('--duration', type=float, default=60, help='seconds to run')
+    p.add_argument('--max-in-flight', type=int, default=64, help='concurrent requests before the schedule slips')
+    p.add_argument('--timeout', type=float, default=30)
+    p.add_argument('--admins', type=int)
+    p.add_argument('--auditors', type=int)
+    p.add_argument('--users', type=int)
+    p.add_argument('--password', default=loadtest.LOADTEST_PASSWORD)
+    p.add_argument('--seed', type=int, default=None, help='seed the route/user choice for repeatable runs')
+    p.add_argument('--output', help='also write the report as JSON')
+    p.set_defaults(func=cmd_loadtest)
+
+    p = sub.add_parser('startup', help='report import-time cost per module for a cold start')
+    p.add_argument('--module', default='app')
+    p.add_argument('--limit', type=int, default=25)
+    p.set_defaults(func=cmd_startup)
+
+    p = sub.add_parser('indexes', help='EXPLAIN the hot query catalog and recommend indexes')
+    p.add_argument('--iterations', type=int, default=10, help='timed runs per query (median is reported)')
+    p.add_argument('--apply', action='store_true', help='add the recommended indexes and measure again')
+    p.add_argument('--revert', action='store_true', help='with --apply, drop the added indexes afterwards')
+    p.add_argument('--confirm-destroy', metavar='DB_NAME',
+                   help=f"allow --apply on a database not named by BENCH_DB_NAME or ending in {datagen.BENCH_DB_SUFFIX}")
+    p.add_argument('--migration', help='write an idempotent SQL migration for the recommended indexes')
+    p.add_argument('--all', action='store_true', help='with --migration, include every candidate index')
+    p.add_argument('--output', help='also write the report as JSON')
+    p.set_defaults(func=cmd_indexes)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+import os
+import random
+import time
+from datetime import date, timedelta
+
+# Named dataset sizes (number of payments); every other table is scaled from it
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000}
+
+# Child tables first so a reset never trips over foreign keys
+TABLES = ['activity_logs', 'documents', 'payment_proofs', 'payment_parties', 'payments',
+          'buyers', 'investors', 'owners', 'deals', 'users']
+
+BENCH_USERNAME = 'bench_admin'
+
+# Destructive commands only run against a database named by BENCH_DB_NAME or ending in this
+# suffix, unless the caller confirms the database name explicitly
+BENCH_DB_SUFFIX = '_bench'
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'schema.sql')
+
+_FIRST_NAMES = ['Aarav', 'Vihaan', 'Ishaan', 'Ananya', 'Diya', 'Kavya', 'Rohan', 'Priya', 'Sanjay', 'Meera',
+                'Rahul', 'Sneha', 'Vikram', 'Pooja', 'Arjun', 'Neha', 'Suresh', 'Lakshmi', 'Manoj', 'Asha']
+_LAST_NAMES = ['Patil', 'Sharma', 'Deshmukh', 'Kulkarni', 'Joshi', 'Pawar', 'Shinde', 'Jadhav', 'More', 'Gaikwad']
+_TALUKAS = ['Haveli', 'Mulshi', 'Maval', 'Khed', 'Baramati', 'Shirur', 'Daund', 'Bhor', 'Purandar', 'Indapur']
+_VILLAGES = ['Wagholi', 'Lonikand', 'Hinjewadi', 'Marunji', 'Talegaon', 'Chakan', 'Uruli', 'Saswad', 'Nasrapur', 'Pirangut']
+_MODES = ['cash', 'UPI', 'NEFT', 'RTGS', 'cheque', 'bank_transfer']
+_PAYMENT_TYPES = ['land_purchase', 'advance', 'investment', 'registration_fees', 'documentation_legal', 'broker']
+_STATUSES = ['completed'] * 6 + ['pending'] * 3 + ['overdue']
+_DEAL_STATUSES = ['open', 'open', 'open', 'closed', 'commission', 'sold']
+_DOC_TYPES = ['extract', 'index_2', 'mutation', 'agreement', 'map']
+
+
+def dataset_shape(payments):
+    """Row counts per table for a dataset with `payments` payments"""
+    deals = max(10, payments // 50)
+    return {
+        'deals': deals,
+        'owners': deals * 3,
+        'investors': deals * 4,
+        'buyers': deals,
+        'payments': payments,
+        'payment_parties': payments * 2,
+        'payment_proofs': payments // 4,
+        'documents': deals * 2,
+        'activity_logs': payments,
+    }
+
+
+def load_schema(connection):
+    """Create the benchmark tables from schema.sql (existing tables are left alone)"""
+    with open(SCHEMA_PATH) as f:
+        statements = [s.strip() for s in f.read().split(';')]
+    cursor = connection.cursor()
+    for statement in statements:
+        lines = [line for line in statement.splitlines() if not line.strip().startswith('--')]
+        if ''.join(lines).strip():
+            cursor.execute('\n'.join(lines))
+    connection.commit()
+    cursor.close()
+
+
+class UnsafeDatabaseError(Exception):
+    """A destructive benchmark command was pointed at a database that is not a bench database"""
+
+
+def require_bench_database(connection, confirm=None):
+    """
+    Return the connected database's name if it is safe to truncate or alter: it is the
+    BENCH_DB_NAME database, its name ends in _bench, or `confirm` repeats its name
+    (--confirm-destroy). Otherwise raise UnsafeDatabaseError; DB_* may point at production.
+    """
+    cursor = connection.cursor()
+    cursor.execute("SELECT DATABASE()")
+    row = cursor.fetchone()
+    cursor.close()
+    database = row[0] if row else None
+    if not database:
+        raise UnsafeDatabaseError('No database selected')
+    if database == os.getenv('BENCH_DB_NAME') or database.endswith(BENCH_DB_SUFFIX) or confirm == database:
+        return database
+    raise UnsafeDatabaseError(
+        f"Refusing to modify {database!r}: it is not a benchmark database. Set DB_NAME to a database named "
+        f"by BENCH_DB_NAME or ending in {BENCH_DB_SUFFIX!r}, or pass --confirm-destroy {database}")
+
+
+def reset(connection, confirm=None):
+    """Empty every benchmark table so a reload starts from id 1 (bench databases only, see require_bench_database)"""
+    require_bench_database(connection, confirm)
+    cursor = connection.cursor()
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for table in TABLES:
+        cursor.execute(f"TRUNCATE TABLE {table}")
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    connection.commit()
+    cursor.close()
+
+
+def _insert(cursor, table, columns, rows, batch_size):
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(sql, rows[start:start + batch_size])
+
+
+class DatasetGenerator:
+    """
+    Deterministic synthetic data: the same seed and scale always produce the same rows,
+    so results from two runs (or two machines) are comparable. Ids are assigned explicitly
+    starting at 1, which is why generate() expects empty tables (see reset()).
+    """
+
+    def __init__(self, payments, seed=42, batch_size=1000):
+        self.shape = dataset_shape(payments)
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.base_date = date(2023, 1, 1)
+
+    def _person(self):
+        return f"{self.rng.choice(_FIRST_NAMES)} {self.rng.choice(_LAST_NAMES)}"
+
+    def _mobile(self):
+        return f"9{self.rng.randrange(10 ** 8, 10 ** 9)}"
+
+    def _pan(self):
+        letters = ''.join(self.rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(5))
+        return f"{letters}{self.rng.randrange(1000, 9999)}{self.rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')}"
+
+    def _day(self, span_days=900):
+        return self.base_date + timedelta(days=self.rng.randrange(span_days))
+
+    def generate(self, connection, progress=print):
+        """Insert the whole dataset; returns the row counts per table"""
+        shape = self.shape
+        cursor = connection.cursor()
+        started = time.monotonic()
+
+        # A pooled set of people so the same owner/investor shows up on several deals,
+        # like real data (and like get_all_owners' GROUP BY expects)
+        owner_people = [(self._person(), self._mobile(), self._pan()) for _ in range(max(20, shape['owners'] // 3))]
+        investor_people = [(self._person(), self._mobile(), self._pan()) for _ in range(max(20, shape['investors'] // 4))]
+
+        _insert(cursor, 'users', ['id', 'username', 'password', 'full_name', 'role'],
+                [(1, BENCH_USERNAME, 'benchmark-not-a-real-hash', 'Benchmark Admin', 'admin')], self.batch_size)
+
+        deals = []
+        for deal_id in range(1, shape['deals'] + 1):
+            purchase_date = self._day()
+            deals.append((
+                deal_id, f"{self.rng.choice(_VILLAGES)} Project {deal_id}", f"{self.rng.randrange(1, 999)}/{self.rng.randrange(1, 20)}",
+                purchase_date, self.rng.choice(_TALUKAS), self.rng.choice(_VILLAGES),
+                round(self.rng.uniform(0.5, 40), 2), 'acre', round(self.rng.uniform(5e5, 5e7), 2),
+                self.rng.choice(_MODES), self.rng.choice(_DEAL_STATUSES), 1,
+                f"{purchase_date.isoformat()} 10:00:00"
+            ))
+        _insert(cursor, 'deals', ['id', 'project_name', 'survey_number', 'purchase_date', 'taluka', 'village',
+                                  'total_area', 'area_unit', 'purchase_amount', 'payment_mode', 'status',
+                                  'created_by', 'created_at'], deals, self.batch_size)
+        progress(f"  deals: {len(deals)}")
+
+        owners = []
+        for owner_id in range(1, shape['owners'] + 1):
+            name, mobile, pan = self.rng.choice(owner_people)
+            owners.append((owner_id, (owner_id - 1) // 3 + 1, name, mobile, f"{name.split()[0].lower()}@example.com",
+                           f"{self.rng.randrange(10 ** 11, 10 ** 12)}", pan, 33.33, self.rng.random() < 0.05))
+        _insert(cursor, 'owners', ['id', 'deal_id', 'name', 'mobile', 'email', 'aadhar_card', 'pan_card',
+                                   'percentage_share', 'is_starred'], owners, self.batch_size)
+        progress(f"  owners: {len(owners)}")
+
+        investors = []
+        for investor_id in range(1, shape['investors'] + 1):
+            name, mobile, pan = self.rng.choice(investor_people)
+            investors.append((investor_id, (investor_id - 1) // 4 + 1, name, round(self.rng.uniform(1e5, 1e7), 2), 25.0,
+                              mobile, f"{name.split()[0].lower()}.inv@example.com", pan, self.rng.random() < 0.05))
+        _insert(cursor, 'investors', ['id', 'deal_id', 'investor_name', 'investment_amount', 'investment_percentage',
+                                      'mobile', 'email', 'pan_card', 'is_starred'], investors, self.batch_size)
+        progress(f"  investors: {len(investors)}")
+
+        buyers = [(buyer_id, buyer_id, self._person(), self._mobile(), self._pan())
+                  for buyer_id in range(1, shape['buyers'] + 1)]
+        _insert(cursor, 'buyers', ['id', 'deal_id', 'name', 'mobile', 'pan_card'], buyers, self.batch_size)
+        progress(f"  buyers: {len(buyers)}")
+
+        payments = []
+        parties = []
+        # Payments are skewed towards early deals so one deal has a long ledger, like a real portfolio
+        for payment_id in range(1, shape['payments'] + 1):
+            deal_id = min(shape['deals'], int(self.rng.paretovariate(1.2)))
+            owner_id = (deal_id - 1) * 3 + self.rng.randrange(3) + 1
+            investor_id = (deal_id - 1) * 4 + self.rng.randrange(4) + 1
+            amount = round(self.rng.uniform(1e4, 2e6), 2)
+            payment_date = self._day()
+            payments.append((
+                payment_id, deal_id, amount, payment_date, payment_date + timedelta(days=self.rng.randrange(0, 60)),
+                self.rng.choice(_MODES), f"REF{payment_id:08d}", self.rng.choice(_PAYMENT_TYPES),
+                self.rng.choice(_STATUSES), f"investor_{investor_id}", f"owner_{owner_id}", 1
+            ))
+            parties.append((payment_id, 'investor', investor_id, amount, 100, 'payer'))
+            parties.append((payment_id, 'owner', owner_id, amount, 100, 'payee'))
+        _insert(cursor, 'payments', ['id', 'deal_id', 'amount', 'payment_date', 'due_date', 'payment_mode', 'reference',
+                                     'payment_type', 'status', 'paid_by', 'paid_to', 'created_by'], payments, self.batch_size)
+        _insert(cursor, 'payment_parties', ['payment_id', 'party_type', 'party_id', 'amount', 'percentage', 'role'],
+                parties, self.batch_size)
+        progress(f"  payments: {len(payments)}, payment_parties: {len(parties)}")
+
+        proofs = [(self.rng.randrange(1, shape['payments'] + 1), f"uploads/bench/proof_{i}.pdf", 1, 'receipt')
+                  for i in range(1, shape['payment_proofs'] + 1)]
+        _insert(cursor, 'payment_proofs', ['payment_id', 'file_path', 'uploaded_by', 'doc_type'], proofs, self.batch_size)
+
+        documents = [((i - 1) // 2 + 1, self.rng.choice(_DOC_TYPES), f"document_{i}.pdf",
+                      f"uploads/bench/deal_{(i - 1) // 2 + 1}/document_{i}.pdf", self.rng.randrange(10 ** 4, 10 ** 7), 1)
+                     for i in range(1, shape['documents'] + 1)]
+        _insert(cursor, 'documents', ['deal_id', 'document_type', 'document_name', 'file_path', 'file_size', 'uploaded_by'],
+                documents, self.batch_size)
+        progress(f"  payment_proofs: {len(proofs)}, documents: {len(documents)}")
+
+        logs = []
+        for i in range(1, shape['activity_logs'] + 1):
+            deal_id = self.rng.randrange(1, shape['deals'] + 1)
+            logs.append((1, self.rng.choice(['CREATE', 'UPDATE', 'DELETE']), 'deal', deal_id, f"Deal {deal_id}",
+                         '{}', '127.0.0.1', 'benchmark'))
+        _insert(cursor, 'activity_logs', ['user_id', 'action', 'entity_type', 'entity_id', 'entity_name', 'changes',
+                                          'ip_address', 'user_agent'], logs, self.batch_size)
+        progress(f"  activity_logs: {len(logs)}")
+
+        connection.commit()
+        cursor.close()
+        progress(f"Generated dataset in {time.monotonic() - started:.1f}s")
+        return dict(shape, users=1)
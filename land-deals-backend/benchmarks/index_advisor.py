@@ -0,0 +1,283 @@
+import time
+
+# MySQL errors for catalog queries whose table or column is missing from the database
+ER_NO_SUCH_TABLE = 1146
+ER_BAD_FIELD_ERROR = 1054
+
+# Indexes the hot paths want: (table, index name, columns, what uses it)
+CANDIDATE_INDEXES = [
+    ('payments', 'idx_payments_deal_status_type', ('deal_id', 'status', 'payment_type'),
+     'payment tracking, deal financials, statements'),
+    ('payment_parties', 'idx_payment_parties_payment_type_role', ('payment_id', 'party_type', 'role'),
+     'investor-to-owner joins, ledger payer/payee columns'),
+    ('payment_proofs', 'idx_payment_proofs_payment_uploaded', ('payment_id', 'uploaded_at'),
+     'latest proof per payment, proof lists'),
+    ('activity_logs', 'idx_activity_logs_entity_time', ('entity_type', 'entity_id', 'timestamp'),
+     'deal audit log (newest 100)'),
+    ('payment_reminders', 'idx_payment_reminders_payment_date', ('payment_id', 'reminder_date'),
+     'reminders per deal'),
+    ('offers', 'idx_offers_deal_date', ('deal_id', 'offer_date'),
+     'offers per deal'),
+    ('documents', 'idx_documents_owner', ('owner_id',),
+     'owner documents'),
+    ('documents', 'idx_documents_investor', ('investor_id',),
+     'investor documents'),
+    ('investors', 'idx_investors_parent', ('parent_investor_id',),
+     'linked duplicate investors'),
+    ('users', 'idx_users_username', ('username',),
+     'login'),
+]
+
+# (name, SQL, params from the context) for the queries behind the hot endpoints, as the app runs them
+QUERY_CATALOG = [
+    ('tracking_misc_payments', """
+        SELECT p.id, p.amount, p.payment_date, p.status, p.payment_type, p.notes, p.description
+        FROM payments p
+        WHERE p.deal_id = %s AND p.status = 'completed' AND p.payment_type != 'land_purchase'
+        ORDER BY p.payment_date DESC
+     """, lambda c: (c['busiest_deal_id'],)),
+    ('tracking_investor_to_owner', """
+        SELECT p.id, p.amount, p.payment_date, pp1.party_id AS investor_id, pp2.party_id AS owner_id
+        FROM payments p
+        JOIN payment_parties pp1 ON pp1.payment_id = p.id AND pp1.party_type = 'investor' AND pp1.role = 'payer'
+        JOIN payment_parties pp2 ON pp2.payment_id = p.id AND pp2.party_type = 'owner' AND pp2.role = 'recipient'
+        WHERE p.deal_id = %s AND p.payment_type = 'investor_to_owner' AND p.status = 'completed'
+        ORDER BY p.payment_date DESC, p.id DESC
+     """, lambda c: (c['busiest_deal_id'],)),
+    ('ledger_payment_parties', """
+        SELECT party_type, party_id, amount, percentage, role FROM payment_parties WHERE payment_id = %s
+     """, lambda c: (c['payment_id'],)),
+    ('latest_payment_proof', """
+        SELECT file_path FROM payment_proofs WHERE payment_id = %s ORDER BY uploaded_at DESC LIMIT 1
+     """, lambda c: (c['payment_id'],)),
+    ('deal_audit_logs', """
+        SELECT al.*, u.username AS user_name
+        FROM activity_logs al
+        LEFT JOIN users u ON al.user_id = u.id
+        WHERE al.entity_type = 'deal' AND al.entity_id = %s
+        ORDER BY al.timestamp DESC
+        LIMIT 100
+     """, lambda c: (c['busiest_deal_id'],)),
+    ('deal_reminders', """
+        SELECT pr.*, p.amount AS payment_amount, p.payment_date, p.reference
+        FROM payment_reminders pr
+        JOIN payments p ON pr.payment_id = p.id
+        WHERE p.deal_id = %s
+        ORDER BY pr.reminder_date ASC
+     """, lambda c: (c['busiest_deal_id'],)),
+    ('deal_offers', """
+        SELECT o.*, u.username AS created_by_name
+        FROM offers o
+        LEFT JOIN users u ON o.created_by = u.id
+        WHERE o.deal_id = %s
+        ORDER BY o.offer_date DESC, o.created_at DESC
+     """, lambda c: (c['busiest_deal_id'],)),
+    ('owner_documents', """
+        SELECT id, file_path, document_name FROM documents WHERE owner_id = %s
+     """, lambda c: (c['owner_id'],)),
+    ('investor_documents', """
+        SELECT id, file_path, document_name FROM documents WHERE investor_id = %s
+     """, lambda c: (c['investor_id'],)),
+    ('investor_duplicates', """
+        SELECT id, deal_id FROM investors WHERE parent_investor_id = %s
+     """, lambda c: (c['investor_id'],)),
+    ('login_lookup', """
+        SELECT * FROM users WHERE username = %s
+     """, lambda c: (c['username'],)),
+]
+
+
+def load_context(connection, base_context):
+    """Add a payment, owner and investor of the busiest deal to runner.load_context's ids"""
+    cursor = connection.cursor()
+    context = dict(base_context)
+    for key, sql in (('payment_id', "SELECT id FROM payments WHERE deal_id = %s ORDER BY id LIMIT 1"),
+                     ('owner_id', "SELECT id FROM owners WHERE deal_id = %s ORDER BY id LIMIT 1"),
+                     ('investor_id', "SELECT id FROM investors WHERE deal_id = %s ORDER BY id LIMIT 1")):
+        cursor.execute(sql, (context['busiest_deal_id'],))
+        row = cursor.fetchone()
+        context[key] = row[0] if row else 0
+    cursor.close()
+    return context
+
+
+def explain(cursor, sql, params):
+    """EXPLAIN one query; returns its plan rows and the problems found in them"""
+    cursor.execute(f"EXPLAIN {sql}", params)
+    columns = [d[0].lower() for d in cursor.description]
+    plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    problems = []
+    for step in plan:
+        extra = step.get('extra') or ''
+        if step.get('type') == 'ALL':
+            problems.append(f"full scan of {step.get('table')} (~{step.get('rows')} rows)")
+        if 'Using filesort' in extra:
+            problems.append(f"filesort on {step.get('table')}")
+        if 'Using temporary' in extra:
+            problems.append(f"temporary table for {step.get('table')}")
+    return plan, problems
+
+
+def time_query(cursor, sql, params, iterations):
+    """Median wall time in ms of running the query and fetching every row"""
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return round(samples[len(samples) // 2], 3)
+
+
+def analyse(connection, context, iterations=10):
+    """EXPLAIN and time every catalog query; queries on missing tables/columns are reported as skipped"""
+    cursor = connection.cursor()
+    results = {}
+    for name, sql, params_for in QUERY_CATALOG:
+        params = params_for(context)
+        try:
+            plan, problems = explain(cursor, sql, params)
+            results[name] = {
+                'problems': problems,
+                'keys': sorted({str(step.get('key')) for step in plan if step.get('key')}),
+                'median_ms': time_query(cursor, sql, params, iterations),
+            }
+        except Exception as e:
+            if getattr(e, 'errno', None) not in (ER_NO_SUCH_TABLE, ER_BAD_FIELD_ERROR):
+                raise
+            results[name] = {'skipped': str(e)}
+    cursor.close()
+    return results
+
+
+def _table_columns(cursor, table):
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    return {row[0].lower() for row in cursor.fetchall()}
+
+
+def _table_indexes(cursor, table):
+    """{index name: (columns in order)}"""
+    cursor.execute("""
+        SELECT index_name, column_name FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+        ORDER BY index_name, seq_in_index
+    """, (table,))
+    indexes = {}
+    for index_name, column in cursor.fetchall():
+        indexes.setdefault(index_name, []).append(column.lower())
+    return {name: tuple(columns) for name, columns in indexes.items()}
+
+
+def recommend(connection):
+    """
+    Candidate indexes whose table and columns exist but which no existing index already covers
+    (an index covers the candidate when the candidate's columns are its leading columns).
+    Returns (missing, covered, not_applicable) lists of candidate tuples, with the covering index for covered ones.
+    """
+    cursor = connection.cursor()
+    missing, covered, not_applicable = [], [], []
+    for candidate in CANDIDATE_INDEXES:
+        table, _, columns, _ = candidate
+        if not set(columns) <= _table_columns(cursor, table):
+            not_applicable.append(candidate)
+            continue
+        covering = next((name for name, existing in _table_indexes(cursor, table).items()
+                         if existing[:len(columns)] == columns), None)
+        if covering:
+            covered.append(candidate + (covering,))
+        else:
+            missing.append(candidate)
+    cursor.close()
+    return missing, covered, not_applicable
+
+
+def apply_indexes(connection, candidates, progress=print):
+    cursor = connection.cursor()
+    for table, name, columns, _ in candidates:
+        started = time.perf_counter()
+        cursor.execute(f"ALTER TABLE {table} ADD INDEX {name} ({', '.join(columns)})")
+        if progress:
+            progress(f"  added {table}.{name} in {time.perf_counter() - started:.1f}s")
+    cursor.close()
+
+
+def drop_indexes(connection, candidates):
+    cursor = connection.cursor()
+    for table, name, _, _ in candidates:
+        cursor.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+    cursor.close()
+
+
+def migration_sql(candidates, filename='add_hot_query_indexes.sql'):
+    """
+    Idempotent migration in the style of sql/: each index is added only when its table has
+    the columns and no index (under any name) already starts with the same columns.
+    """
+    lines = [f"-- {filename}",
+             "-- Idempotent: indexes recommended by `python -m benchmarks indexes` for the hot query set.",
+             "-- An index is skipped when its columns are missing or an existing index already leads with them.",
+             "SET @db := DATABASE();"]
+    for table, name, columns, reason in candidates:
+        column_list = ','.join(columns)
+        quoted = ', '.join(f"'{c}'" for c in columns)
+        lines += [
+            "",
+            f"-- {table}({', '.join(columns)}): {reason}",
+            f"SELECT COUNT(*) INTO @cols FROM information_schema.columns\n"
+            f" WHERE table_schema = @db AND table_name = '{table}' AND column_name IN ({quoted});",
+            f"SELECT COUNT(*) INTO @cnt FROM (\n"
+            f"  SELECT index_name, GROUP_CONCAT(column_name ORDER BY seq_in_index) AS cols\n"
+            f"  FROM information_schema.statistics WHERE table_schema = @db AND table_name = '{table}'\n"
+            f"  GROUP BY index_name) s\n"
+            f" WHERE s.index_name = '{name}' OR s.cols = '{column_list}' OR s.cols LIKE '{column_list},%';",
+            f"SET @sql = IF(@cols = {len(columns)} AND @cnt = 0, "
+            f"'ALTER TABLE {table} ADD INDEX {name} ({', '.join(columns)})', 'SELECT \"index_exists\"');",
+            "PREPARE stmt FROM @sql;",
+            "EXECUTE stmt;",
+            "DEALLOCATE PREPARE stmt;",
+        ]
+    return '\n'.join(lines) + '\n'
+
+
+def run(connection, context, apply=False, revert=False, iterations=10, progress=print):
+    """
+    EXPLAIN and time the catalog, work out the missing indexes and, with apply, add them and
+    measure again. revert drops the added indexes afterwards so the run can be repeated.
+    """
+    report = {'before': analyse(connection, context, iterations)}
+    missing, covered, not_applicable = recommend(connection)
+    report['recommended'] = [{'table': t, 'index': n, 'columns': list(c), 'reason': r} for t, n, c, r in missing]
+    report['covered'] = [{'table': t, 'index': n, 'columns': list(c), 'covered_by': by} for t, n, c, _, by in covered]
+    report['not_applicable'] = [{'table': t, 'index': n, 'columns': list(c)} for t, n, c, _ in not_applicable]
+    if apply and missing:
+        apply_indexes(connection, missing, progress)
+        report['after'] = analyse(connection, context, iterations)
+        if revert:
+            drop_indexes(connection, missing)
+    return report
+
+
+def print_report(report, out=print):
+    after = report.get('after', {})
+    out(f"{'query':28s} {'before ms':>10s} {'after ms':>10s}  problems (before -> after)")
+    for name, before in report['before'].items():
+        if 'skipped' in before:
+            out(f"{name:28s} {'skipped':>10s} {'':>10s}  {before['skipped']}")
+            continue
+        result = after.get(name, {})
+        after_ms = f"{result['median_ms']:10.3f}" if 'median_ms' in result else f"{'-':>10s}"
+        problems = '; '.join(before['problems']) or 'ok'
+        if result:
+            problems += f" -> {'; '.join(result.get('problems', [])) or 'ok'}"
+        out(f"{name:28s} {before['median_ms']:10.3f} {after_ms}  {problems}")
+    out('')
+    for rec in report['recommended']:
+        out(f"recommend {rec['table']}.{rec['index']} ({', '.join(rec['columns'])}): {rec['reason']}")
+    for rec in report['covered']:
+        out(f"covered   {rec['table']}({', '.join(rec['columns'])}) by {rec['covered_by']}")
+    for rec in report['not_applicable']:
+        out(f"n/a       {rec['table']}({', '.join(rec['columns'])}): table or columns not in this database")
@@ -0,0 +1,250 @@
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from werkzeug.security import generate_password_hash
+
+from benchmarks.runner import percentile
+
+LOADTEST_PASSWORD = 'loadtest-password'
+
+# Roles simulated users are spread over, with how many of each seed_users creates by default
+ROLE_COUNTS = {'admin': 2, 'auditor': 3, 'user': 15}
+
+ALL_ROLES = ('admin', 'auditor', 'user')
+STAFF_ROLES = ('admin', 'auditor')
+
+# (name, weight, roles allowed, method, path template) mirroring what the frontend does:
+# the dashboard on every visit, the deal workspace while working a deal, and the occasional
+# upload or ledger export
+ROUTE_MIX = [
+    ('dashboard_stats', 15, ALL_ROLES, 'GET', '/api/deals/stats'),
+    ('dashboard_deals', 20, ALL_ROLES, 'GET', '/api/deals/paginated?page=1&limit=10'),
+    ('deal_detail', 15, ALL_ROLES, 'GET', '/api/deals/{deal_id}'),
+    ('deal_payments', 15, ALL_ROLES, 'GET', '/api/payments/{deal_id}'),
+    ('payment_tracking', 10, ALL_ROLES, 'GET', '/api/deals/{deal_id}/payment-tracking'),
+    ('documents_structure', 8, ALL_ROLES, 'GET', '/api/deals/{deal_id}/documents/structure'),
+    ('upload_document', 4, ('admin',), 'POST', '/api/upload'),
+    ('ledger_csv', 4, STAFF_ROLES, 'GET', '/api/payments/ledger.csv?deal_id={deal_id}'),
+    ('ledger_pdf', 2, STAFF_ROLES, 'GET', '/api/payments/ledger.pdf?deal_id={deal_id}'),
+]
+
+# Smallest file /api/upload accepts as a PDF
+_UPLOAD_BODY = b'%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n'
+
+
+def seed_users(get_connection, role_counts=None, password=LOADTEST_PASSWORD):
+    """
+    Create (or reset) loadtest_<role>_<n> users with a known password. 'user' accounts are
+    linked to existing investors so their access-controlled views return data.
+    """
+    role_counts = role_counts or ROLE_COUNTS
+    # pbkdf2 keeps the login phase quick; login accepts any werkzeug hash
+    hashed = generate_password_hash(password, method='pbkdf2:sha256:1000')
+    connection = get_connection()
+    cursor = connection.cursor()
+    cursor.execute("SELECT id FROM investors ORDER BY id LIMIT %s", (role_counts.get('user', 0),))
+    investor_ids = [row[0] for row in cursor.fetchall()]
+    usernames = []
+    for role, count in role_counts.items():
+        for n in range(1, count + 1):
+            username = f"loadtest_{role}_{n}"
+            investor_id = investor_ids[(n - 1) % len(investor_ids)] if role == 'user' and investor_ids else None
+            cursor.execute("""
+                INSERT INTO users (username, password, full_name, role, investor_id)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE password = VALUES(password), role = VALUES(role), investor_id = VALUES(investor_id)
+            """, (username, hashed, f"Load Test {role} {n}", role, investor_id))
+            usernames.append((username, role))
+    connection.commit()
+    connection.close()
+    return usernames
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+        self.error_samples = []
+
+    def record(self, latency_ms, status, error=None):
+        self.latencies.append(latency_ms)
+        key = str(status) if status is not None else 'exception'
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        if error is not None or status is None or status >= 400:
+            self.errors += 1
+            if len(self.error_samples) < 5:
+                self.error_samples.append(error or f"HTTP {status}")
+
+    def summary(self, duration):
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        result = {
+            'requests': count,
+            'throughput_rps': round(count / duration, 2) if duration else None,
+            'error_rate': round(self.errors / float(count), 4) if count else None,
+            'statuses': self.statuses,
+        }
+        if count:
+            result.update({
+                'mean_ms': round(sum(latencies) / count, 2),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'max_ms': round(latencies[-1], 2),
+            })
+        if self.error_samples:
+            result['error_samples'] = self.error_samples
+        return result
+
+
+class VirtualUser:
+    """One logged-in account; holds its JWT and a keep-alive session"""
+
+    def __init__(self, base_url, username, role):
+        self.base_url = base_url
+        self.username = username
+        self.role = role
+        self.session = requests.Session()
+        self.token = None
+
+    def login(self, password, timeout):
+        response = self.session.post(f"{self.base_url}/api/login", json={'username': self.username, 'password': password},
+                                     timeout=timeout)
+        response.raise_for_status()
+        self.token = response.json()['token']
+        self.session.headers['Authorization'] = f"Bearer {self.token}"
+
+
+class LoadTest:
+    """
+    Open-loop load generator: requests are started on a fixed schedule (target RPS) no matter how
+    slowly earlier ones finish, so a saturated server shows up as rising latency and errors rather
+    than as the generator quietly slowing down. `max_in_flight` bounds the worker threads; when all
+    are busy the schedule slips and the slip is reported as dispatch lag.
+    """
+
+    def __init__(self, base_url, users, rps=20, duration=60, max_in_flight=64, timeout=30,
+                 route_mix=None, deal_ids=None, seed=None):
+        self.base_url = base_url.rstrip('/')
+        self.users = users
+        self.rps = rps
+        self.duration = duration
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.route_mix = route_mix or ROUTE_MIX
+        self.deal_ids = deal_ids or []
+        self.rng = random.Random(seed)
+        self.stats = {}
+        self.max_lag_ms = 0.0
+        self._lock = threading.Lock()
+
+    def login_all(self, password=LOADTEST_PASSWORD, progress=print):
+        for user in self.users:
+            user.login(password, self.timeout)
+        progress(f"Logged in {len(self.users)} users")
+
+    def discover_deals(self, limit=50):
+        """Deal ids visible to an admin, used to fill {deal_id} in the route templates"""
+        admin = next((u for u in self.users if u.role == 'admin'), self.users[0])
+        response = admin.session.get(f"{self.base_url}/api/deals/paginated?page=1&limit={limit}&count=none",
+                                     timeout=self.timeout)
+        response.raise_for_status()
+        self.deal_ids = [deal['id'] for deal in response.json().get('deals', [])]
+        if not self.deal_ids:
+            raise RuntimeError('No deals found; load data first (python -m benchmarks generate)')
+
+    def _pick(self):
+        """Choose a route by weight, then a user allowed to call it"""
+        with self._lock:
+            name, _, roles, method, template = self.rng.choices(self.route_mix, weights=[r[1] for r in self.route_mix])[0]
+            candidates = [u for u in self.users if u.role in roles]
+            user = self.rng.choice(candidates) if candidates else self.rng.choice(self.users)
+            deal_id = self.rng.choice(self.deal_ids)
+        return name, method, template.format(deal_id=deal_id), user, deal_id
+
+    def _send(self, name, method, path, user, deal_id):
+        started = time.perf_counter()
+        status = None
+        error = None
+        try:
+            if method == 'POST':
+                response = user.session.post(f"{self.base_url}{path}", timeout=self.timeout,
+                                             data={'deal_id': deal_id, 'document_type': 'loadtest'},
+                                             files={'file': ('loadtest.pdf', _UPLOAD_BODY, 'application/pdf')})
+            else:
+                response = user.session.get(f"{self.base_url}{path}", timeout=self.timeout)
+            # Read the whole body so exports and streamed lists are timed end to end
+            _ = response.content
+            status = response.status_code
+        except requests.RequestException as e:
+            error = type(e).__name__
+        latency_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.stats.setdefault(name, EndpointStats()).record(latency_ms, status, error)
+
+    def run(self, progress=print):
+        interval = 1.0 / self.rps
+        total = int(self.rps * self.duration)
+        in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        started = time.perf_counter()
+        progress(f"Sending {total} requests at {self.rps} rps for {self.duration}s")
+
+        def task(args):
+            try:
+                self._send(*args)
+            finally:
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            for i in range(total):
+                scheduled = started + i * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                in_flight.acquire()
+                lag_ms = (time.perf_counter() - scheduled) * 1000
+                if lag_ms > self.max_lag_ms:
+                    self.max_lag_ms = lag_ms
+                pool.submit(task, self._pick())
+                if progress and i and i % max(1, int(self.rps * 10)) == 0:
+                    progress(f"  {i}/{total} sent")
+        elapsed = time.perf_counter() - started
+        return self.report(elapsed)
+
+    def report(self, elapsed):
+        overall = EndpointStats()
+        for stats in self.stats.values():
+            overall.latencies.extend(stats.latencies)
+            overall.errors += stats.errors
+            for status, count in stats.statuses.items():
+                overall.statuses[status] = overall.statuses.get(status, 0) + count
+        return {
+            'base_url': self.base_url,
+            'target_rps': self.rps,
+            'duration_s': round(elapsed, 2),
+            'users': {role: sum(1 for u in self.users if u.role == role) for role in ALL_ROLES},
+            'max_dispatch_lag_ms': round(self.max_lag_ms, 2),
+            'overall': overall.summary(elapsed),
+            'endpoints': {name: stats.summary(elapsed) for name, stats in sorted(self.stats.items())},
+        }
+
+
+def print_report(report, out=print):
+    overall = report['overall']
+    out(f"\n{report['overall']['requests']} requests in {report['duration_s']}s "
+        f"({overall['throughput_rps']} rps, target {report['target_rps']}), "
+        f"error rate {overall['error_rate']}, max dispatch lag {report['max_dispatch_lag_ms']}ms")
+    out(f"{'endpoint':22s} {'reqs':>6s} {'rps':>7s} {'err%':>6s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'max':>9s}")
+    for name, s in report['endpoints'].items():
+        out(f"{name:22s} {s['requests']:6d} {s['throughput_rps']:7.2f} {s['error_rate'] * 100:6.2f} "
+            f"{s.get('p50_ms', 0):9.1f} {s.get('p95_ms', 0):9.1f} {s.get('p99_ms', 0):9.1f} {s.get('max_ms', 0):9.1f}")
+
+
+def write_report(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
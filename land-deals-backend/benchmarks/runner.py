@@ -0,0 +1,227 @@
+import gc
+import json
+import time
+import platform
+import resource
+import threading
+import tracemalloc
+from datetime import datetime, timedelta
+
+import jwt
+import mysql.connector.cursor
+
+# Latency percentiles reported for every scenario
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _counted(counter, original):
+    def wrapped(cursor, *args, **kwargs):
+        with counter._lock:
+            counter.count += 1
+        return original(cursor, *args, **kwargs)
+    return wrapped
+
+
+class QueryCounter:
+    """
+    Counts execute/executemany calls on mysql-connector cursors while active.
+    Only used inside the benchmark process; the app code is not touched.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._originals = []
+
+    def _cursor_classes(self):
+        classes = [mysql.connector.cursor.MySQLCursor]
+        try:
+            from mysql.connector.cursor_cext import CMySQLCursor
+            classes.append(CMySQLCursor)
+        except ImportError:
+            pass
+        return classes
+
+    def __enter__(self):
+        for cls in self._cursor_classes():
+            for name in ('execute', 'executemany'):
+                original = cls.__dict__.get(name)
+                if original is None:
+                    continue
+                self._originals.append((cls, name, original))
+                setattr(cls, name, _counted(self, original))
+        return self
+
+    def __exit__(self, *exc):
+        for cls, name, original in reversed(self._originals):
+            setattr(cls, name, original)
+        self._originals = []
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if platform.system() == 'Darwin' else 1024), 1)
+
+
+def bench_token(app, user_id, username, role='admin'):
+    """A JWT accepted by token_required, signed with the app's SECRET_KEY"""
+    return jwt.encode({
+        'user_id': user_id,
+        'username': username,
+        'role': role,
+        'exp': datetime.utcnow() + timedelta(hours=1)
+    }, app.config['SECRET_KEY'])
+
+
+def scenarios(context):
+    """
+    (name, path, needs_auth) for every benchmarked endpoint. `context` holds ids picked
+    from the loaded dataset, so the busiest deal is always the one measured.
+    """
+    deal_id = context['busiest_deal_id']
+    return [
+        ('list_payments', f"/api/payments/{deal_id}", False),
+        ('payments_ledger', f"/api/payments/ledger?deal_id={deal_id}", False),
+        ('payments_ledger_all', "/api/payments/ledger", False),
+        ('payments_ledger_csv', f"/api/payments/ledger.csv?deal_id={deal_id}", True),
+        ('payments_ledger_pdf', f"/api/payments/ledger.pdf?deal_id={deal_id}", True),
+        ('get_payment_tracking_data', f"/api/deals/{deal_id}/payment-tracking", True),
+        ('get_deals_paginated', "/api/deals/paginated?page=1&limit=20", True),
+        ('get_deals_paginated_deep', f"/api/deals/paginated?page={context['deep_page']}&limit=20", True),
+        ('get_all_owners', "/api/owners?page=1&limit=20", True),
+        ('get_deal', f"/api/deals/{deal_id}", True),
+    ]
+
+
+def load_context(get_connection):
+    connection = get_connection()
+    cursor = connection.cursor()
+    cursor.execute("SELECT deal_id FROM payments GROUP BY deal_id ORDER BY COUNT(*) DESC LIMIT 1")
+    row = cursor.fetchone()
+    cursor.execute("SELECT COUNT(*) FROM deals")
+    deal_count = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM payments")
+    payment_count = cursor.fetchone()[0]
+    cursor.execute("SELECT id, username FROM users WHERE role = 'admin' ORDER BY id LIMIT 1")
+    user = cursor.fetchone()
+    connection.close()
+    if not row or not user:
+        raise RuntimeError('No benchmark data found; run `python -m benchmarks generate` first')
+    return {
+        'busiest_deal_id': row[0],
+        'deep_page': max(1, deal_count // 20),
+        'deals': deal_count,
+        'payments': payment_count,
+        'user_id': user[0],
+        'username': user[1],
+    }
+
+
+def run_scenario(client, path, headers, iterations, warmup):
+    for _ in range(warmup):
+        client.get(path, headers=headers).get_data()
+
+    latencies = []
+    statuses = {}
+    body_bytes = 0
+    gc.collect()
+    tracemalloc.start()
+    with QueryCounter() as queries:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            response = client.get(path, headers=headers)
+            # Drain streamed bodies inside the timing so streaming endpoints are measured end to end
+            body = response.get_data()
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            body_bytes = len(body)
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    result = {
+        'iterations': iterations,
+        'statuses': {str(k): v for k, v in statuses.items()},
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'min_ms': round(latencies[0], 3),
+        'max_ms': round(latencies[-1], 3),
+        'queries_per_request': round(queries.count / float(iterations), 2),
+        'response_bytes': body_bytes,
+        'peak_alloc_mb': round(peak_alloc / (1024 * 1024), 2),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    for pct in PERCENTILES:
+        result[f"p{pct}_ms"] = round(percentile(latencies, pct), 3)
+    return result
+
+
+def run(app, get_connection, iterations=20, warmup=2, only=None, progress=print):
+    """Run every scenario through the Flask test client; returns the JSON-ready report"""
+    context = load_context(get_connection)
+    token = bench_token(app, context['user_id'], context['username'])
+    client = app.test_client()
+
+    report = {
+        'started_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'dataset': {'deals': context['deals'], 'payments': context['payments']},
+        'iterations': iterations,
+        'scenarios': {},
+    }
+    for name, path, needs_auth in scenarios(context):
+        if only and name not in only:
+            continue
+        # no-cache keeps the response cache out of the measurement
+        headers = {'Cache-Control': 'no-cache'}
+        if needs_auth:
+            headers['Authorization'] = f"Bearer {token}"
+        result = run_scenario(client, path, headers, iterations, warmup)
+        result['path'] = path
+        report['scenarios'][name] = result
+        progress(f"  {name:28s} p50={result['p50_ms']:9.2f}ms p95={result['p95_ms']:9.2f}ms "
+                 f"queries={result['queries_per_request']:6.1f} status={result['statuses']}")
+    report['peak_rss_mb'] = peak_rss_mb()
+    return report
+
+
+def compare(baseline, current, threshold=0.15, metrics=('p50_ms', 'p95_ms', 'queries_per_request')):
+    """
+    Compare two reports scenario by scenario. A metric regresses when it grew by more than
+    `threshold` (0.15 = 15%). Returns (rows, regressions).
+    """
+    rows = []
+    regressions = []
+    for name, result in current['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base:
+            rows.append({'scenario': name, 'metric': None, 'note': 'not in baseline'})
+            continue
+        for metric in metrics:
+            old, new = base.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else (0.0 if new == old else float('inf'))
+            row = {'scenario': name, 'metric': metric, 'baseline': old, 'current': new, 'change': round(change, 4)}
+            rows.append(row)
+            if change > threshold:
+                regressions.append(row)
+    return rows, regressions
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_report(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
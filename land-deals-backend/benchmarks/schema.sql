@@ -0,0 +1,181 @@
+-- benchmarks/schema.sql
+-- Tables the benchmark dataset fills, with every column the benchmarked endpoints read.
+-- Safe to run on an empty local database; existing tables are left as they are.
+-- After loading, the app's ensure_*_schema functions add their indexes and generated columns.
+
+CREATE TABLE IF NOT EXISTS users (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    username VARCHAR(255) UNIQUE NOT NULL,
+    password VARCHAR(255) NOT NULL,
+    full_name VARCHAR(100),
+    role ENUM('admin','auditor','user') DEFAULT 'user',
+    owner_id INT DEFAULT NULL,
+    investor_id INT DEFAULT NULL,
+    mobile VARCHAR(15) DEFAULT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS deals (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    project_name VARCHAR(255) NOT NULL,
+    survey_number VARCHAR(100),
+    purchase_date DATE DEFAULT NULL,
+    state_id INT DEFAULT NULL,
+    district_id INT DEFAULT NULL,
+    location VARCHAR(255),
+    taluka VARCHAR(100),
+    village VARCHAR(100),
+    total_area DECIMAL(12,2),
+    area_unit VARCHAR(20),
+    purchase_amount DECIMAL(15,2) NULL,
+    selling_amount DECIMAL(15,2) NULL,
+    asking_price DECIMAL(15,2) NULL,
+    sold_price DECIMAL(15,2) NULL,
+    listing_date DATE NULL,
+    sold_date DATE NULL,
+    payment_mode VARCHAR(50),
+    profit_allocation TEXT,
+    status VARCHAR(32) DEFAULT 'open',
+    created_by INT DEFAULT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_deals_created_at_id (created_at, id),
+    INDEX idx_deals_status_purchase_date (status, purchase_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS owners (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    deal_id INT NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    mobile VARCHAR(15),
+    email VARCHAR(100),
+    aadhar_card VARCHAR(14),
+    pan_card VARCHAR(10),
+    address TEXT,
+    percentage_share DECIMAL(5,2) NULL,
+    investment_amount DECIMAL(15,2) NULL,
+    is_starred BOOLEAN DEFAULT FALSE,
+    created_by INT DEFAULT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_owners_deal_id (deal_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS buyers (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    deal_id INT NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    mobile VARCHAR(15),
+    email VARCHAR(100),
+    aadhar_card VARCHAR(14),
+    pan_card VARCHAR(10),
+    address TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_buyers_deal_id (deal_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS investors (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    deal_id INT NOT NULL,
+    investor_name VARCHAR(100) NOT NULL,
+    investment_amount DECIMAL(15,2),
+    investment_percentage DECIMAL(5,2),
+    percentage_share DECIMAL(5,2) NULL,
+    mobile VARCHAR(15),
+    email VARCHAR(100),
+    aadhar_card VARCHAR(14),
+    pan_card VARCHAR(10),
+    address TEXT,
+    is_starred BOOLEAN DEFAULT FALSE,
+    parent_investor_id INT DEFAULT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_investors_deal_id (deal_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS payments (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    deal_id INT NOT NULL,
+    party_type ENUM('owner','buyer','investor','other') DEFAULT 'other',
+    party_id INT DEFAULT NULL,
+    amount DECIMAL(15,2) NOT NULL,
+    currency VARCHAR(10) DEFAULT 'INR',
+    payment_date DATE NOT NULL,
+    due_date DATE DEFAULT NULL,
+    payment_mode VARCHAR(50),
+    reference VARCHAR(255),
+    notes TEXT,
+    description TEXT DEFAULT NULL,
+    category VARCHAR(100) DEFAULT NULL,
+    paid_by VARCHAR(255) DEFAULT NULL,
+    paid_to VARCHAR(255) DEFAULT NULL,
+    status ENUM('pending','completed','cancelled','failed','overdue') DEFAULT 'pending',
+    payment_type VARCHAR(50) DEFAULT 'advance',
+    is_installment BOOLEAN DEFAULT FALSE,
+    installment_number INT DEFAULT NULL,
+    total_installments INT DEFAULT NULL,
+    parent_amount DECIMAL(15,2) DEFAULT NULL,
+    plan_id INT NULL,
+    payer_bank_name VARCHAR(255) DEFAULT NULL,
+    payer_bank_account_no VARCHAR(64) DEFAULT NULL,
+    receiver_bank_name VARCHAR(255) DEFAULT NULL,
+    receiver_bank_account_no VARCHAR(64) DEFAULT NULL,
+    created_by INT DEFAULT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_payments_deal_id (deal_id),
+    INDEX idx_payments_party (party_type, party_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS payment_parties (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    payment_id INT NOT NULL,
+    party_type VARCHAR(64) NOT NULL,
+    party_id INT NULL,
+    amount DECIMAL(15,2) NULL,
+    percentage DECIMAL(5,2) NULL,
+    role VARCHAR(32) NULL,
+    pay_to_id INT NULL,
+    pay_to_name VARCHAR(255) NULL,
+    pay_to_type VARCHAR(64) NULL,
+    INDEX (payment_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS payment_proofs (
+    id INT NOT NULL AUTO_INCREMENT,
+    payment_id INT NOT NULL,
+    file_path VARCHAR(1024) NOT NULL,
+    uploaded_by INT DEFAULT NULL,
+    doc_type VARCHAR(64) DEFAULT NULL,
+    uploaded_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id),
+    INDEX idx_payment_proofs_payment_id (payment_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS documents (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    deal_id INT NOT NULL,
+    document_type VARCHAR(100),
+    document_name VARCHAR(255) NOT NULL,
+    file_path VARCHAR(500) NOT NULL,
+    file_type VARCHAR(50),
+    file_size INT,
+    uploaded_by INT DEFAULT NULL,
+    uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_documents_deal_id (deal_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS activity_logs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT,
+    action VARCHAR(50),
+    entity_type VARCHAR(50),
+    entity_id INT,
+    entity_name VARCHAR(255),
+    changes TEXT,
+    ip_address VARCHAR(45),
+    user_agent VARCHAR(255),
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_activity_logs_entity (entity_type, entity_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile_import(module='app', env=None):
+    """
+    Import `module` in a fresh interpreter with -X importtime and return
+    (wall_seconds, [(cumulative_us, self_us, name), ...]) for every imported module.
+    """
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            cwd=BACKEND_DIR, env=dict(os.environ, **(env or {})),
+                            capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        # "import time:     self [us] |   cumulative | imported package"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            modules.append((int(cumulative_us), int(self_us), name.rstrip()))
+        except ValueError:
+            continue
+    return wall, modules
+
+
+def top_level(modules):
+    """Cumulative cost per top-level package, summed over the modules imported at depth 0"""
+    totals = {}
+    for cumulative_us, _, name in modules:
+        # importtime pads names with one space, plus two more per nesting level
+        if len(name) - len(name.lstrip()) > 1:
+            continue
+        package = name.strip().split('.')[0]
+        totals[package] = totals.get(package, 0) + cumulative_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def print_profile(wall, modules, limit=25, out=print):
+    out(f"Cold import wall time: {wall * 1000:.0f} ms (includes interpreter start)")
+    out("\nTop-level packages by cumulative import time:")
+    for package, cumulative_us in top_level(modules)[:limit]:
+        out(f"  {cumulative_us / 1000:9.1f} ms  {package}")
+    out("\nSlowest individual modules (self time):")
+    for cumulative_us, self_us, name in sorted(modules, key=lambda m: m[1], reverse=True)[:limit]:
+        out(f"  {self_us / 1000:9.1f} ms  {name.strip()}")
@@ -0,0 +1,230 @@
+import os
+import queue
+import shutil
+import threading
+import mysql.connector
+
+# MySQL error raised when a table referenced by a cascade step does not exist
+ER_NO_SUCH_TABLE = 1146
+
+class FileReaper:
+    """Background worker that removes upload files and folders after their DB rows are deleted"""
+
+    def __init__(self, upload_folder):
+        self.upload_folder = os.path.abspath(upload_folder)
+        self.queue = queue.Queue()
+        self.stats = {'queued': 0, 'removed_files': 0, 'removed_dirs': 0, 'missing': 0, 'failed': 0, 'bytes_freed': 0}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def resolve(self, stored_path):
+        """
+        Turn a stored path (absolute, 'uploads/...' web path, or path relative to the
+        upload folder) into an absolute path inside the upload folder, or None if it escapes it.
+        """
+        if not stored_path:
+            return None
+        p = str(stored_path).replace('\\', '/')
+        if os.path.isabs(p) and os.path.abspath(p).startswith(self.upload_folder + os.sep):
+            return os.path.abspath(p)
+        idx = p.find('uploads/')
+        if idx != -1:
+            p = p[idx + len('uploads/'):]
+        abs_path = os.path.abspath(os.path.join(self.upload_folder, p.lstrip('/')))
+        if not abs_path.startswith(self.upload_folder + os.sep):
+            return None
+        return abs_path
+
+    def enqueue(self, stored_path):
+        """Queue a file or directory for removal. Returns the resolved path or None if rejected"""
+        abs_path = self.resolve(stored_path)
+        if abs_path is None:
+            return None
+        with self._lock:
+            self.stats['queued'] += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='file-reaper', daemon=True)
+                self._thread.start()
+        self.queue.put(abs_path)
+        return abs_path
+
+    def drain(self):
+        """Block until every queued path has been processed"""
+        self.queue.join()
+
+    def _remove(self, abs_path):
+        try:
+            if os.path.isdir(abs_path):
+                size = 0
+                for root, _, files in os.walk(abs_path):
+                    for name in files:
+                        try:
+                            size += os.path.getsize(os.path.join(root, name))
+                        except OSError:
+                            pass
+                shutil.rmtree(abs_path)
+                with self._lock:
+                    self.stats['removed_dirs'] += 1
+                    self.stats['bytes_freed'] += size
+            elif os.path.exists(abs_path):
+                size = os.path.getsize(abs_path)
+                os.remove(abs_path)
+                with self._lock:
+                    self.stats['removed_files'] += 1
+                    self.stats['bytes_freed'] += size
+            else:
+                with self._lock:
+                    self.stats['missing'] += 1
+        except OSError:
+            with self._lock:
+                self.stats['failed'] += 1
+
+    def _run(self):
+        while True:
+            abs_path = self.queue.get()
+            try:
+                self._remove(abs_path)
+            finally:
+                self.queue.task_done()
+
+# Global instance
+_file_reaper = None
+
+def get_file_reaper(upload_folder):
+    """Get or create file reaper instance"""
+    global _file_reaper
+    if _file_reaper is None:
+        _file_reaper = FileReaper(upload_folder)
+    return _file_reaper
+
+
+def _chunks(ids, size):
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+def _fetch_column(cursor, sql, params):
+    cursor.execute(sql, params)
+    return [row[0] for row in cursor.fetchall()]
+
+def _delete_by_ids(connection, cursor, table, column, ids, chunk_size):
+    """Delete rows whose `column` is in ids, one committed chunk at a time. Returns rows deleted"""
+    deleted = 0
+    for chunk in _chunks(ids, chunk_size):
+        placeholders = ','.join(['%s'] * len(chunk))
+        cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", chunk)
+        deleted += cursor.rowcount
+        connection.commit()
+    return deleted
+
+def _delete_by_key(connection, cursor, table, column, value, chunk_size):
+    """Delete rows with `column` = value using LIMIT-ed statements so each lock is short"""
+    deleted = 0
+    while True:
+        cursor.execute(f"DELETE FROM {table} WHERE {column} = %s LIMIT {int(chunk_size)}", (value,))
+        deleted += cursor.rowcount
+        connection.commit()
+        if cursor.rowcount < chunk_size:
+            return deleted
+
+def delete_deal_cascade(connection, deal_id, upload_folder, chunk_size=500):
+    """
+    Delete a deal and its whole graph: payments and their parties, proofs and reminders,
+    owner/investor documents, documents, offers, owners, buyers, investors, expenses,
+    installment plans and the deal's summary and cash-flow rollups.
+    Every statement is driven by an indexed key (deal_id, payment_id, owner_id, investor_id)
+    and committed in chunks; the deal row goes last so an interrupted cascade can be re-run.
+    Files referenced by deleted rows and the deal's upload folder are handed to the file reaper.
+    Returns a report {'deleted': {table: count}, 'skipped_tables': [...], 'files_queued': n}.
+    """
+    cursor = connection.cursor()
+    reaper = get_file_reaper(upload_folder)
+    report = {'deleted': {}, 'skipped_tables': [], 'files_queued': 0}
+    file_paths = []
+
+    def step(table, action):
+        try:
+            report['deleted'][table] = action()
+        except mysql.connector.Error as e:
+            if getattr(e, 'errno', None) != ER_NO_SUCH_TABLE:
+                raise
+            connection.rollback()
+            report['skipped_tables'].append(table)
+
+    payment_ids = _fetch_column(cursor, "SELECT id FROM payments WHERE deal_id = %s", (deal_id,))
+    owner_ids = _fetch_column(cursor, "SELECT id FROM owners WHERE deal_id = %s", (deal_id,))
+    investor_ids = _fetch_column(cursor, "SELECT id FROM investors WHERE deal_id = %s", (deal_id,))
+
+    # Collect file paths before their rows disappear
+    def collect(sql_template, ids):
+        for chunk in _chunks(ids, chunk_size):
+            placeholders = ','.join(['%s'] * len(chunk))
+            file_paths.extend(_fetch_column(cursor, sql_template.format(placeholders=placeholders), chunk))
+
+    for sql_template, ids in (
+        ("SELECT file_path FROM payment_proofs WHERE payment_id IN ({placeholders})", payment_ids),
+        ("SELECT file_path FROM owner_documents WHERE owner_id IN ({placeholders})", owner_ids),
+        ("SELECT file_path FROM investor_documents WHERE investor_id IN ({placeholders})", investor_ids),
+        ("SELECT file_path FROM documents WHERE deal_id IN ({placeholders})", [deal_id]),
+    ):
+        try:
+            collect(sql_template, ids)
+        except mysql.connector.Error as e:
+            if getattr(e, 'errno', None) != ER_NO_SUCH_TABLE:
+                raise
+
+    # Payment-keyed tables
+    for table in ('payment_proofs', 'payment_parties', 'payment_reminders'):
+        step(table, lambda table=table: _delete_by_ids(connection, cursor, table, 'payment_id', payment_ids, chunk_size))
+    step('payments', lambda: _delete_by_key(connection, cursor, 'payments', 'deal_id', deal_id, chunk_size))
+
+    # Person-keyed document tables
+    step('owner_documents', lambda: _delete_by_ids(connection, cursor, 'owner_documents', 'owner_id', owner_ids, chunk_size))
+    step('investor_documents', lambda: _delete_by_ids(connection, cursor, 'investor_documents', 'investor_id', investor_ids, chunk_size))
+
+    # Deal-keyed tables
+    for table in ('documents', 'deal_documents', 'offers', 'owners', 'buyers', 'investors', 'expenses', 'installment_plans',
+                  'deal_financial_summary', 'cashflow_monthly'):
+        step(table, lambda table=table: _delete_by_key(connection, cursor, table, 'deal_id', deal_id, chunk_size))
+
+    cursor.execute("DELETE FROM deals WHERE id = %s", (deal_id,))
+    report['deleted']['deals'] = cursor.rowcount
+    connection.commit()
+
+    # Hand files to the background reaper; the deal folder covers anything not referenced by a row
+    for path in file_paths + [f"deal_{deal_id}"]:
+        if reaper.enqueue(path):
+            report['files_queued'] += 1
+
+    return report
+
+def delete_orphans(connection, table, parent_table, parent_key, label_column=None, chunk_size=500):
+    """
+    Delete rows of `table` whose `parent_key` points at a missing `parent_table` row.
+    Orphans are found with an index-driven NOT EXISTS probe in LIMIT-ed batches and removed
+    by primary key, so no single statement scans and locks the whole table.
+    Returns {'count': n, 'ids': [...], 'labels': [...]} (labels only when label_column is given).
+    """
+    cursor = connection.cursor()
+    columns = f"id, {label_column}" if label_column else "id"
+    result = {'count': 0, 'ids': [], 'labels': []}
+    last_id = 0
+    while True:
+        cursor.execute(f"""
+            SELECT {columns} FROM {table} t
+            WHERE t.id > %s
+            AND NOT EXISTS (SELECT 1 FROM {parent_table} p WHERE p.id = t.{parent_key})
+            ORDER BY t.id
+            LIMIT {int(chunk_size)}
+        """, (last_id,))
+        rows = cursor.fetchall()
+        if not rows:
+            return result
+        ids = [row[0] for row in rows]
+        placeholders = ','.join(['%s'] * len(ids))
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", ids)
+        connection.commit()
+        result['count'] += len(ids)
+        result['ids'].extend(ids)
+        if label_column:
+            result['labels'].extend(row[1] for row in rows)
+        last_id = ids[-1]
@@ -0,0 +1,221 @@
+import time
+
+from date_utils import normalize_date
+
+_numpy = None
+
+def load_numpy():
+    """Import NumPy on first use (it is slow to import); None when it is not installed"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False  # build_series falls back to plain Python
+    return _numpy or None
+
+# MySQL error raised when the rollup table does not exist yet
+ER_NO_SUCH_TABLE = 1146
+
+ROLLUP_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS cashflow_monthly (
+        deal_id INT NOT NULL,
+        month DATE NOT NULL,
+        payment_type VARCHAR(50) NOT NULL,
+        direction ENUM('in', 'out') NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        payment_count INT NOT NULL DEFAULT 0,
+        total DECIMAL(15,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (deal_id, month, payment_type, direction, status),
+        INDEX idx_cashflow_monthly_month (month, status, deal_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Money coming into the deal: sale proceeds and anything a buyer pays. Everything else
+# (land purchase, advances, taxes, legal, investor-to-owner) goes out.
+DIRECTION_SQL = "CASE WHEN payment_type = 'investment_sale' OR paid_by LIKE 'buyer\\_%%' THEN 'in' ELSE 'out' END"
+
+# Statuses kept in the rollup; cancelled and failed payments never moved money
+ROLLUP_STATUSES = ('completed', 'pending', 'overdue')
+
+GROUP_COLUMNS = {'total': None, 'deal': 'deal_id', 'payment_type': 'payment_type'}
+
+# Longest range /api/analytics/cashflow serves in one response
+MAX_MONTHS = 240
+
+_INSERT_SQL = f"""
+    INSERT INTO cashflow_monthly (deal_id, month, payment_type, direction, status, payment_count, total)
+    SELECT deal_id, DATE_FORMAT(payment_date, '%%Y-%%m-01'), COALESCE(payment_type, 'other'), {DIRECTION_SQL},
+           status, COUNT(*), SUM(amount)
+    FROM payments
+    WHERE {{where}} AND payment_date IS NOT NULL AND status IN ({', '.join(['%s'] * len(ROLLUP_STATUSES))})
+    GROUP BY deal_id, DATE_FORMAT(payment_date, '%%Y-%%m-01'), COALESCE(payment_type, 'other'), {DIRECTION_SQL}, status
+"""
+
+def ensure_schema(connection):
+    cursor = connection.cursor()
+    cursor.execute(ROLLUP_TABLE_SQL)
+    connection.commit()
+    cursor.close()
+
+def month_start(value):
+    """'YYYY-MM-01' for any date value date_utils understands (also 'YYYY-MM'), else None"""
+    if isinstance(value, str) and len(value.strip()) == 7:
+        value = value.strip() + '-01'
+    normalized = normalize_date(value)
+    return normalized[:8] + '01' if normalized else None
+
+def add_months(month, count):
+    """Shift a 'YYYY-MM-01' month by count months (negative goes back)"""
+    year, index = divmod(int(month[:4]) * 12 + int(month[5:7]) - 1 + count, 12)
+    return f"{year:04d}-{index + 1:02d}-01"
+
+def month_range(start, end):
+    """Every 'YYYY-MM-01' from start to end inclusive"""
+    months = []
+    current = start
+    while current <= end:
+        months.append(current)
+        current = add_months(current, 1)
+    return months
+
+def refresh_cashflow(connection, deal_id, dates):
+    """
+    Recompute the deal's buckets for the months containing `dates`, on the caller's connection
+    before it commits. Pass both the old and new payment_date when a payment moves month.
+    Only the touched (deal, month) buckets are rewritten. Does nothing until the table exists.
+    """
+    months = sorted({m for m in (month_start(d) for d in dates) if m})
+    if not months:
+        return
+    placeholders = ', '.join(['%s'] * len(months))
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"DELETE FROM cashflow_monthly WHERE deal_id = %s AND month IN ({placeholders})",
+                       [deal_id] + months)
+        where = f"deal_id = %s AND payment_date >= %s AND payment_date < %s AND DATE_FORMAT(payment_date, '%%Y-%%m-01') IN ({placeholders})"
+        cursor.execute(_INSERT_SQL.format(where=where),
+                       [deal_id, months[0], add_months(months[-1], 1)] + months + list(ROLLUP_STATUSES))
+    except Exception as e:
+        if getattr(e, 'errno', None) != ER_NO_SUCH_TABLE:
+            raise
+    finally:
+        cursor.close()
+
+def refresh_cashflow_rows(connection, rows):
+    """refresh_cashflow for payment rows (dicts with deal_id and payment_date) across deals"""
+    dates_by_deal = {}
+    for row in rows:
+        dates_by_deal.setdefault(row['deal_id'], []).append(row['payment_date'])
+    for deal_id in sorted(dates_by_deal):
+        refresh_cashflow(connection, deal_id, dates_by_deal[deal_id])
+
+def rebuild_all(connection, batch_size=200, progress=print):
+    """Backfill: rebuild every deal's rollups, committing every batch_size deals. Returns the number of rows written"""
+    ensure_schema(connection)
+    cursor = connection.cursor()
+    cursor.execute("SELECT DISTINCT deal_id FROM payments ORDER BY deal_id")
+    deal_ids = [row[0] for row in cursor.fetchall()]
+    # Rollups of deleted deals, and of deals whose payments were all deleted, are not rebuilt below
+    cursor.execute("DELETE FROM cashflow_monthly WHERE deal_id NOT IN (SELECT DISTINCT deal_id FROM payments WHERE deal_id IS NOT NULL)")
+    connection.commit()
+
+    started = time.monotonic()
+    written = 0
+    for start in range(0, len(deal_ids), batch_size):
+        batch = deal_ids[start:start + batch_size]
+        placeholders = ', '.join(['%s'] * len(batch))
+        cursor.execute(f"DELETE FROM cashflow_monthly WHERE deal_id IN ({placeholders})", batch)
+        cursor.execute(_INSERT_SQL.format(where=f"deal_id IN ({placeholders})"), batch + list(ROLLUP_STATUSES))
+        written += cursor.rowcount
+        connection.commit()
+        if progress:
+            progress(f"  {min(start + batch_size, len(deal_ids))}/{len(deal_ids)} deals")
+    cursor.close()
+    if progress:
+        progress(f"Rebuilt {written} cash-flow rollup rows for {len(deal_ids)} deals in {time.monotonic() - started:.1f}s")
+    return written
+
+def query_rollups(cursor, start, end, statuses, group_by='total', deal_ids=None):
+    """(group key, month, direction, total) rows for the range, summed in SQL down to the requested grouping"""
+    group_column = GROUP_COLUMNS[group_by]
+    select_group = group_column if group_column else "'total'"
+    where = ["month BETWEEN %s AND %s", f"status IN ({', '.join(['%s'] * len(statuses))})"]
+    params = [start, end] + list(statuses)
+    if deal_ids is not None:
+        where.append(f"deal_id IN ({', '.join(['%s'] * len(deal_ids))})")
+        params.extend(deal_ids)
+    cursor.execute(f"""
+        SELECT {select_group} AS group_key, DATE_FORMAT(month, '%%Y-%%m-01') AS month_key, direction, SUM(total) AS total
+        FROM cashflow_monthly
+        WHERE {' AND '.join(where)}
+        GROUP BY group_key, month_key, direction
+    """, params)
+    return cursor.fetchall()
+
+def _series(key, inflow, outflow):
+    net = [round(i - o, 2) for i, o in zip(inflow, outflow)]
+    cumulative = []
+    running = 0.0
+    for value in net:
+        running += value
+        cumulative.append(round(running, 2))
+    return {'key': key, 'inflow': [round(v, 2) for v in inflow], 'outflow': [round(v, 2) for v in outflow],
+            'net': net, 'cumulative_net': cumulative}
+
+def build_series(rows, months):
+    """
+    Lay rollup rows out as one inflow/outflow/net/cumulative series per group over `months`,
+    plus the portfolio total. With NumPy the rows are scattered into a
+    (groups x months x direction) array in one step; without it the same is done in a loop.
+    """
+    month_index = {month: i for i, month in enumerate(months)}
+    keys = sorted({row[0] for row in rows})
+    key_index = {key: i for i, key in enumerate(keys)}
+
+    np = load_numpy()
+    if np is not None:
+        grid = np.zeros((len(keys), len(months), 2))
+        if rows:
+            g = np.fromiter((key_index[row[0]] for row in rows), dtype=np.intp, count=len(rows))
+            m = np.fromiter((month_index[row[1]] for row in rows), dtype=np.intp, count=len(rows))
+            d = np.fromiter((row[2] == 'in' for row in rows), dtype=np.intp, count=len(rows))
+            values = np.fromiter((float(row[3] or 0) for row in rows), dtype=float, count=len(rows))
+            np.add.at(grid, (g, m, d), values)
+        totals = grid.sum(axis=0)
+        series = [_series(key, grid[i, :, 1].tolist(), grid[i, :, 0].tolist()) for i, key in enumerate(keys)]
+        total = _series('total', totals[:, 1].tolist(), totals[:, 0].tolist())
+    else:
+        grid = [[[0.0, 0.0] for _ in months] for _ in keys]
+        for key, month, direction, value in rows:
+            grid[key_index[key]][month_index[month]][1 if direction == 'in' else 0] += float(value or 0)
+        series = [_series(key, [c[1] for c in grid[i]], [c[0] for c in grid[i]]) for i, key in enumerate(keys)]
+        total = _series('total', [sum(grid[i][j][1] for i in range(len(keys))) for j in range(len(months))],
+                        [sum(grid[i][j][0] for i in range(len(keys))) for j in range(len(months))])
+
+    return {
+        'months': [month[:7] for month in months],
+        'series': series,
+        'totals': dict(total, inflow_total=round(sum(total['inflow']), 2),
+                       outflow_total=round(sum(total['outflow']), 2), net_total=round(sum(total['net']), 2)),
+        'engine': 'numpy' if np is not None else 'python',
+    }
+
+
+if __name__ == '__main__':
+    # Backfill or repair: python cashflow.py [--batch-size N]
+    import argparse
+    from app import get_db_connection
+
+    parser = argparse.ArgumentParser(description='Rebuild cashflow_monthly rollups from payments')
+    parser.add_argument('--batch-size', type=int, default=200, help='deals per commit')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    if conn is None:
+        raise SystemExit('Database connection failed')
+    try:
+        rebuild_all(conn, args.batch_size)
+    finally:
+        conn.close()
@@ -0,0 +1,97 @@
+"""
+Date normalization for values coming from the frontend, CSV imports and JS Date strings.
+Everything is normalized to MySQL's YYYY-MM-DD, or None when the value is not a date.
+
+Accepted forms:
+- '2025-09-05' and ISO datetimes '2025-09-05T00:00:00.000Z' / '2025-09-05 10:30:00'
+- JS toUTCString: 'Fri, 05 Sep 2025 00:00:00 GMT' (also the truncated '... GM')
+- slash dates '09/05/2025'. These are ambiguous: SLASH_DATE_ORDER decides which reading
+  is tried first ('MDY' by default, as before), and the other order is used only when the
+  first one is not a valid calendar date.
+
+>>> normalize_date('2025-09-05')
+'2025-09-05'
+>>> normalize_date('Fri, 05 Sep 2025 00:00:00 GMT')
+'2025-09-05'
+>>> normalize_date('2025-09-05T18:30:00.000Z')
+'2025-09-05'
+>>> normalize_date('09/05/2025')
+'2025-09-05'
+>>> normalize_date('09/05/2025', slash_order='DMY')
+'2025-05-09'
+>>> normalize_date('25/12/2025')
+'2025-12-25'
+>>> normalize_date('2025-02-30') is None
+True
+>>> normalize_dates(['2025-09-05', '', '13/13/2025', '1/2/2025'])
+['2025-09-05', None, None, '2025-01-02']
+"""
+import os
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+# 'MDY' (US, default) or 'DMY' (UK/India) for ambiguous slash dates like 03/04/2025
+SLASH_DATE_ORDER = os.environ.get('SLASH_DATE_ORDER', 'MDY').upper()
+
+_ISO_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})(?:[T ][\d:.]*(?:Z|[+-]\d{2}:?\d{2})?)?$')
+_SLASH_RE = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$')
+_UTC_STRING_RE = re.compile(r'^[A-Za-z]{3},\s*(\d{1,2})\s+([A-Za-z]{3})\s+(\d{4})\s+\d{1,2}:\d{2}:\d{2}\s+(?:GMT|UTC|GM)')
+
+_MONTHS = {name: i for i, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)}
+
+def _format(year, month, day):
+    """YYYY-MM-DD for a valid calendar date, else None"""
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=4096)
+def _normalize_string(value, slash_order):
+    match = _ISO_RE.match(value)
+    if match:
+        return _format(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+    match = _UTC_STRING_RE.match(value)
+    if match:
+        month = _MONTHS.get(match.group(2).lower())
+        return _format(int(match.group(3)), month, int(match.group(1))) if month else None
+
+    match = _SLASH_RE.match(value)
+    if match:
+        first, second, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+        if slash_order == 'DMY':
+            return _format(year, second, first) or _format(year, first, second)
+        return _format(year, first, second) or _format(year, second, first)
+
+    return None
+
+def normalize_date(value, slash_order=None):
+    """Normalize one date value to 'YYYY-MM-DD', or None if it is empty or not a date"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    value = str(value).strip()
+    if not value:
+        return None
+    return _normalize_string(value, slash_order or SLASH_DATE_ORDER)
+
+def normalize_dates(values, slash_order=None):
+    """Normalize a list of date values at once; each distinct string is parsed only once"""
+    seen = {}
+    result = []
+    for value in values:
+        key = value if isinstance(value, str) else None
+        if key is not None and key in seen:
+            result.append(seen[key])
+            continue
+        normalized = normalize_date(value, slash_order)
+        if key is not None:
+            seen[key] = normalized
+        result.append(normalized)
+    return result
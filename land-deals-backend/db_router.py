@@ -0,0 +1,154 @@
+import time
+import threading
+import mysql.connector
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError
+
+def parse_replica_hosts(value, default_port=3306):
+    """Parse DB_REPLICA_HOSTS ('host1:3306,host2') into [(host, port), ...]"""
+    hosts = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(':')
+        hosts.append((host, int(port) if port else default_port))
+    return hosts
+
+class ReplicaRouter:
+    """
+    Routes read-only work to a pool per replica and everything else to the primary.
+    A replica that fails to hand out a live connection is benched for `retry_after` seconds;
+    when no replica is usable the caller falls back to the primary. Users who wrote recently
+    are pinned to the primary for `sticky_seconds` so they always read their own writes.
+    """
+
+    def __init__(self, primary_config, replica_hosts, pool_size=5, sticky_seconds=5,
+                 retry_after=30, health_check_interval=10):
+        self.primary_config = primary_config
+        self.pool_size = pool_size
+        self.sticky_seconds = sticky_seconds
+        self.retry_after = retry_after
+        self.health_check_interval = health_check_interval
+        self.replicas = [
+            {'name': f"{host}:{port}", 'host': host, 'port': port, 'pool': None, 'down_until': 0,
+             'last_checked': {}, 'errors': 0, 'served': 0}
+            for host, port in replica_hosts
+        ]
+        self.stats = {'replica_reads': 0, 'primary_fallbacks': 0, 'sticky_reads': 0}
+        self._last_write = {}
+        self._last_any_write = None
+        self._next = 0
+        self._lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.replicas)
+
+    # ---- read-your-writes ----
+
+    def record_write(self, user_id):
+        if user_id is None:
+            return
+        with self._lock:
+            self._last_write[user_id] = self._last_any_write = time.monotonic()
+            # Keep the map bounded to users inside their window
+            if len(self._last_write) > 10000:
+                cutoff = time.monotonic() - self.sticky_seconds
+                self._last_write = {k: v for k, v in self._last_write.items() if v > cutoff}
+
+    def is_sticky(self, user_id):
+        if user_id is None:
+            return False
+        last = self._last_write.get(user_id)
+        return last is not None and time.monotonic() - last < self.sticky_seconds
+
+    def may_lag(self):
+        """True while a replica may not have caught up with the latest write by any user"""
+        last = self._last_any_write
+        return last is not None and time.monotonic() - last < self.sticky_seconds
+
+    # ---- replica pools ----
+
+    def _pool(self, replica):
+        with self._pool_lock:
+            if replica['pool'] is None:
+                config = dict(self.primary_config, host=replica['host'], port=replica['port'])
+                replica['pool'] = pooling.MySQLConnectionPool(
+                    pool_name=f"replica_{replica['host']}_{replica['port']}"[:64],
+                    pool_size=self.pool_size,
+                    pool_reset_session=True,
+                    **config
+                )
+            return replica['pool']
+
+    def _checked_connection(self, replica):
+        """Borrow a pooled connection, pinging it if it has not been checked recently"""
+        conn = self._pool(replica).get_connection()
+        key = id(conn._cnx) if hasattr(conn, '_cnx') else id(conn)
+        now = time.monotonic()
+        if now - replica['last_checked'].get(key, 0) > self.health_check_interval:
+            try:
+                conn.ping(reconnect=True, attempts=1, delay=0)
+            except mysql.connector.Error:
+                conn.close()
+                raise
+            replica['last_checked'][key] = now
+        return conn
+
+    def get_replica_connection(self):
+        """A healthy replica connection, or None when no replica can serve the read"""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [r for r in self.replicas if r['down_until'] <= now]
+            if not candidates:
+                return None
+            start = self._next
+            self._next += 1
+        for i in range(len(candidates)):
+            replica = candidates[(start + i) % len(candidates)]
+            try:
+                conn = self._checked_connection(replica)
+            except PoolError:
+                # Pool exhausted: try the next replica, then the primary
+                continue
+            except mysql.connector.Error:
+                with self._lock:
+                    replica['errors'] += 1
+                    replica['down_until'] = time.monotonic() + self.retry_after
+                continue
+            with self._lock:
+                replica['served'] += 1
+            return conn
+        return None
+
+    def get_read_connection(self, user_id, primary_factory, on_lagging_read=None):
+        """
+        Route a read: replica unless the user is sticky or no replica is usable.
+        `on_lagging_read()` is called when a replica serves the read inside another user's
+        read-your-writes window, i.e. the rows may predate that write.
+        """
+        if self.enabled:
+            if self.is_sticky(user_id):
+                self.stats['sticky_reads'] += 1
+            else:
+                conn = self.get_replica_connection()
+                if conn is not None:
+                    self.stats['replica_reads'] += 1
+                    if on_lagging_read and self.may_lag():
+                        on_lagging_read()
+                    return conn
+                self.stats['primary_fallbacks'] += 1
+        return primary_factory()
+
+    def status(self):
+        now = time.monotonic()
+        return {
+            'replicas': [
+                {'name': r['name'], 'healthy': r['down_until'] <= now, 'served': r['served'], 'errors': r['errors']}
+                for r in self.replicas
+            ],
+            'sticky_seconds': self.sticky_seconds,
+            **self.stats
+        }
@@ -0,0 +1,224 @@
+import json
+import time
+
+# MySQL errors raised when the summary table or a source column does not exist yet
+ER_NO_SUCH_TABLE = 1146
+ER_BAD_FIELD_ERROR = 1054
+
+SUMMARY_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS deal_financial_summary (
+        deal_id INT PRIMARY KEY,
+        purchase_amount DECIMAL(15,2) NULL,
+        sold_price DECIMAL(15,2) NULL,
+        payment_count INT NOT NULL DEFAULT 0,
+        total_payments DECIMAL(15,2) NOT NULL DEFAULT 0,
+        completed_payments DECIMAL(15,2) NOT NULL DEFAULT 0,
+        pending_payments DECIMAL(15,2) NOT NULL DEFAULT 0,
+        overdue_payments DECIMAL(15,2) NOT NULL DEFAULT 0,
+        land_payments_completed DECIMAL(15,2) NOT NULL DEFAULT 0,
+        payments_by_mode TEXT NULL,
+        total_expenses DECIMAL(15,2) NOT NULL DEFAULT 0,
+        total_invested DECIMAL(15,2) NOT NULL DEFAULT 0,
+        outstanding_purchase DECIMAL(15,2) NULL,
+        cost_basis DECIMAL(15,2) NULL,
+        profit DECIMAL(15,2) NULL,
+        profit_margin DECIMAL(9,4) NULL,
+        profit_allocation TEXT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+SUMMARY_COLUMNS = ['deal_id', 'purchase_amount', 'sold_price', 'payment_count', 'total_payments',
+                   'completed_payments', 'pending_payments', 'overdue_payments', 'land_payments_completed',
+                   'payments_by_mode', 'total_expenses', 'total_invested', 'outstanding_purchase',
+                   'cost_basis', 'profit', 'profit_margin', 'profit_allocation']
+
+# Payment types that pay down the land purchase price
+LAND_PAYMENT_TYPES = ('land_purchase', 'advance', 'investor_to_owner')
+
+def ensure_schema(connection):
+    """Create the summary table, and deals.sold_price which the P&L reads"""
+    cursor = connection.cursor()
+    cursor.execute(SUMMARY_TABLE_SQL)
+    cursor.execute("SHOW COLUMNS FROM deals LIKE 'sold_price'")
+    if not cursor.fetchall():
+        cursor.execute("ALTER TABLE deals ADD COLUMN sold_price DECIMAL(15, 2) NULL")
+    connection.commit()
+    cursor.close()
+
+def _number(value):
+    return float(value) if value is not None else None
+
+def lock_deal(connection, deal_id):
+    """
+    Lock the deal row FOR UPDATE at the top of a write transaction that refreshes its summary,
+    before any payment/expense/investor row is written. Those inserts take a shared lock on
+    the deal through their foreign key; taking the exclusive lock only afterwards lets two
+    writers each hold the shared lock and deadlock on the upgrade. Locking first makes
+    concurrent writes to one deal queue up instead. Returns False if the deal does not exist.
+    """
+    cursor = connection.cursor(buffered=True)
+    cursor.execute("SELECT id FROM deals WHERE id = %s FOR UPDATE", (deal_id,))
+    found = cursor.fetchone() is not None
+    cursor.close()
+    return found
+
+def lock_deals(connection, deal_ids):
+    """lock_deal for several deals in one statement, in id order so two callers cannot deadlock"""
+    deal_ids = sorted(set(deal_ids))
+    if not deal_ids:
+        return
+    cursor = connection.cursor(buffered=True)
+    cursor.execute(f"SELECT id FROM deals WHERE id IN ({', '.join(['%s'] * len(deal_ids))}) ORDER BY id FOR UPDATE",
+                   deal_ids)
+    cursor.close()
+
+def compute_summary(connection, deal_id):
+    """
+    Aggregate one deal's financials from the source tables; None if the deal does not exist.
+    Runs on the writer's transaction after lock_deal, so refreshes of one deal run one after
+    the other. All reads are shared locking reads: they see the latest committed rows instead
+    of the transaction's REPEATABLE READ snapshot, and never upgrade a lock the writer holds.
+    """
+    cursor = connection.cursor(dictionary=True, buffered=True)
+    cursor.execute("""
+        SELECT purchase_amount, sold_price, profit_allocation
+        FROM deals
+        WHERE id = %s
+        LOCK IN SHARE MODE
+    """, (deal_id,))
+    deal = cursor.fetchone()
+    if deal is None:
+        cursor.close()
+        return None
+
+    cursor.execute("SELECT SUM(amount) AS total FROM expenses WHERE deal_id = %s LOCK IN SHARE MODE", (deal_id,))
+    total_expenses = cursor.fetchone()['total']
+    cursor.execute("SELECT SUM(investment_amount) AS total FROM investors WHERE deal_id = %s LOCK IN SHARE MODE",
+                   (deal_id,))
+    total_invested = cursor.fetchone()['total']
+    cursor.execute("""
+        SELECT payment_mode, status, payment_type, COUNT(*) AS payment_count, SUM(amount) AS total
+        FROM payments
+        WHERE deal_id = %s
+        GROUP BY payment_mode, status, payment_type
+        LOCK IN SHARE MODE
+    """, (deal_id,))
+    groups = cursor.fetchall()
+    cursor.close()
+
+    summary = {
+        'deal_id': deal_id,
+        'purchase_amount': _number(deal['purchase_amount']),
+        'sold_price': _number(deal['sold_price']),
+        'payment_count': 0,
+        'total_payments': 0.0,
+        'completed_payments': 0.0,
+        'pending_payments': 0.0,
+        'overdue_payments': 0.0,
+        'land_payments_completed': 0.0,
+        'total_expenses': _number(total_expenses) or 0.0,
+        'total_invested': _number(total_invested) or 0.0,
+        'profit_allocation': deal['profit_allocation'],
+    }
+    by_mode = {}
+    for group in groups:
+        total = _number(group['total']) or 0.0
+        summary['payment_count'] += group['payment_count']
+        summary['total_payments'] += total
+        mode = group['payment_mode'] or 'unspecified'
+        by_mode[mode] = by_mode.get(mode, 0.0) + total
+        if group['status'] == 'completed':
+            summary['completed_payments'] += total
+            if group['payment_type'] in LAND_PAYMENT_TYPES:
+                summary['land_payments_completed'] += total
+        elif group['status'] in ('pending', 'overdue'):
+            summary['pending_payments'] += total
+            if group['status'] == 'overdue':
+                summary['overdue_payments'] += total
+    summary['payments_by_mode'] = json.dumps([{'payment_mode': mode, 'total': round(total, 2)}
+                                              for mode, total in sorted(by_mode.items())])
+
+    purchase = summary['purchase_amount']
+    sold = summary['sold_price']
+    summary['outstanding_purchase'] = purchase - summary['land_payments_completed'] if purchase is not None else None
+    summary['cost_basis'] = purchase + summary['total_expenses'] if purchase is not None else None
+    if sold is not None and summary['cost_basis'] is not None:
+        summary['profit'] = sold - summary['cost_basis']
+        summary['profit_margin'] = round(summary['profit'] / summary['cost_basis'], 4) if summary['cost_basis'] else None
+    else:
+        summary['profit'] = None
+        summary['profit_margin'] = None
+    return summary
+
+def _upsert(cursor, summary):
+    columns = ', '.join(SUMMARY_COLUMNS)
+    placeholders = ', '.join(['%s'] * len(SUMMARY_COLUMNS))
+    updates = ', '.join(f"{c} = VALUES({c})" for c in SUMMARY_COLUMNS if c != 'deal_id')
+    cursor.execute(f"INSERT INTO deal_financial_summary ({columns}) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE {updates}",
+                   [summary[c] for c in SUMMARY_COLUMNS])
+
+def refresh_deal_summary(connection, deal_id):
+    """
+    Recompute one deal's summary row on the caller's connection, before it commits,
+    so the summary changes in the same transaction as the write that affected it.
+    Does nothing until the summary table exists (see ensure_schema).
+    """
+    cursor = connection.cursor()
+    try:
+        summary = compute_summary(connection, deal_id)
+        if summary is None:
+            cursor.execute("DELETE FROM deal_financial_summary WHERE deal_id = %s", (deal_id,))
+        else:
+            _upsert(cursor, summary)
+        return summary
+    except Exception as e:
+        if getattr(e, 'errno', None) not in (ER_NO_SUCH_TABLE, ER_BAD_FIELD_ERROR):
+            raise
+        return None
+    finally:
+        cursor.close()
+
+def refresh_deal_summaries(connection, deal_ids):
+    for deal_id in sorted(set(deal_ids)):
+        refresh_deal_summary(connection, deal_id)
+
+def rebuild_all(connection, batch_size=200, progress=print):
+    """Backfill: recompute every deal, committing every batch_size deals. Returns the number rebuilt"""
+    ensure_schema(connection)
+    cursor = connection.cursor()
+    cursor.execute("SELECT id FROM deals ORDER BY id")
+    deal_ids = [row[0] for row in cursor.fetchall()]
+    # Rows for deals that no longer exist
+    cursor.execute("DELETE s FROM deal_financial_summary s LEFT JOIN deals d ON d.id = s.deal_id WHERE d.id IS NULL")
+    connection.commit()
+    cursor.close()
+
+    started = time.monotonic()
+    for start in range(0, len(deal_ids), batch_size):
+        for deal_id in deal_ids[start:start + batch_size]:
+            refresh_deal_summary(connection, deal_id)
+        connection.commit()
+        if progress:
+            progress(f"  {min(start + batch_size, len(deal_ids))}/{len(deal_ids)} deals")
+    if progress:
+        progress(f"Rebuilt {len(deal_ids)} deal summaries in {time.monotonic() - started:.1f}s")
+    return len(deal_ids)
+
+
+if __name__ == '__main__':
+    # Backfill or repair: python deal_summary.py [--batch-size N]
+    import argparse
+    from app import get_db_connection
+
+    parser = argparse.ArgumentParser(description='Rebuild deal_financial_summary from payments, expenses, investors and deals')
+    parser.add_argument('--batch-size', type=int, default=200, help='deals per commit')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    if conn is None:
+        raise SystemExit('Database connection failed')
+    try:
+        rebuild_all(conn, args.batch_size)
+    finally:
+        conn.close()
@@ -85,6 +85,9 @@ class DocumentManager:
     def delete_document(self, file_path):
         """Delete a document file"""
         try:
+            # Stored paths are relative to the upload folder, not the process cwd
+            if not os.path.isabs(file_path):
+                file_path = self.get_document_path(file_path)
             if os.path.exists(file_path):
                 os.remove(file_path)
                 return {'success': True, 'message': 'Document deleted'}
@@ -0,0 +1,107 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password pool and its queue are full or a job timed out; callers should answer 503"""
+
+
+class PasswordHasher:
+    """
+    Small dedicated thread pool for password hashing and verification.
+    bcrypt releases the GIL while it works, so a few threads keep request threads free
+    during a login burst. At most `max_workers + max_queue` jobs are accepted at once;
+    beyond that work is rejected immediately instead of piling up behind bcrypt rounds.
+    A job's slot is only released when the job actually finishes, so a caller that gave up
+    waiting does not free room for more work while its job still occupies the pool.
+    """
+
+    def __init__(self, max_workers=2, max_queue=32, timeout=15, sample_size=1000):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._queue_waits = deque(maxlen=sample_size)
+        self._run_times = deque(maxlen=sample_size)
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'timed_out': 0,
+                      'in_flight': 0}
+
+    def run(self, fn, *args):
+        """Run fn(*args) on the pool and wait for the result"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats['rejected'] += 1
+            raise PasswordHasherBusy('Too many concurrent password operations')
+        with self._lock:
+            self.stats['submitted'] += 1
+            self.stats['in_flight'] += 1
+        queued_at = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._queue_waits.append(started - queued_at)
+                    self._run_times.append(finished - started)
+
+        def done(future):
+            with self._lock:
+                self.stats['in_flight'] -= 1
+                self.stats['failed' if future.cancelled() or future.exception() else 'completed'] += 1
+            self._slots.release()
+
+        try:
+            future = self._executor.submit(job)
+        except Exception:
+            with self._lock:
+                self.stats['in_flight'] -= 1
+                self.stats['failed'] += 1
+            self._slots.release()
+            raise
+        future.add_done_callback(done)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self.stats['timed_out'] += 1
+            raise PasswordHasherBusy('Password operation timed out')
+
+    @staticmethod
+    def _summary(samples):
+        if not samples:
+            return {'count': 0}
+        ordered = sorted(samples)
+        return {
+            'count': len(ordered),
+            'mean_ms': round(sum(ordered) / len(ordered) * 1000, 2),
+            'p95_ms': round(ordered[max(0, -(-95 * len(ordered) // 100) - 1)] * 1000, 2),
+            'max_ms': round(ordered[-1] * 1000, 2),
+        }
+
+    def metrics(self):
+        with self._lock:
+            return dict(
+                self.stats,
+                max_workers=self.max_workers,
+                max_queue=self.max_queue,
+                queue_wait=self._summary(list(self._queue_waits)),
+                run_time=self._summary(list(self._run_times)),
+            )
+
+# Global instance
+_password_hasher = None
+
+def get_password_hasher(max_workers=2, max_queue=32):
+    """Get or create password hasher instance"""
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher(max_workers, max_queue)
+    return _password_hasher
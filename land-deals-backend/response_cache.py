@@ -0,0 +1,261 @@
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response, g
+
+class LRUCacheBackend:
+    """In-process LRU backend. Tag versions are kept outside the LRU so they are never evicted"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self.entries[key] = (value, time.monotonic() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_versions(self, tags):
+        with self._lock:
+            return [self.versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self.versions[tag] = self.versions.get(tag, 0) + 1
+
+class RedisCacheBackend:
+    """Shared backend for multi-worker deployments; needs the optional `redis` package"""
+
+    def __init__(self, url, prefix='landdeals:cache:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, ex=int(ttl))
+
+    def get_versions(self, tags):
+        if not tags:
+            return []
+        values = self.client.mget([self.prefix + 'tag:' + tag for tag in tags])
+        return [int(v) if v is not None else 0 for v in values]
+
+    def bump(self, tags):
+        pipe = self.client.pipeline()
+        for tag in tags:
+            pipe.incr(self.prefix + 'tag:' + tag)
+        pipe.execute()
+
+def create_cache_backend(url=None, max_entries=1024):
+    """Build a backend from CACHE_BACKEND_URL: empty/'memory' for the in-process LRU, redis://... for Redis"""
+    if not url or url == 'memory':
+        return LRUCacheBackend(max_entries)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            return RedisCacheBackend(url)
+        except ImportError:
+            print("[cache] redis package not installed, using in-process cache")
+            return LRUCacheBackend(max_entries)
+    raise ValueError(f"Unsupported cache backend: {url}")
+
+# Headers that describe one particular transfer and must not be replayed from the cache
+_UNCACHED_HEADERS = {'content-length', 'set-cookie', 'x-cache', 'content-encoding', 'transfer-encoding', 'vary'}
+
+class ResponseCache:
+    """
+    Cache for GET responses, keyed on path, query args, user scope and the current
+    version of every tag the endpoint depends on. Writes bump tag versions, so entries
+    that depended on a changed tag are simply never looked up again.
+    """
+
+    def __init__(self, backend, default_ttl=60, max_body_bytes=5 * 1024 * 1024, enabled=True):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.max_body_bytes = max_body_bytes
+        self.enabled = enabled
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    # ---- metrics ----
+
+    def _count(self, tags, field):
+        with self._lock:
+            for tag in tags:
+                # Per-deal tags are rolled up so the metrics stay bounded
+                name = tag.split(':', 1)[0]
+                entry = self.stats.setdefault(name, {'hits': 0, 'misses': 0, 'invalidations': 0})
+                entry[field] += 1
+
+    def metrics(self):
+        """Per-tag hits, misses, invalidations and hit rate"""
+        with self._lock:
+            result = {}
+            for tag, entry in self.stats.items():
+                lookups = entry['hits'] + entry['misses']
+                result[tag] = dict(entry, hit_rate=round(entry['hits'] / lookups, 4) if lookups else None)
+            return result
+
+    # ---- keys and entries ----
+
+    def _format_tags(self, templates, kwargs):
+        values = dict(request.values.to_dict(), **kwargs)
+        tags = []
+        for template in templates:
+            try:
+                tags.append(template.format(**values))
+            except KeyError:
+                # The id is not available for this request; fall back to the collection tag
+                tags.append(template.split(':', 1)[0])
+        return tags
+
+    def _scope(self):
+        """Admin and auditor see the same data; everyone else gets a per-user scope"""
+        user = getattr(request, 'user', None)
+        if not user:
+            return 'anonymous'
+        access = getattr(request, 'user_access', None)
+        role = (access or {}).get('role') or user.get('role')
+        if role in ('admin', 'auditor'):
+            return f"role:{role}"
+        return f"user:{user.get('id')}"
+
+    def _key(self, tags, scope):
+        versions = self.backend.get_versions(tags)
+        raw = json.dumps([request.path, sorted(request.args.items(multi=True)), scope, tags, versions])
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _encode(self, response, body):
+        meta = {
+            'status': response.status_code,
+            'headers': [(k, v) for k, v in response.headers.items() if k.lower() not in _UNCACHED_HEADERS],
+        }
+        return json.dumps(meta).encode('utf-8') + b'\n' + body
+
+    def _decode(self, value):
+        meta, body = value.split(b'\n', 1)
+        meta = json.loads(meta)
+        response = make_response(body, meta['status'])
+        response.headers.clear()
+        for k, v in meta['headers']:
+            response.headers.add(k, v)
+        return response
+
+    def _store_stream(self, response, key, ttl):
+        """Pass a streamed body through unchanged, storing it once it has been sent in full"""
+        source = response.response
+
+        def tee():
+            chunks = []
+            size = 0
+            for chunk in source:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                if chunks is not None:
+                    size += len(chunk)
+                    if size > self.max_body_bytes:
+                        chunks = None
+                    else:
+                        chunks.append(chunk)
+                yield chunk
+            if chunks is not None:
+                self.backend.set(key, self._encode(response, b''.join(chunks)), ttl)
+
+        response.response = tee()
+
+    # ---- decorators ----
+
+    def cached(self, *tag_templates, ttl=None):
+        """
+        Cache a GET view. Tags may reference view args or request values,
+        e.g. @response_cache.cached('deal:{deal_id}', 'owners').
+        Clients can bypass the cache with Cache-Control: no-cache.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if not self.enabled or request.method != 'GET' or 'no-cache' in request.headers.get('Cache-Control', ''):
+                    return f(*args, **kwargs)
+
+                tags = self._format_tags(tag_templates, kwargs)
+                try:
+                    key = self._key(tags, self._scope())
+                    value = self.backend.get(key)
+                except Exception as e:
+                    # A cache outage must never take reads down with it
+                    print(f"[cache] lookup failed: {e}")
+                    return f(*args, **kwargs)
+
+                if value is not None:
+                    self._count(tags, 'hits')
+                    response = self._decode(value)
+                    response.headers['X-Cache'] = 'HIT'
+                    if response.headers.get('ETag'):
+                        response.make_conditional(request)
+                    return response
+
+                self._count(tags, 'misses')
+                g.response_cache_skip_store = False
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response.headers['X-Cache'] = 'MISS'
+                if g.response_cache_skip_store:
+                    return response
+                try:
+                    if response.is_streamed:
+                        self._store_stream(response, key, ttl or self.default_ttl)
+                    else:
+                        body = response.get_data()
+                        if len(body) <= self.max_body_bytes:
+                            self.backend.set(key, self._encode(response, body), ttl or self.default_ttl)
+                except Exception as e:
+                    print(f"[cache] store failed: {e}")
+                return response
+            return decorated
+        return decorator
+
+    def skip_store(self):
+        """Serve the current response but keep it out of the cache, e.g. it was read from a lagging replica"""
+        g.response_cache_skip_store = True
+
+    def invalidates(self, *tag_templates):
+        """Bump the given tags after a write view succeeds (any status below 400)"""
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                response = make_response(f(*args, **kwargs))
+                if response.status_code < 400:
+                    self.invalidate(*self._format_tags(tag_templates, kwargs))
+                return response
+            return decorated
+        return decorator
+
+    def invalidate(self, *tags):
+        try:
+            self.backend.bump(tags)
+        except Exception as e:
+            print(f"[cache] invalidation failed: {e}")
+        self._count(tags, 'invalidations')
@@ -0,0 +1,283 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+
+from deal_summary import lock_deals, refresh_deal_summaries
+from cashflow import refresh_cashflow_rows
+
+# MySQL named lock held by whichever process is running the jobs
+SCHEDULER_LOCK_NAME = 'landdeals_payment_scheduler'
+
+# MySQL error raised when a table or column does not exist
+ER_NO_SUCH_TABLE = 1146
+ER_BAD_FIELD_ERROR = 1054
+
+class LogNotifier:
+    """Prints every event; the default sink"""
+
+    def notify(self, event, payload):
+        print(f"[scheduler] {event}: {json.dumps(payload, default=str)}")
+
+class FileNotifier:
+    """Appends one JSON line per event to a file; handy for tests and for shipping to another system"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def notify(self, event, payload):
+        line = json.dumps({'event': event, 'at': datetime.now().isoformat(), 'payload': payload}, default=str)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+
+def create_notifier(url=None):
+    """Build a notifier from REMINDER_NOTIFIER_URL: empty/'log' prints, file:///path appends JSON lines"""
+    if not url or url == 'log':
+        return LogNotifier()
+    if url.startswith('file://'):
+        return FileNotifier(url[len('file://'):])
+    raise ValueError(f"Unsupported reminder notifier: {url}")
+
+class PaymentScheduler:
+    """
+    Periodic payment jobs:
+    - sweep pending payments whose due_date has passed to 'overdue', in id-ordered batches
+    - dispatch pending payment_reminders whose reminder_date falls within the window, once each
+    Every run first takes a MySQL named lock, so with several workers or hosts only one runs the jobs.
+    """
+
+    def __init__(self, get_connection, notifier=None, batch_size=500, reminder_window_days=1,
+                 on_change=None, lock_name=SCHEDULER_LOCK_NAME):
+        self.get_connection = get_connection
+        self.notifier = notifier or LogNotifier()
+        self.batch_size = batch_size
+        self.reminder_window_days = reminder_window_days
+        # Called after payments were changed, e.g. to invalidate cached responses
+        self.on_change = on_change
+        self.lock_name = lock_name
+        self.last_report = None
+        self._schema_checked = False
+        self._thread = None
+        self._stop = threading.Event()
+
+    # ---- schema ----
+
+    def ensure_schema(self, connection):
+        """Add the reminder bookkeeping column and the indexes the jobs rely on"""
+        if self._schema_checked:
+            return
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SHOW COLUMNS FROM payment_reminders LIKE 'notified_at'")
+            if not cursor.fetchall():
+                cursor.execute("ALTER TABLE payment_reminders ADD COLUMN notified_at DATETIME NULL")
+            cursor.execute("SHOW INDEX FROM payment_reminders WHERE Key_name = 'idx_payment_reminders_date_status'")
+            if not cursor.fetchall():
+                cursor.execute("ALTER TABLE payment_reminders ADD INDEX idx_payment_reminders_date_status (reminder_date, status)")
+        except Exception as e:
+            if getattr(e, 'errno', None) != ER_NO_SUCH_TABLE:
+                raise
+        cursor.execute("SHOW INDEX FROM payments WHERE Key_name = 'idx_payments_status_due'")
+        if not cursor.fetchall():
+            cursor.execute("ALTER TABLE payments ADD INDEX idx_payments_status_due (status, due_date)")
+        connection.commit()
+        cursor.close()
+        self._schema_checked = True
+
+    # ---- leader lock ----
+
+    def acquire_lock(self, connection):
+        cursor = connection.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (self.lock_name,))
+        row = cursor.fetchone()
+        cursor.close()
+        return bool(row and row[0] == 1)
+
+    def release_lock(self, connection):
+        cursor = connection.cursor()
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (self.lock_name,))
+        cursor.fetchall()
+        cursor.close()
+
+    # ---- jobs ----
+
+    def sweep_overdue(self, connection, dry_run=False):
+        """Flip pending payments past their due_date to 'overdue'; returns the number of payments swept"""
+        cursor = connection.cursor(dictionary=True)
+        swept = 0
+        last_id = 0
+        while True:
+            cursor.execute("""
+                SELECT id, deal_id, amount, payment_date, due_date, paid_to, installment_number
+                FROM payments
+                WHERE status = 'pending' AND due_date < CURDATE() AND id > %s
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, self.batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            if dry_run:
+                swept += len(rows)
+            else:
+                # Deal rows first, like every other summary writer (see deal_summary.lock_deal)
+                lock_deals(connection, [row['deal_id'] for row in rows])
+                # Re-check status under lock so a payment completed since the SELECT is left alone
+                # and only the payments actually flipped are refreshed and notified
+                ids = [row['id'] for row in rows]
+                cursor.execute(f"""
+                    SELECT id FROM payments
+                    WHERE id IN ({','.join(['%s'] * len(ids))}) AND status = 'pending'
+                    FOR UPDATE
+                """, ids)
+                still_pending = {row['id'] for row in cursor.fetchall()}
+                changed = [row for row in rows if row['id'] in still_pending]
+                if changed:
+                    ids = [row['id'] for row in changed]
+                    cursor.execute(f"UPDATE payments SET status = 'overdue' WHERE id IN ({','.join(['%s'] * len(ids))})", ids)
+                    refresh_deal_summaries(connection, [row['deal_id'] for row in changed])
+                    refresh_cashflow_rows(connection, changed)
+                connection.commit()
+                if changed:
+                    self.notifier.notify('payments_overdue', {'payments': changed})
+                swept += len(changed)
+            if len(rows) < self.batch_size:
+                break
+        cursor.close()
+        return swept
+
+    def dispatch_reminders(self, connection, dry_run=False):
+        """Notify pending reminders due within the window that have not been sent yet"""
+        cursor = connection.cursor(dictionary=True)
+        dispatched = 0
+        # Keyset on (reminder_date, id): a real run marks each batch, a dry run does not,
+        # so both page past the last row seen rather than re-reading the first batch
+        after = None
+        while True:
+            keyset = ''
+            params = [self.reminder_window_days]
+            if after is not None:
+                keyset = "AND (reminder_date > %s OR (reminder_date = %s AND id > %s))"
+                params += [after[0], after[0], after[1]]
+            try:
+                cursor.execute(f"""
+                    SELECT *
+                    FROM payment_reminders
+                    WHERE reminder_date <= DATE_ADD(CURDATE(), INTERVAL %s DAY)
+                      AND status = 'pending' AND notified_at IS NULL
+                      {keyset}
+                    ORDER BY reminder_date, id
+                    LIMIT %s
+                """, params + [self.batch_size])
+            except Exception as e:
+                if getattr(e, 'errno', None) in (ER_NO_SUCH_TABLE, ER_BAD_FIELD_ERROR):
+                    break
+                raise
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            dispatched += len(rows)
+            after = (rows[-1]['reminder_date'], rows[-1]['id'])
+            if not dry_run:
+                self.notifier.notify('payment_reminders_due', {'reminders': rows})
+                ids = [row['id'] for row in rows]
+                placeholders = ','.join(['%s'] * len(ids))
+                cursor.execute(f"UPDATE payment_reminders SET notified_at = NOW() WHERE id IN ({placeholders})", ids)
+                connection.commit()
+            if len(rows) < self.batch_size:
+                break
+        cursor.close()
+        return dispatched
+
+    # ---- run ----
+
+    def run_once(self, dry_run=False):
+        """
+        Run both jobs if this process wins the lock. The report says whether it ran,
+        how many payments were swept and how many reminders were dispatched.
+        """
+        report = {'ran': False, 'dry_run': dry_run, 'overdue_swept': 0, 'reminders_dispatched': 0,
+                  'started_at': datetime.now().isoformat()}
+        connection = self.get_connection()
+        if connection is None:
+            raise RuntimeError('Database connection failed')
+        try:
+            if not self.acquire_lock(connection):
+                report['skipped'] = 'another scheduler holds the lock'
+                return report
+            try:
+                started = time.monotonic()
+                self.ensure_schema(connection)
+                report['overdue_swept'] = self.sweep_overdue(connection, dry_run)
+                report['reminders_dispatched'] = self.dispatch_reminders(connection, dry_run)
+                report['ran'] = True
+                report['duration_ms'] = round((time.monotonic() - started) * 1000, 1)
+            finally:
+                self.release_lock(connection)
+        finally:
+            connection.close()
+
+        if report['overdue_swept'] and not dry_run and self.on_change:
+            self.on_change()
+        if not dry_run:
+            self.last_report = report
+        return report
+
+    def start(self, interval_seconds=300):
+        """Run the jobs every interval in a daemon thread (one per process; the lock picks the leader)"""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(interval_seconds):
+                try:
+                    self.run_once()
+                except Exception as e:
+                    print(f"[scheduler] run failed: {e}")
+
+        self._thread = threading.Thread(target=loop, name='payment-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+# Global instance
+_payment_scheduler = None
+
+def get_payment_scheduler(get_connection, notifier=None, on_change=None):
+    """Get or create payment scheduler instance"""
+    global _payment_scheduler
+    if _payment_scheduler is None:
+        _payment_scheduler = PaymentScheduler(get_connection, notifier, on_change=on_change)
+    return _payment_scheduler
+
+
+if __name__ == '__main__':
+    # For cron: python scheduler.py [--dry-run]
+    # Cached payment lists are invalidated through app's response cache. Only a shared backend
+    # (CACHE_BACKEND_URL=redis://...) reaches the web workers; with the in-process cache they
+    # keep serving pre-sweep pages until CACHE_TTL_SECONDS, so use SCHEDULER_ENABLED instead.
+    import argparse
+    from app import get_db_connection, response_cache
+    from response_cache import LRUCacheBackend
+
+    parser = argparse.ArgumentParser(description='Sweep overdue payments and dispatch due payment reminders')
+    parser.add_argument('--dry-run', action='store_true', help='report what would change without writing')
+    parser.add_argument('--window-days', type=int, default=1, help='dispatch reminders due within this many days')
+    parser.add_argument('--batch-size', type=int, default=500, help='rows per UPDATE batch')
+    parser.add_argument('--notifier', default=os.environ.get('REMINDER_NOTIFIER_URL'), help="'log' or file:///path/to/events.jsonl")
+    args = parser.parse_args()
+
+    if isinstance(response_cache.backend, LRUCacheBackend):
+        print("[scheduler] CACHE_BACKEND_URL is not shared; web workers will not see this run's cache invalidation")
+    scheduler = PaymentScheduler(get_db_connection, create_notifier(args.notifier),
+                                 batch_size=args.batch_size, reminder_window_days=args.window_days,
+                                 on_change=lambda: response_cache.invalidate('payments'))
+    print(json.dumps(scheduler.run_once(dry_run=args.dry_run), indent=2, default=str))
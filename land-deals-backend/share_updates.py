@@ -0,0 +1,118 @@
+class ShareUpdateError(Exception):
+    """Rejected share update; `status` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+SHARE_TABLES = {'owner': 'owners', 'investor': 'investors'}
+
+# Shares must add up to 100% within this tolerance
+TOTAL_TOLERANCE = 0.01
+
+def parse_shares(items, id_key, fields, skip_missing_ids=False):
+    """
+    Validate the submitted list before touching the database: every entry has an id and
+    numeric, non-negative values for `fields` ({column: (request key, converter)});
+    percentages are at most 100.
+    Entries without an id are dropped when skip_missing_ids is set (the legacy endpoints did that).
+    Returns {id: {column: value}}.
+    """
+    if not isinstance(items, list):
+        raise ShareUpdateError('Shares must be a list')
+    shares = {}
+    for item in items:
+        if not isinstance(item, dict):
+            raise ShareUpdateError('Each share must be an object')
+        share_id = item.get(id_key)
+        if not share_id:
+            if skip_missing_ids:
+                continue
+            raise ShareUpdateError(f'Each share must have {id_key} and {", ".join(key for key, _ in fields.values())}')
+        values = {}
+        for column, (key, convert) in fields.items():
+            try:
+                value = convert(item.get(key, 0) or 0)
+            except (ValueError, TypeError):
+                raise ShareUpdateError(f'Invalid {key} value')
+            if value < 0 or ('percentage' in column and value > 100):
+                raise ShareUpdateError(f'{key} must be between 0 and 100' if 'percentage' in column
+                                       else f'{key} must not be negative')
+            values[column] = value
+        try:
+            shares[int(share_id)] = values
+        except (ValueError, TypeError):
+            raise ShareUpdateError(f'Invalid {id_key} value')
+    if not shares:
+        raise ShareUpdateError('No shares provided')
+    return shares
+
+def apply_shares(connection, party_type, deal_id, shares, percentage_column, strict=True):
+    """
+    Apply a whole set of share changes for one deal in two statements on the caller's
+    connection (the caller commits):
+    1. one locking read of the deal and all its owner/investor rows, which checks the deal
+       exists, every submitted id belongs to it and the resulting percentages total 100%;
+    2. one UPDATE ... SET col = CASE id ... END for every submitted row.
+    With strict=False (the legacy owner-shares/investor-shares endpoints, whose client sends
+    rounded percentages) ids of other deals are skipped and the total is not checked.
+    Returns the deal's rows after the update, each with expected_amount
+    (purchase_amount x percentage / 100), plus purchase_amount, total_percentage and updated (count).
+    """
+    table = SHARE_TABLES[party_type]
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute(f"""
+            SELECT d.purchase_amount AS deal_purchase_amount, x.*
+            FROM deals d
+            LEFT JOIN {table} x ON x.deal_id = d.id
+            WHERE d.id = %s
+            ORDER BY x.id
+            FOR UPDATE
+        """, (deal_id,))
+        rows = cursor.fetchall()
+        if not rows:
+            raise ShareUpdateError('Deal not found', 404)
+        purchase_amount = float(rows[0]['deal_purchase_amount'] or 0)
+        existing = {row['id']: row for row in rows if row['id'] is not None}
+
+        unknown = sorted(set(shares) - set(existing))
+        if unknown and not strict:
+            shares = {share_id: values for share_id, values in shares.items() if share_id in existing}
+        elif unknown:
+            raise ShareUpdateError(f"{party_type.title()} {', '.join(str(i) for i in unknown)} not found for deal {deal_id}")
+
+        for share_id, values in shares.items():
+            existing[share_id].update(values)
+        total = sum(float(row.get(percentage_column) or 0) for row in existing.values())
+        if strict and abs(total - 100.0) > TOTAL_TOLERANCE:
+            raise ShareUpdateError(f'Total percentage must equal 100%. Current total: {round(total, 4)}%')
+
+        if shares:
+            columns = list(next(iter(shares.values())))
+            ids = list(shares)
+            set_clauses = []
+            params = []
+            for column in columns:
+                set_clauses.append(f"{column} = CASE id {' '.join(['WHEN %s THEN %s'] * len(ids))} END")
+                for share_id in ids:
+                    params.extend([share_id, shares[share_id][column]])
+            params.append(deal_id)
+            params.extend(ids)
+            cursor.execute(f"""
+                UPDATE {table}
+                SET {', '.join(set_clauses)}
+                WHERE deal_id = %s AND id IN ({', '.join(['%s'] * len(ids))})
+            """, params)
+    finally:
+        cursor.close()
+
+    result = []
+    for row in existing.values():
+        row.pop('deal_purchase_amount', None)
+        row['expected_amount'] = round(purchase_amount * float(row.get(percentage_column) or 0) / 100, 2)
+        result.append(row)
+    return {'purchase_amount': purchase_amount, 'total_percentage': round(total, 4), 'updated': len(shares),
+            'rows': result}
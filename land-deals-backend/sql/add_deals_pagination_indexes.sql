@@ -0,0 +1,25 @@
+-- add_deals_pagination_indexes.sql
+-- Idempotent: composite indexes for /api/deals/paginated
+--   (created_at, id)         keyset paging in ORDER BY created_at DESC, id DESC
+--   (status, purchase_date)  status filter combined with a year range
+--   (purchase_date)          year range filter without a status
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = DATABASE() AND table_name = 'deals' AND index_name = 'idx_deals_created_at_id';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE deals ADD INDEX idx_deals_created_at_id (created_at, id)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = DATABASE() AND table_name = 'deals' AND index_name = 'idx_deals_status_purchase_date';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE deals ADD INDEX idx_deals_status_purchase_date (status, purchase_date)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = DATABASE() AND table_name = 'deals' AND index_name = 'idx_deals_purchase_date';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE deals ADD INDEX idx_deals_purchase_date (purchase_date)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
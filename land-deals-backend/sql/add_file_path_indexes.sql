@@ -0,0 +1,30 @@
+-- add_file_path_indexes.sql
+-- Idempotent: prefix indexes on file_path so the upload GC can check
+-- batches of paths with `file_path IN (...)` without scanning each table
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = DATABASE() AND table_name = 'documents' AND index_name = 'idx_documents_file_path';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE documents ADD INDEX idx_documents_file_path (file_path(255))', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = DATABASE() AND table_name = 'payment_proofs' AND index_name = 'idx_payment_proofs_file_path';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE payment_proofs ADD INDEX idx_payment_proofs_file_path (file_path(255))', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = DATABASE() AND table_name = 'owner_documents' AND index_name = 'idx_owner_documents_file_path';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE owner_documents ADD INDEX idx_owner_documents_file_path (file_path(255))', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = DATABASE() AND table_name = 'investor_documents' AND index_name = 'idx_investor_documents_file_path';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE investor_documents ADD INDEX idx_investor_documents_file_path (file_path(255))', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,134 @@
+-- add_hot_query_indexes.sql
+-- Idempotent: indexes recommended by `python -m benchmarks indexes` for the hot query set.
+-- An index is skipped when its columns are missing or an existing index already leads with them.
+SET @db := DATABASE();
+
+-- payments(deal_id, status, payment_type): payment tracking, deal financials, statements
+SELECT COUNT(*) INTO @cols FROM information_schema.columns
+ WHERE table_schema = @db AND table_name = 'payments' AND column_name IN ('deal_id', 'status', 'payment_type');
+SELECT COUNT(*) INTO @cnt FROM (
+  SELECT index_name, GROUP_CONCAT(column_name ORDER BY seq_in_index) AS cols
+  FROM information_schema.statistics WHERE table_schema = @db AND table_name = 'payments'
+  GROUP BY index_name) s
+ WHERE s.index_name = 'idx_payments_deal_status_type' OR s.cols = 'deal_id,status,payment_type' OR s.cols LIKE 'deal_id,status,payment_type,%';
+SET @sql = IF(@cols = 3 AND @cnt = 0, 'ALTER TABLE payments ADD INDEX idx_payments_deal_status_type (deal_id, status, payment_type)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- payment_parties(payment_id, party_type, role): investor-to-owner joins, ledger payer/payee columns
+SELECT COUNT(*) INTO @cols FROM information_schema.columns
+ WHERE table_schema = @db AND table_name = 'payment_parties' AND column_name IN ('payment_id', 'party_type', 'role');
+SELECT COUNT(*) INTO @cnt FROM (
+  SELECT index_name, GROUP_CONCAT(column_name ORDER BY seq_in_index) AS cols
+  FROM information_schema.statistics WHERE table_schema = @db AND table_name = 'payment_parties'
+  GROUP BY index_name) s
+ WHERE s.index_name = 'idx_payment_parties_payment_type_role' OR s.cols = 'payment_id,party_type,role' OR s.cols LIKE 'payment_id,party_type,role,%';
+SET @sql = IF(@cols = 3 AND @cnt = 0, 'ALTER TABLE payment_parties ADD INDEX idx_payment_parties_payment_type_role (payment_id, party_type, role)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- payment_proofs(payment_id, uploaded_at): latest proof per payment, proof lists
+SELECT COUNT(*) INTO @cols FROM information_schema.columns
+ WHERE table_schema = @db AND table_name = 'payment_proofs' AND column_name IN ('payment_id', 'uploaded_at');
+SELECT COUNT(*) INTO @cnt FROM (
+  SELECT index_name, GROUP_CONCAT(column_name ORDER BY seq_in_index) AS cols
+  FROM information_schema.statistics WHERE table_schema = @db AND table_name = 'payment_proofs'
+  GROUP BY index_name) s
+ WHERE s.index_name = 'idx_payment_proofs_payment_uploaded' OR s.cols = 'payment_id,uploaded_at' OR s.cols LIKE 'payment_id,uploaded_at,%';
+SET @sql = IF(@cols = 2 AND @cnt = 0, 'ALTER TABLE payment_proofs ADD INDEX idx_payment_proofs_payment_uploaded (payment_id, uploaded_at)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- activity_logs(entity_type, entity_id, timestamp): deal audit log (newest 100)
+SELECT COUNT(*) INTO @cols FROM information_schema.columns
+ WHERE table_schema = @db AND table_name = 'activity_logs' AND column_name IN ('entity_type', 'entity_id', 'timestamp');
+SELECT COUNT(*) INTO @cnt FROM (
+  SELECT index_name, GROUP_CONCAT(column_name ORDER BY seq_in_index) AS cols
+  FROM information_schema.statistics WHERE table_schema = @db AND table_name = 'activity_logs'
+  GROUP BY index_name) s
+ WHERE s.index_name = 'idx_activity_logs_entity_time' OR s.cols = 'entity_type,entity_id,timestamp' OR s.cols LIKE 'entity_type,entity_id,timestamp,%';
+SET @sql = IF(@cols = 3 AND @cnt = 0, 'ALTER TABLE activity_logs ADD INDEX idx_activity_logs_entity_time (entity_type, entity_id, timestamp)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- payment_reminders(payment_id, reminder_date): reminders per deal
+SELECT COUNT(*) INTO @cols FROM information_schema.columns
+ WHERE table_schema = @db AND table_name = 'payment_reminders' AND column_name IN ('payment_id', 'reminder_date');
+SELECT COUNT(*) INTO @cnt FROM (
+  SELECT index_name, GROUP_CONCAT(column_name ORDER BY seq_in_index) AS cols
+  FROM information_schema.statistics WHERE table_schema = @db AND table_name = 'payment_reminders'
+  GROUP BY index_name) s
+ WHERE s.index_name = 'idx_payment_reminders_payment_date' OR s.cols = 'payment_id,reminder_date' OR s.cols LIKE 'payment_id,reminder_date,%';
+SET @sql = IF(@cols = 2 AND @cnt = 0, 'ALTER TABLE payment_reminders ADD INDEX idx_payment_reminders_payment_date (payment_id, reminder_date)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- offers(deal_id, offer_date): offers per deal
+SELECT COUNT(*) INTO @cols FROM information_schema.columns
+ WHERE table_schema = @db AND table_name = 'offers' AND column_name IN ('deal_id', 'offer_date');
+SELECT COUNT(*) INTO @cnt FROM (
+  SELECT index_name, GROUP_CONCAT(column_name ORDER BY seq_in_index) AS cols
+  FROM information_schema.statistics WHERE table_schema = @db AND table_name = 'offers'
+  GROUP BY index_name) s
+ WHERE s.index_name = 'idx_offers_deal_date' OR s.cols = 'deal_id,offer_date' OR s.cols LIKE 'deal_id,offer_date,%';
+SET @sql = IF(@cols = 2 AND @cnt = 0, 'ALTER TABLE offers ADD INDEX idx_offers_deal_date (deal_id, offer_date)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- documents(owner_id): owner documents
+SELECT COUNT(*) INTO @cols FROM information_schema.columns
+ WHERE table_schema = @db AND table_name = 'documents' AND column_name IN ('owner_id');
+SELECT COUNT(*) INTO @cnt FROM (
+  SELECT index_name, GROUP_CONCAT(column_name ORDER BY seq_in_index) AS cols
+  FROM information_schema.statistics WHERE table_schema = @db AND table_name = 'documents'
+  GROUP BY index_name) s
+ WHERE s.index_name = 'idx_documents_owner' OR s.cols = 'owner_id' OR s.cols LIKE 'owner_id,%';
+SET @sql = IF(@cols = 1 AND @cnt = 0, 'ALTER TABLE documents ADD INDEX idx_documents_owner (owner_id)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- documents(investor_id): investor documents
+SELECT COUNT(*) INTO @cols FROM information_schema.columns
+ WHERE table_schema = @db AND table_name = 'documents' AND column_name IN ('investor_id');
+SELECT COUNT(*) INTO @cnt FROM (
+  SELECT index_name, GROUP_CONCAT(column_name ORDER BY seq_in_index) AS cols
+  FROM information_schema.statistics WHERE table_schema = @db AND table_name = 'documents'
+  GROUP BY index_name) s
+ WHERE s.index_name = 'idx_documents_investor' OR s.cols = 'investor_id' OR s.cols LIKE 'investor_id,%';
+SET @sql = IF(@cols = 1 AND @cnt = 0, 'ALTER TABLE documents ADD INDEX idx_documents_investor (investor_id)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- investors(parent_investor_id): linked duplicate investors
+SELECT COUNT(*) INTO @cols FROM information_schema.columns
+ WHERE table_schema = @db AND table_name = 'investors' AND column_name IN ('parent_investor_id');
+SELECT COUNT(*) INTO @cnt FROM (
+  SELECT index_name, GROUP_CONCAT(column_name ORDER BY seq_in_index) AS cols
+  FROM information_schema.statistics WHERE table_schema = @db AND table_name = 'investors'
+  GROUP BY index_name) s
+ WHERE s.index_name = 'idx_investors_parent' OR s.cols = 'parent_investor_id' OR s.cols LIKE 'parent_investor_id,%';
+SET @sql = IF(@cols = 1 AND @cnt = 0, 'ALTER TABLE investors ADD INDEX idx_investors_parent (parent_investor_id)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- users(username): login
+SELECT COUNT(*) INTO @cols FROM information_schema.columns
+ WHERE table_schema = @db AND table_name = 'users' AND column_name IN ('username');
+SELECT COUNT(*) INTO @cnt FROM (
+  SELECT index_name, GROUP_CONCAT(column_name ORDER BY seq_in_index) AS cols
+  FROM information_schema.statistics WHERE table_schema = @db AND table_name = 'users'
+  GROUP BY index_name) s
+ WHERE s.index_name = 'idx_users_username' OR s.cols = 'username' OR s.cols LIKE 'username,%';
+SET @sql = IF(@cols = 1 AND @cnt = 0, 'ALTER TABLE users ADD INDEX idx_users_username (username)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,51 @@
+-- add_investor_match_keys.sql
+-- Idempotent: normalized generated key columns and indexes on investors for
+-- /api/investors/available (anti-join against the deal's investors, name prefix search)
+SELECT COUNT(*) INTO @cnt FROM information_schema.columns
+ WHERE table_schema = DATABASE() AND table_name = 'investors' AND column_name = 'name_key';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE investors ADD COLUMN name_key VARCHAR(255) AS (LEFT(LOWER(TRIM(COALESCE(investor_name, \'\'))), 255)) VIRTUAL', 'SELECT "column_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.columns
+ WHERE table_schema = DATABASE() AND table_name = 'investors' AND column_name = 'mobile_key';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE investors ADD COLUMN mobile_key VARCHAR(50) AS (LEFT(TRIM(COALESCE(mobile, \'\')), 50)) VIRTUAL', 'SELECT "column_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.columns
+ WHERE table_schema = DATABASE() AND table_name = 'investors' AND column_name = 'email_key';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE investors ADD COLUMN email_key VARCHAR(255) AS (LEFT(LOWER(TRIM(COALESCE(email, \'\'))), 255)) VIRTUAL', 'SELECT "column_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = DATABASE() AND table_name = 'investors' AND index_name = 'idx_investors_keys';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE investors ADD INDEX idx_investors_keys (name_key, mobile_key, email_key)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = DATABASE() AND table_name = 'investors' AND index_name = 'idx_investors_deal_name_key';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE investors ADD INDEX idx_investors_deal_name_key (deal_id, name_key)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = DATABASE() AND table_name = 'investors' AND index_name = 'idx_investors_deal_mobile_key';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE investors ADD INDEX idx_investors_deal_mobile_key (deal_id, mobile_key)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = DATABASE() AND table_name = 'investors' AND index_name = 'idx_investors_deal_email_key';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE investors ADD INDEX idx_investors_deal_email_key (deal_id, email_key)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,28 @@
+-- add_scheduler_indexes.sql
+-- Idempotent: indexes and bookkeeping column used by scheduler.py
+-- (overdue sweep over payments, reminder dispatch over payment_reminders)
+SET @db := DATABASE();
+
+-- (status, due_date) finds pending payments past their due date
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = @db AND table_name = 'payments' AND index_name = 'idx_payments_status_due';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE payments ADD INDEX idx_payments_status_due (status, due_date)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- (reminder_date, status) selects reminders due within the dispatch window
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = @db AND table_name = 'payment_reminders' AND index_name = 'idx_payment_reminders_date_status';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE payment_reminders ADD INDEX idx_payment_reminders_date_status (reminder_date, status)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- notified_at marks reminders already dispatched so each is sent once
+SELECT COUNT(*) INTO @cnt FROM information_schema.columns
+ WHERE table_schema = @db AND table_name = 'payment_reminders' AND column_name = 'notified_at';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE payment_reminders ADD COLUMN notified_at DATETIME NULL', 'SELECT "column_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
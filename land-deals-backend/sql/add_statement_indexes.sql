@@ -0,0 +1,41 @@
+-- add_statement_indexes.sql
+-- Idempotent: indexes behind /api/investors/<id>/statement and /api/owners/<id>/statement
+SET @db := DATABASE();
+
+-- (party_type, party_id, role) finds a person's investor-to-owner payment legs
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = @db AND table_name = 'payment_parties' AND index_name = 'idx_payment_parties_party_role';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE payment_parties ADD INDEX idx_payment_parties_party_role (party_type, party_id, role)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- (deal_id, paid_by) finds the miscellaneous payments a person made on their deals
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = @db AND table_name = 'payments' AND index_name = 'idx_payments_deal_paid_by';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE payments ADD INDEX idx_payments_deal_paid_by (deal_id, paid_by)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Person matching: name lookups on owners and investors, and linked duplicate investors
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = @db AND table_name = 'owners' AND index_name = 'idx_owners_name';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE owners ADD INDEX idx_owners_name (name)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = @db AND table_name = 'investors' AND index_name = 'idx_investors_name';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE investors ADD INDEX idx_investors_name (investor_name)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = @db AND table_name = 'investors' AND index_name = 'idx_investors_parent';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE investors ADD INDEX idx_investors_parent (parent_investor_id)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
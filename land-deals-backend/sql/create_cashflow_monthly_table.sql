@@ -0,0 +1,14 @@
+-- create_cashflow_monthly_table.sql
+-- Idempotent: cashflow_monthly rollups (deal x month x payment_type x direction x status)
+-- read by /api/analytics/cashflow. Populate or repair them with: python cashflow.py
+CREATE TABLE IF NOT EXISTS `cashflow_monthly` (
+  `deal_id` INT NOT NULL,
+  `month` DATE NOT NULL,
+  `payment_type` VARCHAR(50) NOT NULL,
+  `direction` ENUM('in', 'out') NOT NULL,
+  `status` VARCHAR(20) NOT NULL,
+  `payment_count` INT NOT NULL DEFAULT 0,
+  `total` DECIMAL(15,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`deal_id`, `month`, `payment_type`, `direction`, `status`),
+  INDEX `idx_cashflow_monthly_month` (`month`, `status`, `deal_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,37 @@
+-- create_deal_financial_summary_table.sql
+-- Idempotent: deal_financial_summary (one row per deal, read by /api/deals/<deal_id>/financials)
+-- and deals.sold_price. Populate or repair it with: python deal_summary.py
+SET @db := DATABASE();
+SELECT COUNT(*) INTO @exists FROM information_schema.TABLES WHERE TABLE_SCHEMA = @db AND TABLE_NAME = 'deal_financial_summary';
+SET @sql = IF(@exists = 0,
+  'CREATE TABLE `deal_financial_summary` (
+     `deal_id` INT PRIMARY KEY,
+     `purchase_amount` DECIMAL(15,2) NULL,
+     `sold_price` DECIMAL(15,2) NULL,
+     `payment_count` INT NOT NULL DEFAULT 0,
+     `total_payments` DECIMAL(15,2) NOT NULL DEFAULT 0,
+     `completed_payments` DECIMAL(15,2) NOT NULL DEFAULT 0,
+     `pending_payments` DECIMAL(15,2) NOT NULL DEFAULT 0,
+     `overdue_payments` DECIMAL(15,2) NOT NULL DEFAULT 0,
+     `land_payments_completed` DECIMAL(15,2) NOT NULL DEFAULT 0,
+     `payments_by_mode` TEXT NULL,
+     `total_expenses` DECIMAL(15,2) NOT NULL DEFAULT 0,
+     `total_invested` DECIMAL(15,2) NOT NULL DEFAULT 0,
+     `outstanding_purchase` DECIMAL(15,2) NULL,
+     `cost_basis` DECIMAL(15,2) NULL,
+     `profit` DECIMAL(15,2) NULL,
+     `profit_margin` DECIMAL(9,4) NULL,
+     `profit_allocation` TEXT NULL,
+     `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+   ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;'
+  , 'SELECT "table_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.columns
+ WHERE table_schema = @db AND table_name = 'deals' AND column_name = 'sold_price';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE deals ADD COLUMN sold_price DECIMAL(15,2) NULL', 'SELECT "column_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,42 @@
+-- create_installment_plans_table.sql
+-- Idempotent: installment_plans table, payments.plan_id and the indexes behind
+-- /api/payments/<deal_id>/<payment_id>/installments and the plan aggregate endpoints
+SET @db := DATABASE();
+SELECT COUNT(*) INTO @exists FROM information_schema.TABLES WHERE TABLE_SCHEMA = @db AND TABLE_NAME = 'installment_plans';
+SET @sql = IF(@exists = 0,
+  'CREATE TABLE `installment_plans` (
+     `id` INT AUTO_INCREMENT PRIMARY KEY,
+     `deal_id` INT NOT NULL,
+     `total_amount` DECIMAL(15,2) NOT NULL,
+     `total_installments` INT NOT NULL,
+     `payment_type` VARCHAR(50) NULL,
+     `created_by` INT NULL,
+     `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+     INDEX `idx_installment_plans_deal` (`deal_id`)
+   ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;'
+  , 'SELECT "table_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.columns
+ WHERE table_schema = @db AND table_name = 'payments' AND column_name = 'plan_id';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE payments ADD COLUMN plan_id INT NULL', 'SELECT "column_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- (plan_id, status, due_date, amount) covers the per-plan paid/due/overdue aggregates
+SELECT COUNT(*) INTO @cnt FROM information_schema.statistics
+ WHERE table_schema = @db AND table_name = 'payments' AND index_name = 'idx_payments_plan_status_due';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE payments ADD INDEX idx_payments_plan_status_due (plan_id, status, due_date, amount)', 'SELECT "index_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT COUNT(*) INTO @cnt FROM information_schema.table_constraints
+ WHERE table_schema = @db AND table_name = 'payments' AND constraint_name = 'fk_payments_plan';
+SET @sql = IF(@cnt = 0, 'ALTER TABLE payments ADD CONSTRAINT fk_payments_plan FOREIGN KEY (plan_id) REFERENCES installment_plans(id) ON DELETE SET NULL', 'SELECT "constraint_exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,205 @@
+import csv
+import io
+from io import BytesIO
+
+# Per party type: table, name column, the role it plays on investor-to-owner payments
+PARTY_TABLES = {
+    'investor': {'table': 'investors', 'name': 'investor_name', 'role': 'payer'},
+    'owner': {'table': 'owners', 'name': 'name', 'role': 'recipient'},
+}
+
+# Neither counts as miscellaneous: land purchases are the deal itself and
+# investor-to-owner payments are already the paid amount
+NON_MISC_PAYMENT_TYPES = ('land_purchase', 'investor_to_owner')
+
+CSV_COLUMNS = ['deal_id', 'project_name', 'deal_status', 'record_id', 'percentage_share', 'committed_amount',
+               'paid_amount', 'payment_count', 'miscellaneous_amount', 'balance']
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+def _money(value):
+    return round(float(value or 0), 2)
+
+def find_person(cursor, party_type, party_id):
+    """The person behind one investor/owner row, or None (contact fields only, no ID numbers)"""
+    spec = PARTY_TABLES[party_type]
+    cursor.execute(f"""
+        SELECT id, {spec['name']} AS name, mobile, email
+        FROM {spec['table']}
+        WHERE id = %s
+    """, (party_id,))
+    return cursor.fetchone()
+
+def find_records(cursor, party_type, person):
+    """
+    Ids of every per-deal row belonging to the person, matched the way the detail endpoints
+    match them (same id, parent_investor_id for investors, or same name with compatible
+    mobile/email). Each branch is its own indexed lookup joined by UNION instead of one OR.
+    """
+    spec = PARTY_TABLES[party_type]
+    branches = [f"SELECT id FROM {spec['table']} WHERE id = %s"]
+    params = [person['id']]
+    if party_type == 'investor':
+        branches.append("SELECT id FROM investors WHERE parent_investor_id = %s")
+        params.append(person['id'])
+    branches.append(f"""
+        SELECT id FROM {spec['table']}
+        WHERE {spec['name']} = %s
+          AND (mobile = %s OR mobile IS NULL OR %s IS NULL)
+          AND (email = %s OR email IS NULL OR %s IS NULL)
+    """)
+    params.extend([person['name'], person['mobile'], person['mobile'], person['email'], person['email']])
+    cursor.execute(' UNION '.join(branches), params)
+    return sorted(row['id'] for row in cursor.fetchall())
+
+def build_statement(cursor, party_type, party_id, include_payments=False):
+    """
+    Statement of one investor or owner across all their deals, in the same handful of
+    set-based queries however many deals there are. Per deal:
+    - committed_amount: the investor's investment_amount, or the owner's share of purchase_amount
+    - paid_amount: completed investor-to-owner payments the investor made / the owner received
+    - miscellaneous_amount: other completed payments the person paid (land purchases excluded)
+    - balance: committed_amount - paid_amount, not below zero
+    Returns None when the person does not exist. `cursor` must be a dictionary cursor.
+    """
+    spec = PARTY_TABLES[party_type]
+    person = find_person(cursor, party_type, party_id)
+    if person is None:
+        return None
+    record_ids = find_records(cursor, party_type, person)
+
+    committed_column = 'x.investment_amount' if party_type == 'investor' else 'NULL'
+    cursor.execute(f"""
+        SELECT x.id AS record_id, x.deal_id, x.{spec['name']} AS name, x.percentage_share,
+               {committed_column} AS investment_amount,
+               d.project_name, d.status AS deal_status, d.purchase_amount
+        FROM {spec['table']} x
+        JOIN deals d ON d.id = x.deal_id
+        WHERE x.id IN ({_placeholders(record_ids)})
+        ORDER BY d.created_at DESC, x.id
+    """, record_ids)
+    records = cursor.fetchall()
+    record_ids = [r['record_id'] for r in records]
+    deal_ids = sorted({r['deal_id'] for r in records})
+
+    paid = {}
+    misc_rows = []
+    if records:
+        cursor.execute(f"""
+            SELECT pp.party_id, SUM(p.amount) AS paid_amount, COUNT(*) AS payment_count
+            FROM payment_parties pp
+            JOIN payments p ON p.id = pp.payment_id
+            WHERE pp.party_type = %s AND pp.role = %s AND pp.party_id IN ({_placeholders(record_ids)})
+              AND p.payment_type = 'investor_to_owner' AND p.status = 'completed'
+            GROUP BY pp.party_id
+        """, [party_type, spec['role']] + record_ids)
+        paid = {row['party_id']: row for row in cursor.fetchall()}
+
+        # paid_by holds the row id, '<party_type>_<id>' or the person's name
+        payer_keys = sorted({str(rid) for rid in record_ids} | {f"{party_type}_{rid}" for rid in record_ids}
+                            | {r['name'] for r in records if r['name']})
+        cursor.execute(f"""
+            SELECT p.id AS payment_id, p.deal_id, p.paid_by, p.amount, p.payment_date, p.payment_type,
+                   p.status, p.notes, p.description
+            FROM payments p
+            WHERE p.deal_id IN ({_placeholders(deal_ids)}) AND p.paid_by IN ({_placeholders(payer_keys)})
+              AND p.status = 'completed' AND p.payment_type NOT IN ({_placeholders(NON_MISC_PAYMENT_TYPES)})
+            ORDER BY p.payment_date DESC, p.id DESC
+        """, deal_ids + payer_keys + list(NON_MISC_PAYMENT_TYPES))
+        misc_rows = cursor.fetchall()
+
+    deals = []
+    for record in records:
+        rid = record['record_id']
+        keys = {str(rid), f"{party_type}_{rid}", record['name']}
+        misc = [m for m in misc_rows if m['deal_id'] == record['deal_id'] and m['paid_by'] in keys]
+        if party_type == 'investor':
+            committed = _money(record['investment_amount'])
+        else:
+            committed = _money(float(record['purchase_amount'] or 0) * float(record['percentage_share'] or 0) / 100)
+        paid_amount = _money(paid.get(rid, {}).get('paid_amount'))
+        entry = {
+            'deal_id': record['deal_id'],
+            'project_name': record['project_name'],
+            'deal_status': record['deal_status'],
+            'record_id': rid,
+            'percentage_share': float(record['percentage_share'] or 0),
+            'committed_amount': committed,
+            'paid_amount': paid_amount,
+            'payment_count': paid.get(rid, {}).get('payment_count', 0),
+            'miscellaneous_amount': _money(sum(float(m['amount'] or 0) for m in misc)),
+            'balance': _money(max(0, committed - paid_amount)),
+        }
+        if include_payments:
+            entry['miscellaneous_payments'] = [{k: v for k, v in m.items() if k not in ('deal_id', 'paid_by')} for m in misc]
+        deals.append(entry)
+
+    return {
+        'party_type': party_type,
+        'person': person,
+        'deals': deals,
+        'totals': {
+            'deals': len(deals),
+            'committed_amount': _money(sum(d['committed_amount'] for d in deals)),
+            'paid_amount': _money(sum(d['paid_amount'] for d in deals)),
+            'miscellaneous_amount': _money(sum(d['miscellaneous_amount'] for d in deals)),
+            'balance': _money(sum(d['balance'] for d in deals)),
+        },
+    }
+
+def statement_csv(statement):
+    """One row per deal plus a totals row"""
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(CSV_COLUMNS)
+    for deal in statement['deals']:
+        w.writerow([deal[c] for c in CSV_COLUMNS])
+    totals = statement['totals']
+    w.writerow(['TOTAL', f"{totals['deals']} deals", '', '', '', totals['committed_amount'], totals['paid_amount'],
+                '', totals['miscellaneous_amount'], totals['balance']])
+    return buf.getvalue()
+
+def statement_pdf(statement, reportlab):
+    """Render the statement with reportlab (the tuple returned by load_reportlab); returns a BytesIO"""
+    A4, canvas, _ = reportlab
+    person = statement['person']
+    totals = statement['totals']
+    buff = BytesIO()
+    c = canvas.Canvas(buff, pagesize=A4)
+    width, height = A4
+    y = height - 40
+    c.setFont('Helvetica-Bold', 14)
+    c.drawString(40, y, f"{statement['party_type'].title()} Statement: {person['name']}")
+    y -= 18
+    c.setFont('Helvetica', 10)
+    c.drawString(40, y, f"Mobile: {person.get('mobile') or '-'}   Email: {person.get('email') or '-'}")
+    y -= 26
+
+    columns = [(40, 'Deal'), (250, 'Committed'), (330, 'Paid'), (410, 'Misc.'), (490, 'Balance')]
+
+    def header(y):
+        c.setFont('Helvetica-Bold', 9)
+        for x, label in columns:
+            c.drawString(x, y, label)
+        c.setFont('Helvetica', 9)
+        return y - 14
+
+    y = header(y)
+    for deal in statement['deals']:
+        if y < 80:
+            c.showPage()
+            y = header(height - 40)
+        c.drawString(40, y, f"#{deal['deal_id']} {deal['project_name'] or ''}"[:40])
+        for (x, _), key in zip(columns[1:], ('committed_amount', 'paid_amount', 'miscellaneous_amount', 'balance')):
+            c.drawRightString(x + 70, y, format(deal[key], ',.2f'))
+        y -= 14
+
+    y -= 6
+    c.setFont('Helvetica-Bold', 9)
+    c.drawString(40, y, f"Total ({totals['deals']} deals)")
+    for (x, _), key in zip(columns[1:], ('committed_amount', 'paid_amount', 'miscellaneous_amount', 'balance')):
+        c.drawRightString(x + 70, y, format(totals[key], ',.2f'))
+    c.save()
+    buff.seek(0)
+    return buff
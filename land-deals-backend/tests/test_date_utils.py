@@ -0,0 +1,99 @@
+import importlib
+from datetime import date, datetime
+
+import pytest
+
+import date_utils
+from date_utils import normalize_date, normalize_dates
+
+
+@pytest.fixture
+def slash_order(monkeypatch):
+    """Set the process-wide SLASH_DATE_ORDER for one test"""
+    def set_order(order):
+        monkeypatch.setattr(date_utils, 'SLASH_DATE_ORDER', order)
+    return set_order
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2024-03-04', '2024-03-04'),
+    ('2024-03-04T18:30:00.000Z', '2024-03-04'),
+    ('2024-03-04 10:30:00', '2024-03-04'),
+    ('2024-03-04T10:30:00+05:30', '2024-03-04'),
+    ('Mon, 04 Mar 2024 00:00:00 GMT', '2024-03-04'),
+    ('Mon, 04 Mar 2024 00:00:00 GM', '2024-03-04'),
+    ('  2024-03-04  ', '2024-03-04'),
+    (date(2024, 3, 4), '2024-03-04'),
+    (datetime(2024, 3, 4, 23, 59), '2024-03-04'),
+])
+def test_unambiguous_forms(value, expected):
+    assert normalize_date(value) == expected
+    assert normalize_date(value, slash_order='DMY') == expected
+
+
+@pytest.mark.parametrize('order, expected', [('MDY', '2024-03-04'), ('DMY', '2024-04-03')])
+def test_ambiguous_slash_date_follows_configured_order(slash_order, order, expected):
+    slash_order(order)
+    assert normalize_date('03/04/2024') == expected
+    assert normalize_dates(['03/04/2024', '03/04/2024']) == [expected, expected]
+
+
+@pytest.mark.parametrize('order, expected', [('MDY', '2024-03-04'), ('DMY', '2024-04-03')])
+def test_explicit_order_overrides_configured_order(slash_order, order, expected):
+    slash_order('DMY' if order == 'MDY' else 'MDY')
+    assert normalize_date('03/04/2024', slash_order=order) == expected
+
+
+@pytest.mark.parametrize('order', ['MDY', 'DMY'])
+@pytest.mark.parametrize('value', ['25/12/2024', '12/25/2024'])
+def test_slash_date_valid_in_one_order_only(order, value):
+    assert normalize_date(value, slash_order=order) == '2024-12-25'
+
+
+@pytest.mark.parametrize('order, expected', [('MDY', '2024-01-02'), ('DMY', '2024-02-01')])
+def test_single_digit_slash_date(order, expected):
+    assert normalize_date('1/2/2024', slash_order=order) == expected
+
+
+def test_slash_order_is_read_from_environment(monkeypatch):
+    monkeypatch.setenv('SLASH_DATE_ORDER', 'dmy')
+    try:
+        reloaded = importlib.reload(date_utils)
+        assert reloaded.SLASH_DATE_ORDER == 'DMY'
+        assert reloaded.normalize_date('03/04/2024') == '2024-04-03'
+    finally:
+        monkeypatch.undo()
+        importlib.reload(date_utils)
+
+
+@pytest.mark.parametrize('order', ['MDY', 'DMY'])
+@pytest.mark.parametrize('value', [
+    '13/13/2024',          # no valid reading in either order
+    '31/02/2024',          # DD/MM and MM/DD both impossible
+    '02/30/2024',
+    '2024-02-30',          # ISO, not a calendar date
+    '2023-02-29',          # not a leap year
+    '2024-13-01',
+    'Mon, 04 Foo 2024 00:00:00 GMT',
+    'Mon, 31 Feb 2024 00:00:00 GMT',
+    '03/04/24',            # two-digit year
+    '03-04-2024',
+    'not a date',
+    '',
+    '   ',
+    None,
+])
+def test_invalid_dates_return_none(order, value):
+    assert normalize_date(value, slash_order=order) is None
+
+
+def test_leap_day_is_valid():
+    assert normalize_date('2024-02-29') == '2024-02-29'
+    assert normalize_date('29/02/2024', slash_order='DMY') == '2024-02-29'
+    assert normalize_date('02/29/2024', slash_order='MDY') == '2024-02-29'
+
+
+def test_normalize_dates_keeps_positions_and_invalid_entries():
+    values = ['2024-03-04', '', None, '13/13/2024', '03/04/2024', date(2024, 1, 1)]
+    assert normalize_dates(values, slash_order='DMY') == [
+        '2024-03-04', None, None, None, '2024-04-03', '2024-01-01']
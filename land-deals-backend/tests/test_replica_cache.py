@@ -0,0 +1,71 @@
+import pytest
+
+flask = pytest.importorskip('flask')
+pytest.importorskip('mysql.connector')
+
+from db_router import ReplicaRouter
+from response_cache import ResponseCache, LRUCacheBackend
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+
+@pytest.fixture
+def client():
+    """
+    One cached payments view and one writer, both as admins (shared cache scope).
+    The replica lags: it never sees the write made through the primary.
+    """
+    primary = {'amount': 100}
+    replica = dict(primary)
+    router = ReplicaRouter({}, [('replica', 3306)], sticky_seconds=5)
+    router.get_replica_connection = lambda: FakeConnection(dict(replica))
+    cache = ResponseCache(LRUCacheBackend())
+    app = flask.Flask(__name__)
+
+    @app.before_request
+    def authenticate():
+        flask.request.user = {'id': int(flask.request.headers['X-User']), 'role': 'admin'}
+
+    @app.after_request
+    def record_user_write(response):
+        if flask.request.method == 'POST' and response.status_code < 400:
+            router.record_write(flask.request.user['id'])
+        return response
+
+    @app.route('/payments')
+    @cache.cached('payments')
+    def list_payments():
+        conn = router.get_read_connection(flask.request.user['id'], lambda: FakeConnection(dict(primary)),
+                                          on_lagging_read=cache.skip_store)
+        return flask.jsonify(conn.rows)
+
+    @app.route('/payments', methods=['POST'])
+    @cache.invalidates('payments')
+    def update_payment():
+        primary['amount'] = 200
+        return flask.jsonify({'ok': True})
+
+    return app.test_client()
+
+
+def get(client, user):
+    response = client.get('/payments', headers={'X-User': str(user)})
+    return response.get_json()['amount'], response.headers.get('X-Cache')
+
+
+def test_writer_reads_own_write_after_another_user_read_the_lagging_replica(client):
+    assert client.post('/payments', headers={'X-User': '1'}).status_code == 200
+
+    # Another admin lands on the replica, which has not seen the write yet
+    assert get(client, 2) == (100, 'MISS')
+    # That stale answer was not stored, so the writer still reads the primary
+    assert get(client, 1) == (200, 'MISS')
+    assert get(client, 1) == (200, 'HIT')
+
+
+def test_replica_reads_are_cached_when_no_write_is_pending(client):
+    assert get(client, 2) == (100, 'MISS')
+    assert get(client, 2) == (100, 'HIT')
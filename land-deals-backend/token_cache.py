@@ -0,0 +1,131 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class TokenCache:
+    """
+    LRU cache of verified JWTs, keyed by a SHA-256 of the raw token, so a screen that fires a
+    dozen API calls verifies its token once. Entries live until the token's exp. Each entry can
+    also carry the user's access context (role, owner_id, investor_id), kept for a shorter
+    `access_ttl` because an admin may change it while the token is still valid.
+    Everything is dropped when the signing secret changes.
+    """
+
+    def __init__(self, max_entries=10000, access_ttl=60, default_ttl=3600):
+        self.max_entries = max_entries
+        self.access_ttl = access_ttl
+        # Used for tokens without an exp claim
+        self.default_ttl = default_ttl
+        self.entries = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0,
+                      'access_hits': 0, 'access_misses': 0, 'clears': 0}
+        self._secret = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def _check_secret(self, secret):
+        # Called with the lock held
+        if secret != self._secret:
+            if self._secret is not None:
+                self.entries.clear()
+                self.stats['clears'] += 1
+            self._secret = secret
+
+    def _entry(self, key):
+        # Called with the lock held
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry['expires_at'] <= time.time():
+            del self.entries[key]
+            self.stats['expired'] += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    # ---- verified claims ----
+
+    def get_claims(self, key, secret):
+        """Decoded claims for a token verified earlier with the same secret, or None"""
+        with self._lock:
+            self._check_secret(secret)
+            entry = self._entry(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['hits'] += 1
+            return entry['claims']
+
+    def put_claims(self, key, secret, claims):
+        exp = claims.get('exp')
+        expires_at = float(exp) if isinstance(exp, (int, float)) else time.time() + self.default_ttl
+        with self._lock:
+            self._check_secret(secret)
+            self.entries[key] = {'claims': claims, 'expires_at': expires_at, 'access': None, 'access_at': 0}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    # ---- user access context ----
+
+    def get_access(self, key):
+        with self._lock:
+            entry = self._entry(key)
+            if entry is None or entry['access'] is None or time.monotonic() - entry['access_at'] > self.access_ttl:
+                self.stats['access_misses'] += 1
+                return None
+            self.stats['access_hits'] += 1
+            return entry['access']
+
+    def put_access(self, key, access):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry['access'] = access
+                entry['access_at'] = time.monotonic()
+
+    def invalidate_user(self, user_id):
+        """Forget the cached access context of every token belonging to user_id"""
+        with self._lock:
+            for entry in self.entries.values():
+                if entry['claims'].get('user_id') == user_id:
+                    entry['access'] = None
+
+    def drop_user(self, user_id):
+        """Forget every token of a deleted user, so it has to be verified again"""
+        with self._lock:
+            for key in [k for k, e in self.entries.items() if e['claims'].get('user_id') == user_id]:
+                del self.entries[key]
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.stats['clears'] += 1
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            access_lookups = self.stats['access_hits'] + self.stats['access_misses']
+            return dict(
+                self.stats,
+                size=len(self.entries),
+                max_entries=self.max_entries,
+                hit_rate=round(self.stats['hits'] / lookups, 4) if lookups else None,
+                access_hit_rate=round(self.stats['access_hits'] / access_lookups, 4) if access_lookups else None,
+            )
+
+# Global instance
+_token_cache = None
+
+def get_token_cache(max_entries=10000, access_ttl=60):
+    """Get or create verified-token cache instance"""
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache(max_entries, access_ttl)
+    return _token_cache
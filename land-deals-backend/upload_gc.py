@@ -0,0 +1,293 @@
+import os
+import json
+import time
+import shutil
+import threading
+from collections import OrderedDict
+
+# Tables whose file_path column references files under the uploads folder
+REFERENCE_TABLES = ['documents', 'payment_proofs', 'owner_documents', 'investor_documents']
+
+# MySQL error raised when a reference table does not exist
+ER_NO_SUCH_TABLE = 1146
+
+# Background runs kept for status lookups
+MAX_TRACKED_RUNS = 20
+
+class UploadGarbageCollector:
+    """
+    Incremental garbage collector for the uploads folder.
+    Walks the tree in a stable order with os.scandir, remembers where it stopped in a state file,
+    checks files against the DB in batches and moves unreferenced ones to a quarantine folder.
+    """
+
+    def __init__(self, upload_folder, quarantine_folder, get_connection, batch_size=200,
+                 max_files_per_second=None, min_age_seconds=3600):
+        self.upload_folder = os.path.abspath(upload_folder)
+        self.quarantine_folder = os.path.abspath(quarantine_folder)
+        self.state_path = os.path.join(self.quarantine_folder, 'gc_state.json')
+        self.get_connection = get_connection
+        self.batch_size = batch_size
+        self.max_files_per_second = max_files_per_second
+        # Files younger than this may belong to an upload whose DB row is not committed yet
+        self.min_age_seconds = min_age_seconds
+        self.runs = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # ---- persisted cursor ----
+
+    def load_cursor(self):
+        """Return the relative path the previous run stopped at, or None to start from the top"""
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f).get('cursor')
+        except (OSError, ValueError):
+            return None
+
+    def save_cursor(self, cursor):
+        os.makedirs(self.quarantine_folder, exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'cursor': cursor, 'updated_at': time.time()}, f)
+        os.replace(tmp_path, self.state_path)
+
+    # ---- tree walk ----
+
+    def iter_files(self, start_after=None):
+        """
+        Yield (relative_path, size, mtime) for every file after `start_after`, in a stable
+        depth-first order (children sorted by name). Subtrees entirely before the cursor are
+        skipped without being listed.
+        """
+        cursor_parts = tuple(start_after.split('/')) if start_after else None
+
+        def walk(abs_dir, parts):
+            try:
+                with os.scandir(abs_dir) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                return
+            for entry in entries:
+                child = parts + (entry.name,)
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path == self.quarantine_folder:
+                        continue
+                    if cursor_parts and child < cursor_parts[:len(child)]:
+                        continue
+                    yield from walk(entry.path, child)
+                elif entry.is_file(follow_symlinks=False):
+                    if cursor_parts and child <= cursor_parts:
+                        continue
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    yield '/'.join(child), stat.st_size, stat.st_mtime
+
+        yield from walk(self.upload_folder, ())
+
+    # ---- reference check ----
+
+    def path_variants(self, rel_path):
+        """All the forms a file may have been stored under in file_path columns"""
+        return {
+            rel_path,
+            rel_path.replace('/', '\\'),
+            'uploads/' + rel_path,
+            '/uploads/' + rel_path,
+            os.path.join(self.upload_folder, *rel_path.split('/')),
+        }
+
+    def normalize_stored_path(self, stored_path):
+        """Map a stored file_path back to a path relative to the uploads folder"""
+        p = str(stored_path).replace('\\', '/')
+        upload_root = self.upload_folder.replace('\\', '/') + '/'
+        if p.startswith(upload_root):
+            return p[len(upload_root):]
+        idx = p.find('uploads/')
+        if idx != -1:
+            return p[idx + len('uploads/'):]
+        return p.lstrip('/')
+
+    def find_referenced(self, connection, rel_paths):
+        """Return the subset of rel_paths referenced by any row of REFERENCE_TABLES (one query per table)"""
+        variants = {}
+        for rel_path in rel_paths:
+            for v in self.path_variants(rel_path):
+                variants[v] = rel_path
+        values = list(variants.keys())
+        placeholders = ','.join(['%s'] * len(values))
+        referenced = set()
+        cursor = connection.cursor()
+        for table in REFERENCE_TABLES:
+            try:
+                cursor.execute(f"SELECT file_path FROM {table} WHERE file_path IN ({placeholders})", values)
+            except Exception as e:
+                if getattr(e, 'errno', None) == ER_NO_SUCH_TABLE:
+                    continue
+                raise
+            for (file_path,) in cursor.fetchall():
+                rel_path = variants.get(file_path) or self.normalize_stored_path(file_path)
+                referenced.add(rel_path)
+        cursor.close()
+        return referenced
+
+    # ---- quarantine ----
+
+    def quarantine(self, rel_path, run_id):
+        """Move a file into quarantine/<run_id>/<rel_path>; it can be restored by moving it back"""
+        src = os.path.join(self.upload_folder, *rel_path.split('/'))
+        dst = os.path.join(self.quarantine_folder, run_id, *rel_path.split('/'))
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.move(src, dst)
+        return dst
+
+    # ---- run ----
+
+    def run(self, dry_run=True, max_files=1000, max_files_per_second=None, min_age_seconds=None, run_id=None):
+        """
+        Process up to max_files files starting at the persisted cursor.
+        With dry_run the unreferenced files are only reported; otherwise they are quarantined.
+        The cursor is saved after each batch; when the walk reaches the end it resets to the top.
+        max_files_per_second and min_age_seconds apply to this run only (None uses the instance's).
+        """
+        rate = max_files_per_second if max_files_per_second is not None else self.max_files_per_second
+        min_age = min_age_seconds if min_age_seconds is not None else self.min_age_seconds
+        start_cursor = self.load_cursor()
+        run_id = run_id or time.strftime('%Y%m%dT%H%M%S')
+        now = time.time()
+        report = {
+            'dry_run': dry_run,
+            'start_cursor': start_cursor,
+            'scanned': 0,
+            'skipped_recent': 0,
+            'referenced': 0,
+            'unreferenced': [],
+            'reclaimable_bytes': 0,
+            'quarantined': 0,
+            'completed_pass': False,
+        }
+
+        connection = self.get_connection()
+        if connection is None:
+            raise RuntimeError('Database connection failed')
+        try:
+            batch = []
+            last_path = start_cursor
+            started = time.monotonic()
+            files = self.iter_files(start_cursor)
+            exhausted = True
+            for rel_path, size, mtime in files:
+                if report['scanned'] >= max_files:
+                    exhausted = False
+                    break
+                report['scanned'] += 1
+                if rate:
+                    # Rate limit so a run can share disk and DB with live traffic
+                    expected = report['scanned'] / float(rate)
+                    elapsed = time.monotonic() - started
+                    if expected > elapsed:
+                        time.sleep(expected - elapsed)
+                if now - mtime < min_age:
+                    report['skipped_recent'] += 1
+                else:
+                    batch.append((rel_path, size))
+                last_path = rel_path
+                if len(batch) >= self.batch_size:
+                    self._process_batch(connection, batch, report, dry_run, run_id)
+                    batch = []
+                    if not dry_run:
+                        self.save_cursor(last_path)
+            if batch:
+                self._process_batch(connection, batch, report, dry_run, run_id)
+        finally:
+            connection.close()
+
+        report['completed_pass'] = exhausted
+        report['next_cursor'] = None if exhausted else last_path
+        if not dry_run:
+            self.save_cursor(report['next_cursor'])
+        return report
+
+    # ---- background runs ----
+
+    def start(self, **run_kwargs):
+        """
+        Start run(**run_kwargs) on a background thread. Returns (status entry, started).
+        Only one run at a time walks the tree (they share the persisted cursor): while one is
+        running, its entry is returned with started=False instead of starting another.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return dict(self.runs[self._thread.name]), False
+            run_id = time.strftime('%Y%m%dT%H%M%S')
+            while run_id in self.runs:
+                run_id += '_'
+            self.runs[run_id] = {'run_id': run_id, 'status': 'running', 'started_at': time.time(),
+                                 'params': dict(run_kwargs), 'report': None, 'error': None}
+            while len(self.runs) > MAX_TRACKED_RUNS:
+                self.runs.popitem(last=False)
+            self._thread = threading.Thread(target=self._run_background, args=(run_id, run_kwargs),
+                                            name=run_id, daemon=True)
+            self._thread.start()
+            return dict(self.runs[run_id]), True
+
+    def _run_background(self, run_id, run_kwargs):
+        try:
+            report = self.run(run_id=run_id, **run_kwargs)
+            update = {'status': 'completed', 'report': report}
+        except Exception as e:
+            update = {'status': 'failed', 'error': str(e)}
+        with self._lock:
+            if run_id in self.runs:
+                self.runs[run_id].update(update, finished_at=time.time())
+
+    def get_run(self, run_id=None):
+        """Status entry of one background run, or of the latest when run_id is None; None if unknown"""
+        with self._lock:
+            if run_id is None:
+                run_id = next(reversed(self.runs), None)
+            entry = self.runs.get(run_id)
+            return dict(entry) if entry else None
+
+    def _process_batch(self, connection, batch, report, dry_run, run_id):
+        referenced = self.find_referenced(connection, [rel_path for rel_path, _ in batch])
+        for rel_path, size in batch:
+            if rel_path in referenced:
+                report['referenced'] += 1
+                continue
+            report['unreferenced'].append({'path': rel_path, 'size': size})
+            report['reclaimable_bytes'] += size
+            if not dry_run:
+                try:
+                    self.quarantine(rel_path, run_id)
+                    report['quarantined'] += 1
+                except OSError:
+                    pass
+
+# Global instance
+_upload_gc = None
+
+def get_upload_gc(upload_folder, quarantine_folder, get_connection):
+    """Get or create upload garbage collector instance"""
+    global _upload_gc
+    if _upload_gc is None:
+        _upload_gc = UploadGarbageCollector(upload_folder, quarantine_folder, get_connection)
+    return _upload_gc
+
+
+if __name__ == '__main__':
+    import argparse
+    from app import app, get_db_connection, UPLOAD_QUARANTINE_FOLDER
+
+    parser = argparse.ArgumentParser(description='Find and quarantine upload files no longer referenced by the database')
+    parser.add_argument('--apply', action='store_true', help='quarantine unreferenced files (default is a dry run)')
+    parser.add_argument('--max-files', type=int, default=1000, help='files to examine in this run')
+    parser.add_argument('--rate', type=float, default=None, help='max files per second')
+    parser.add_argument('--min-age', type=int, default=3600, help='ignore files modified within this many seconds')
+    args = parser.parse_args()
+
+    gc = UploadGarbageCollector(app.config['UPLOAD_FOLDER'], UPLOAD_QUARANTINE_FOLDER, get_db_connection)
+    print(json.dumps(gc.run(dry_run=not args.apply, max_files=args.max_files,
+                            max_files_per_second=args.rate, min_age_seconds=args.min_age), indent=2))
@@ -123,7 +123,7 @@ export const investorsAPI = {
   
   // Deal-Investor Association
   addToDeal: (dealId, investorData) => api.post(`/deals/${dealId}/investors`, investorData),
-  getAvailableInvestors: (dealId) => api.get(`/investors/available/${dealId}`),
+  getAvailableInvestors: (dealId, params = {}) => api.get(`/investors/available/${dealId}`, { params }),
   
   // Percentage shares management (exactly like owners)
   updatePercentageShares: (dealId, investorShares) => {
@@ -190,6 +190,15 @@ export const adminAPI = {
 
 paymentsAPI.listProofs = (dealId, paymentId) => api.get(`/payments/${dealId}/${paymentId}/proofs`)
 paymentsAPI.deleteProof = (dealId, paymentId, proofId) => api.delete(`/payments/${dealId}/${paymentId}/proofs/${proofId}`)
+// Bulk import: payments is an array (or a CSV File); options.params: { dry_run, force }
+paymentsAPI.bulkImport = (dealId, payments, options = {}) => {
+  if (payments instanceof File) {
+    const form = new FormData()
+    form.append('file', payments)
+    return api.post(`/payments/${dealId}/bulk`, form, { params: options.params || {}, headers: { 'Content-Type': 'multipart/form-data' } })
+  }
+  return api.post(`/payments/${dealId}/bulk`, payments, { params: options.params || {} })
+}
 
 // Ledger: flexible filter endpoint
 paymentsAPI.ledger = (filters) => api.get('/payments/ledger', { params: filters })
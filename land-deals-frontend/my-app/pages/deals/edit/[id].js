@@ -94,6 +94,7 @@ export default function EditDeal() {
         area_unit: dealData.deal?.area_unit || 'Acre',
         status: dealData.deal?.status || 'open',
         owners: dealData.owners?.length > 0 ? dealData.owners.map(owner => ({
+          id: owner.id,
           name: owner.name || '',
           mobile: owner.mobile || '',
           email: owner.email || '',
@@ -102,6 +103,7 @@ export default function EditDeal() {
           address: owner.address || ''
         })) : [{ name: '', mobile: '', email: '', aadhar_card: '', pan_card: '', address: '' }],
         investors: dealData.investors?.length > 0 ? dealData.investors.map(investor => ({
+          id: investor.id,
           investor_name: investor.investor_name || '',
           investment_amount: investor.investment_amount || '',
           investment_percentage: investor.investment_percentage || '',
@@ -111,6 +113,7 @@ export default function EditDeal() {
           pan_card: investor.pan_card || ''
         })) : [{ investor_name: '', investment_amount: '', investment_percentage: '', mobile: '', email: '', aadhar_card: '', pan_card: '' }],
         expenses: dealData.expenses?.length > 0 ? dealData.expenses.map(expense => ({
+          id: expense.id,
           expense_type: expense.expense_type || '',
           expense_description: expense.expense_description || '',
           amount: expense.amount || '',
@@ -120,6 +123,7 @@ export default function EditDeal() {
         })) : [{ expense_type: '', expense_description: '', amount: '', paid_by: '', expense_date: '', receipt_number: '' }],
         payment_mode: dealData.deal?.payment_mode || '',
         buyers: dealData.buyers?.length > 0 ? dealData.buyers.map(buyer => ({
+          id: buyer.id,
           name: buyer.name || '',
           mobile: buyer.mobile || '',
           email: buyer.email || '',